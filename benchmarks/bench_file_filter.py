@@ -0,0 +1,53 @@
+"""
+Per-file cost of deciding whether a file name should be copied.
+
+Compares the old per-call extension matching of FileCopy._should_handle_file
+with the FileFilter built once per run.
+
+    python -m benchmarks.bench_file_filter
+"""
+import random
+import timeit
+from src.file_filter import FileFilter
+from src.file_options import image_extensions, video_extensions
+
+NAMES = 100_000
+REPEAT = 5
+
+
+def make_names(count):
+    rng = random.Random(0)
+    extensions = list(image_extensions + video_extensions) + [".txt", ".pdf", ".docx", ".JPG"]
+    return [f"IMG_{i:06d}{rng.choice(extensions)}" for i in range(count)]
+
+
+def old_should_handle_file(filename):
+    file_extensions = image_extensions + video_extensions
+    return any(filename.lower().endswith(ext) for ext in file_extensions)
+
+
+def best_ns_per_name(match, names):
+    def run():
+        for name in names:
+            match(name)
+
+    return min(timeit.repeat(run, number=1, repeat=REPEAT)) / len(names) * 1e9
+
+
+def main():
+    names = make_names(NAMES)
+    extensions = image_extensions + video_extensions
+    cases = {
+        "any(endswith) per call": old_should_handle_file,
+        "FileFilter suffix set": FileFilter(extensions).match_name,
+        "FileFilter + globs": FileFilter(
+            extensions, include_patterns=["img_*"], exclude_patterns=["*9.*"]
+        ).match_name,
+    }
+
+    for label, match in cases.items():
+        print(f"{label:<26} {best_ns_per_name(match, names):8.1f} ns/file")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Memory held by the list of files of a run: plain path strings, a FileEntry
+list, and the FileTable watch batches and the benchmark suite hand the engine.
+The paths are made up, under long common prefixes like a NAS share, so nothing
+is written to disk.
+
+Every variant is built in a fresh process; the reported growth is its peak RSS
+minus the RSS before building the list, so it includes any temporary garbage.
+
+    python -m benchmarks.bench_file_table [number of files]
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import sys
+import time
+from benchmarks.bench_suite import _peak_rss_mb
+from src.file_table import FileTable
+from src.file_walker import FileEntry
+
+FILE_COUNT = 2_000_000
+FILES_PER_FOLDER = 200
+PREFIX = "/mnt/nas/share/family/photos/camera_uploads"
+
+
+def made_up_entries(count):
+    for i in range(count):
+        folder = i // FILES_PER_FOLDER
+        yield FileEntry(
+            f"{PREFIX}/{2000 + folder % 25}/event_{folder:06d}/IMG_{i:08d}.JPG",
+            3_000_000 + i,
+            1_600_000_000.0 + i,
+        )
+
+
+def build(variant, count):
+    before = _peak_rss_mb()
+    start = time.perf_counter()
+    if variant == "paths":
+        files = [entry.path for entry in made_up_entries(count)]
+    elif variant == "entries":
+        files = list(made_up_entries(count))
+    else:
+        files = FileTable()
+        for entry in made_up_entries(count):
+            files.append(entry)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in files:
+        pass
+    iterate_seconds = time.perf_counter() - start
+    return {
+        "growth_mb": _peak_rss_mb() - before,
+        "build_seconds": build_seconds,
+        "iterate_seconds": iterate_seconds,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else FILE_COUNT
+    print(f"{count} files")
+    print(f"{'variant':<10} {'RSS growth MB':>14} {'build s':>8} {'iterate s':>10}")
+    for variant in ("paths", "entries", "table"):
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            result = pool.submit(build, variant, count).result()
+        print(
+            f"{variant:<10} {result['growth_mb']:>14.0f} "
+            f"{result['build_seconds']:>8.2f} {result['iterate_seconds']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
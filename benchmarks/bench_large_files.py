@@ -0,0 +1,99 @@
+"""
+Copying one large file: shutil.copyfile, FileCopier's regular path and its
+large-file path (preallocation, sequential readahead, page cache dropping).
+
+Besides throughput it reports how much the page cache grew, read from the
+"Cached" line of /proc/meminfo, which is only meaningful on an otherwise idle
+Linux machine. The source is evicted from the cache before every run.
+
+    python -m benchmarks.bench_large_files [size in MiB] [folder]
+"""
+import errno
+import os
+import shutil
+import sys
+import tempfile
+import time
+from src.copy_backends import FileCopier
+
+SIZE_MB = 1024
+REPEAT = 3
+
+
+def cached_mb():
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("Cached:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def evict(path):
+    if hasattr(os, "posix_fadvise"):
+        with open(path, "rb") as file:
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def make_source(folder, size_mb):
+    path = os.path.join(folder, "source.mp4")
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as file:
+        for _ in range(size_mb):
+            file.write(block)
+    return path
+
+
+def userspace_only(copier):
+    # an always unsupported method makes FileCopier fall through to its userspace copy
+    def unsupported(src_fd, dst_fd, size, on_bytes):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    copier.methods = [("unsupported", unsupported)]
+    return copier
+
+
+def variants(size):
+    regular = size + 1
+    return {
+        "shutil.copyfile": lambda src, dst: shutil.copyfile(src, dst),
+        "FileCopier regular": FileCopier(large_file_threshold=regular).copy,
+        "FileCopier large": FileCopier(large_file_threshold=1).copy,
+        "userspace regular": userspace_only(FileCopier(large_file_threshold=regular)).copy,
+        "userspace large": userspace_only(FileCopier(large_file_threshold=1)).copy,
+    }
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else SIZE_MB
+    folder = sys.argv[2] if len(sys.argv) > 2 else None
+    with tempfile.TemporaryDirectory(dir=folder) as work_dir:
+        source = make_source(work_dir, size_mb)
+        destination = os.path.join(work_dir, "copy.mp4")
+        print(f"{'variant':<20} {'MB/s':>8} {'cache growth MB':>16}")
+        for label, copy in variants(os.path.getsize(source)).items():
+            best = None
+            growth = None
+            for _ in range(REPEAT):
+                evict(source)
+                before = cached_mb()
+                start = time.perf_counter()
+                copy(source, destination)
+                # the time includes getting the data to disk, the large path does it anyway
+                with open(destination, "rb") as file:
+                    os.fsync(file.fileno())
+                elapsed = time.perf_counter() - start
+                after = cached_mb()
+                os.remove(destination)
+                if best is None or elapsed < best:
+                    best = elapsed
+                if before is not None:
+                    growth = max(growth or 0, after - before)
+            growth_text = f"{growth:16.0f}" if growth is not None else f"{'n/a':>16}"
+            print(f"{label:<20} {size_mb / best:8.0f} {growth_text}")
+
+
+if __name__ == "__main__":
+    main()
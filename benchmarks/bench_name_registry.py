@@ -0,0 +1,64 @@
+"""
+Cost of picking unique destination names when every file has the same name.
+
+The old approaches probe the disk (copy mode) or scan a list (zip mode) once per
+counter value, so they are quadratic and are only run on a small sample.
+
+    python -m benchmarks.bench_name_registry
+"""
+import os
+import tempfile
+import time
+from src.name_registry import NameRegistry
+
+REGISTRY_NAMES = 100_000
+OLD_NAMES = 1_000
+FILENAME = "IMG_0001.jpg"
+
+
+def old_copy_mode(folder, count):
+    for _ in range(count):
+        dest_path = os.path.join(folder, FILENAME)
+        if os.path.exists(dest_path):
+            name, ext = os.path.splitext(dest_path)
+            counter = 1
+            while os.path.exists(f"{name}_{counter}{ext}"):
+                counter += 1
+            dest_path = f"{name}_{counter}{ext}"
+        open(dest_path, "w").close()
+
+
+def old_zip_mode(count):
+    existing_files = []
+    for _ in range(count):
+        name, ext = os.path.splitext(FILENAME)
+        counter = 1
+        while f"{name}{ext}" in existing_files:
+            name = f"{name}_{counter}"
+            counter += 1
+        existing_files.append(f"{name}{ext}")
+
+
+def registry_mode(count):
+    registry = NameRegistry()
+    for _ in range(count):
+        registry.reserve(FILENAME)
+
+
+def measure(label, count, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<30} {count:>8} names {elapsed:8.3f} s {elapsed / count * 1e6:10.2f} us/name")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        # includes creating the empty files, which the registry doesn't do
+        measure("os.path.exists probing", OLD_NAMES, old_copy_mode, folder, OLD_NAMES)
+    measure("list membership (zip)", OLD_NAMES, old_zip_mode, OLD_NAMES)
+    measure("NameRegistry", REGISTRY_NAMES, registry_mode, REGISTRY_NAMES)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Time from launching the interpreter to the main window being shown, with the
+compiled UI module and with the old runtime .ui parsing.
+
+Each run is a fresh process, so module imports are never cached in memory, but
+the OS file cache is warm after the first run; the first run is reported on its
+own. Without a display Qt's offscreen platform is used. Run compile_ui.py first.
+
+    python -m benchmarks.bench_startup [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 10
+
+CHILD = """
+import sys
+if sys.argv[1] == "loadUi":
+    # hides the compiled module, MainWindow falls back to uic.loadUi
+    sys.modules["src.ui_main"] = None
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+from src import MainController, MainWindow
+from src.file_copy import FileCopy
+app = QApplication(sys.argv)
+window = MainWindow()
+controller = MainController(window, FileCopy())
+# runs once the event loop has processed the show event
+QTimer.singleShot(0, app.quit)
+app.exec()
+"""
+
+
+def launch(mode, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", CHILD, mode], env=env, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+    env = dict(os.environ)
+    if not env.get("DISPLAY") and sys.platform.startswith("linux"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    if not os.path.exists(os.path.join("src", "ui_main.py")):
+        print("src/ui_main.py is missing, run python compile_ui.py first")
+        return
+
+    print(f"{'mode':<10} {'first':>8} {'min':>8} {'median':>8}  (ms, process start to window shown)")
+    for mode in ("compiled", "loadUi"):
+        totals = [launch(mode, env) for _ in range(runs)]
+        print(
+            f"{mode:<10} {totals[0]:8.1f} {min(totals):8.1f} {statistics.median(totals):8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Scan, copy and compress throughput on synthetic trees (see workloads.py).
+
+Every phase runs in a fresh process so its peak RSS is its own; the copy and
+compress processes scan the tree first, untimed, and their RSS includes that
+file list. rescan times a scan that finds every folder in a warm scan cache.
+Results are written as JSON, and --compare checks them against an earlier
+file, exiting with 1 when a phase got slower than --tolerance.
+
+    python -m benchmarks.bench_suite --scale 0.01 --repeat 3
+    python -m benchmarks.bench_suite --workloads tiny,mixed --output new.json --compare old.json
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.workloads import WORKLOADS, generate
+from src.copy_engine import CopyEngine, scan_files
+from src.file_filter import FileFilter, file_extensions
+from src.file_options import CopyOptions, FileType, default_copy_workers, default_scan_workers
+from src.file_table import FileTable
+from src.scan_cache import ScanCache
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PHASES = ("scan", "rescan", "copy", "compress")
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def _scan(tree, to, scan_workers, cache_path=None):
+    file_filter = FileFilter(file_extensions(FileType.IMAGES_VIDEOS, []))
+    scan_cache = None
+    if cache_path is not None:
+        scan_cache = ScanCache(cache_path, file_filter.fingerprint())
+        # a freshly generated tree is still within the racy window
+        scan_cache.RACY_SECONDS = 0
+    return FileTable.from_files(
+        scan_files(tree, to, file_filter, scan_workers, scan_cache=scan_cache)
+    )
+
+
+def run_phase(phase, tree, work_dir, workers, scan_workers):
+    to = tempfile.mkdtemp(prefix=f"{phase}-", dir=work_dir)
+    try:
+        if phase == "scan":
+            start = time.perf_counter()
+            files = _scan(tree, to, scan_workers)
+            seconds = time.perf_counter() - start
+        elif phase == "rescan":
+            cache_path = os.path.join(to, ScanCache.FILENAME)
+            _scan(tree, to, scan_workers, cache_path)
+            start = time.perf_counter()
+            files = _scan(tree, to, scan_workers, cache_path)
+            seconds = time.perf_counter() - start
+        else:
+            files = _scan(tree, to, scan_workers)
+            options = CopyOptions(tree, compress_after_copy=phase == "compress", workers=workers)
+            engine = CopyEngine(files, to, options)
+            start = time.perf_counter()
+            engine.run()
+            seconds = time.perf_counter() - start
+        total_bytes = files.total_size()
+    finally:
+        shutil.rmtree(to)
+
+    return {
+        "files": len(files),
+        "bytes": total_bytes,
+        "seconds": seconds,
+        "files_per_second": len(files) / seconds if seconds else None,
+        "mb_per_second": total_bytes / 1024 / 1024 / seconds if seconds else None,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance):
+    """Prints the change of every phase against the baseline, returns True on a regression."""
+    with open(baseline_path) as file:
+        baseline = {
+            (result["workload"], result["phase"]): result for result in json.load(file)["results"]
+        }
+    regressed = False
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        old = baseline.get((result["workload"], result["phase"]))
+        if old is None or not old["files_per_second"] or not result["files_per_second"]:
+            continue
+        change = result["files_per_second"] / old["files_per_second"] - 1
+        slower = change < -tolerance
+        regressed |= slower
+        flag = "  REGRESSION" if slower else ""
+        print(f"{result['workload']:<12} {result['phase']:<9} {change:+8.1%} files/s{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workloads", default=",".join(WORKLOADS))
+    parser.add_argument("--phases", default=",".join(PHASES))
+    parser.add_argument("--scale", type=float, default=1.0, help="1.0 is the full workload")
+    parser.add_argument(
+        "--work-dir", default=os.path.join(tempfile.gettempdir(), "files-copier-bench")
+    )
+    parser.add_argument("--workers", type=int, default=default_copy_workers)
+    parser.add_argument("--scan-workers", type=int, default=default_scan_workers)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per phase, the fastest is kept")
+    parser.add_argument("--output", help="JSON file, defaults to a timestamped name")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier JSON results")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed slowdown, 0.1 is 10%%")
+    args = parser.parse_args()
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    started = datetime.now(timezone.utc)
+    results = []
+    print(f"{'workload':<12} {'phase':<9} {'files':>9} {'MB':>9} {'s':>8} {'files/s':>10} {'MB/s':>8} {'RSS MB':>7}")
+    for workload in args.workloads.split(","):
+        tree = generate(workload, args.work_dir, args.scale)
+        for phase in args.phases.split(","):
+            runs = []
+            for _ in range(args.repeat):
+                # a fresh process per run, so peak RSS isn't carried over
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(1, mp_context=context) as pool:
+                    runs.append(
+                        pool.submit(
+                            run_phase, phase, tree, args.work_dir, args.workers, args.scan_workers
+                        ).result()
+                    )
+            fastest = min(runs, key=lambda run: run["seconds"])
+            result = {"workload": workload, "phase": phase, **fastest}
+            results.append(result)
+            print(
+                f"{workload:<12} {phase:<9} {result['files']:>9} "
+                f"{result['bytes'] / 1024 / 1024:>9.1f} {result['seconds']:>8.2f} "
+                f"{result['files_per_second'] or 0:>10.0f} {result['mb_per_second'] or 0:>8.1f} "
+                f"{result['peak_rss_mb'] or 0:>7.0f}"
+            )
+
+    report = {
+        "meta": {
+            "started": started.isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "scale": args.scale,
+            "workers": args.workers,
+            "scan_workers": args.scan_workers,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    output = args.output or f"bench_suite_{started:%Y%m%d_%H%M%S}.json"
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
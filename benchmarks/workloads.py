@@ -0,0 +1,118 @@
+"""
+Reproducible synthetic source trees for the benchmark suite.
+
+Every tree is generated from a fixed seed, so two machines (or two versions)
+benchmark exactly the same names, sizes and contents. scale multiplies file
+counts and sizes; 1.0 is the full workload, small values give quick runs.
+"""
+import os
+import random
+import shutil
+
+SEED = 1234
+MATCHING_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".mp4", ".mov", ".mkv")
+OTHER_EXTENSIONS = (".txt", ".pdf", ".docx", ".json", ".py")
+BLOCK_SIZE = 1024 * 1024
+# marks a tree as fully generated, so interrupted generations are redone
+COMPLETE_MARKER = ".generated"
+
+
+class _Writer:
+    """Writes file contents from a seeded random block, compressible or not."""
+
+    def __init__(self, rng):
+        self.random_block = rng.randbytes(BLOCK_SIZE)
+        self.text_block = (b"lorem ipsum dolor sit amet " * (BLOCK_SIZE // 27 + 1))[:BLOCK_SIZE]
+
+    def write(self, path, size, compressible=False):
+        block = self.text_block if compressible else self.random_block
+        with open(path, "wb") as file:
+            while size > 0:
+                chunk = min(size, BLOCK_SIZE)
+                file.write(block[:chunk])
+                size -= chunk
+
+
+def _tiny(root, rng, writer, scale):
+    """Many small files spread over folders of 1000."""
+    count = max(1, int(1_000_000 * scale))
+    for i in range(count):
+        folder = os.path.join(root, f"d{i // 1000:04d}")
+        if i % 1000 == 0:
+            os.makedirs(folder, exist_ok=True)
+        writer.write(os.path.join(folder, f"f{i:07d}.jpg"), rng.randint(0, 256))
+
+
+def _huge(root, rng, writer, scale):
+    """A few big files, half of them compressible."""
+    size = max(BLOCK_SIZE, int(1024 * 1024 * 1024 * scale))
+    for i, extension in enumerate((".mp4", ".mkv", ".png")):
+        writer.write(os.path.join(root, f"huge_{i}{extension}"), size, compressible=i % 2 == 1)
+
+
+def _deep(root, rng, writer, scale):
+    """A chain of nested folders with a few files at every level."""
+    depth = 200
+    per_level = max(1, int(50 * scale))
+    folder = root
+    for level in range(depth):
+        folder = os.path.join(folder, f"level{level:03d}")
+        os.makedirs(folder)
+        for i in range(per_level):
+            writer.write(os.path.join(folder, f"img{i:04d}.png"), rng.randint(1024, 16 * 1024))
+
+
+def _collisions(root, rng, writer, scale):
+    """The same few names in every folder, like camera dumps."""
+    folders = max(1, int(20_000 * scale))
+    for i in range(folders):
+        folder = os.path.join(root, f"DCIM{i:05d}")
+        os.makedirs(folder)
+        for name in ("IMG_0001.jpg", "IMG_0002.jpg", "VID_0001.mp4"):
+            writer.write(os.path.join(folder, name), rng.randint(512, 8 * 1024))
+
+
+def _mixed(root, rng, writer, scale):
+    """Realistic sizes and a mix of copied and ignored extensions."""
+    count = max(1, int(100_000 * scale))
+    for i in range(count):
+        folder = os.path.join(root, f"album{i // 500:04d}")
+        if i % 500 == 0:
+            os.makedirs(folder, exist_ok=True)
+        if rng.random() < 0.6:
+            extension = rng.choice(MATCHING_EXTENSIONS)
+        else:
+            extension = rng.choice(OTHER_EXTENSIONS)
+        # lognormal sizes, median around 60 KiB and capped at 8 MiB
+        size = min(int(rng.lognormvariate(11, 1.5)), 8 * 1024 * 1024)
+        writer.write(
+            os.path.join(folder, f"file{i:06d}{extension}"),
+            size,
+            compressible=extension in OTHER_EXTENSIONS,
+        )
+
+
+WORKLOADS = {
+    "tiny": _tiny,
+    "huge": _huge,
+    "deep": _deep,
+    "collisions": _collisions,
+    "mixed": _mixed,
+}
+
+
+def generate(name: str, work_dir: str, scale: float = 1.0) -> str:
+    """
+    Returns the root of the named tree inside work_dir, generating it first if
+    it isn't there yet. Trees are reused between runs, they can take minutes.
+    """
+    root = os.path.join(work_dir, f"{name}-{scale:g}")
+    if os.path.exists(os.path.join(root, COMPLETE_MARKER)):
+        return root
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    os.makedirs(root)
+    rng = random.Random(f"{SEED}-{name}")
+    WORKLOADS[name](root, rng, _Writer(rng), scale)
+    open(os.path.join(root, COMPLETE_MARKER), "w").close()
+    return root
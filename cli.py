@@ -0,0 +1,379 @@
+"""
+Command line version of the copier, for servers and batch jobs. It runs the
+same engine as the GUI without loading Qt.
+
+    python cli.py SOURCE [options]
+
+Exits with 0 when the copy finishes, 1 when no files were found, the options
+are invalid, some destination failed to get files or a copy read back with
+the wrong checksum, and 130 when it is
+interrupted with Ctrl+C. With --watch it keeps copying new files into the
+destination until it is interrupted, and then exits with 0.
+"""
+import argparse
+from datetime import datetime
+import os
+import sys
+import threading
+from src.copy_engine import CopyEngine, create_destination_folder, start_profiler, start_scan
+from src.file_options import (
+    ArchiveFormat,
+    CopyOptions,
+    FileType,
+    OutputLayout,
+    OutputMode,
+    default_copy_workers,
+    default_hash_buckets,
+    default_scan_workers,
+)
+from src.run_report import RunReport
+from src.verifier import DEFAULT_ALGORITHM, check_algorithm
+from src.watcher import DEFAULT_SETTLE_SECONDS, WatchCopy
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(value: str) -> int:
+    """Parses sizes such as 512, 10K, 1.5M or 2GB."""
+    text = value.strip().upper().removesuffix("B")
+    unit = text[-1:] if text[-1:] in SIZE_UNITS else ""
+    try:
+        return int(float(text[: len(text) - len(unit)]) * SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}")
+
+
+def parse_date(value: str) -> float:
+    """Parses an ISO date or date and time into a unix timestamp."""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value!r}")
+
+
+def parse_algorithm(value: str) -> str:
+    try:
+        return check_algorithm(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Recursively copy images, videos or other files out of a folder."
+    )
+    parser.add_argument("source", help="folder to scan")
+    parser.add_argument(
+        "-t",
+        "--type",
+        dest="file_type",
+        choices=[file_type.name.lower() for file_type in FileType],
+        default=FileType.IMAGES.name.lower(),
+        help="kind of files to copy (default: images)",
+    )
+    parser.add_argument(
+        "-e",
+        "--extension",
+        dest="custom_file_types",
+        action="append",
+        default=[],
+        help="extension to copy with --type custom, e.g. .pdf (repeatable)",
+    )
+    parser.add_argument("-d", "--destination", help="fixed folder to copy into")
+    parser.add_argument(
+        "--also-copy-to",
+        dest="extra_destinations",
+        action="append",
+        default=[],
+        metavar="FOLDER",
+        help="another folder to copy into, sources are read once for all (repeatable)",
+    )
+    parser.add_argument(
+        "--also-archive-to", dest="extra_archive", metavar="FOLDER", help="also write an archive here"
+    )
+    parser.add_argument(
+        "-z", "--compress", action="store_true", help="write an archive instead of copies"
+    )
+    parser.add_argument(
+        "--archive-format",
+        choices=[archive_format.value for archive_format in ArchiveFormat],
+        default=ArchiveFormat.ZIP.value,
+    )
+    parser.add_argument(
+        "--no-adaptive-compression",
+        dest="adaptive_compression",
+        action="store_false",
+        help="deflate every zip entry, even already compressed media",
+    )
+    parser.add_argument(
+        "--output-mode",
+        choices=[output_mode.name.lower() for output_mode in OutputMode],
+        default=OutputMode.COPY.name.lower(),
+    )
+    parser.add_argument(
+        "--layout",
+        choices=[layout.value for layout in OutputLayout],
+        default=OutputLayout.FLAT.value,
+        help="flat, the source folders (preserve), YYYY/MM folders (date) "
+        "or --buckets folders by name (hash)",
+    )
+    parser.add_argument(
+        "--max-per-folder",
+        dest="max_files_per_folder",
+        type=int,
+        metavar="N",
+        help="start a new folder after N entries (default: 10000 for date and hash, "
+        "no limit for flat and preserve)",
+    )
+    parser.add_argument(
+        "--buckets",
+        dest="hash_buckets",
+        type=int,
+        default=default_hash_buckets,
+        help=f"number of folders for --layout hash (default {default_hash_buckets})",
+    )
+    parser.add_argument("--workers", type=int, default=default_copy_workers)
+    parser.add_argument("--scan-workers", type=int, default=default_scan_workers)
+    parser.add_argument(
+        "--include", dest="include_patterns", action="append", default=[], metavar="GLOB"
+    )
+    parser.add_argument(
+        "--exclude", dest="exclude_patterns", action="append", default=[], metavar="GLOB"
+    )
+    parser.add_argument(
+        "--skip-folder", dest="skip_folders", action="append", default=[], metavar="GLOB"
+    )
+    parser.add_argument("--min-size", type=parse_size, help="e.g. 100K")
+    parser.add_argument("--max-size", type=parse_size, help="e.g. 2G")
+    parser.add_argument("--modified-after", type=parse_date, metavar="DATE")
+    parser.add_argument("--modified-before", type=parse_date, metavar="DATE")
+    parser.add_argument(
+        "--same-filesystem", action="store_true", help="don't cross mount points"
+    )
+    parser.add_argument("--deduplicate", action="store_true")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="skip files copied by an earlier run, needs --destination",
+    )
+    parser.add_argument("--report", dest="report_path", metavar="PATH", help="write a JSON run report")
+    parser.add_argument(
+        "--profile", action="store_true", help="add cProfile results to the run report"
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="add tracemalloc results to the run report"
+    )
+    parser.add_argument(
+        "--scan-cache",
+        action="store_true",
+        help="only list folders that changed since the last scan; size and date "
+        "filters see files edited in place with their old values until their folder changes",
+    )
+    parser.add_argument(
+        "--rescan",
+        dest="refresh_scan_cache",
+        action="store_true",
+        help="with --scan-cache, list every folder again and refresh the cache",
+    )
+    parser.add_argument(
+        "--verify",
+        dest="verify_algorithm",
+        nargs="?",
+        const=DEFAULT_ALGORITHM,
+        type=parse_algorithm,
+        metavar="ALGORITHM",
+        help=f"hash files while copying them and write a checksum manifest "
+        f"(default {DEFAULT_ALGORITHM}, any hashlib algorithm)",
+    )
+    parser.add_argument(
+        "--reread",
+        dest="verify_reread",
+        action="store_true",
+        help="with --verify, read the copies back and compare their checksums",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep copying new files as they arrive, needs --destination",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=DEFAULT_SETTLE_SECONDS,
+        metavar="SECONDS",
+        help="in watch mode, how long a file must be left alone before it is copied",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't report progress")
+    return parser
+
+
+def copy_options_from_args(args) -> CopyOptions:
+    return CopyOptions(
+        args.source,
+        file_type=FileType[args.file_type.upper()],
+        compress_after_copy=args.compress,
+        custom_file_types=args.custom_file_types,
+        workers=args.workers,
+        scan_workers=args.scan_workers,
+        include_patterns=args.include_patterns,
+        exclude_patterns=args.exclude_patterns,
+        min_size=args.min_size,
+        max_size=args.max_size,
+        modified_after=args.modified_after,
+        modified_before=args.modified_before,
+        skip_folders=args.skip_folders,
+        same_filesystem=args.same_filesystem,
+        deduplicate=args.deduplicate,
+        destination=args.destination,
+        # watch mode relies on the copy journal
+        incremental=args.incremental or args.watch,
+        output_mode=OutputMode[args.output_mode.upper()],
+        adaptive_compression=args.adaptive_compression,
+        archive_format=ArchiveFormat(args.archive_format),
+        report_path=args.report_path,
+        profile=args.profile,
+        trace_memory=args.trace_memory,
+        extra_destinations=args.extra_destinations,
+        extra_archive=args.extra_archive,
+        scan_cache=args.scan_cache,
+        refresh_scan_cache=args.refresh_scan_cache,
+        verify_algorithm=args.verify_algorithm,
+        verify_reread=args.verify_reread,
+        layout=OutputLayout(args.layout),
+        max_files_per_folder=args.max_files_per_folder,
+        hash_buckets=args.hash_buckets,
+    )
+
+
+def print_progress(snapshot):
+    line = (
+        f"\r{snapshot.percent:3d}% {snapshot.files_done}/{snapshot.files_total} files "
+        f"{snapshot.bytes_per_second / 1024 / 1024:.1f} MB/s"
+    )
+    if snapshot.eta_seconds is not None:
+        line += f" ETA {snapshot.eta_seconds:.0f}s"
+    sys.stderr.write(line.ljust(60))
+    sys.stderr.flush()
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    copy_options = copy_options_from_args(args)
+    if not os.path.isdir(copy_options.source):
+        print(f"error: {copy_options.source} is not a folder", file=sys.stderr)
+        return 1
+    if (copy_options.profile or copy_options.trace_memory) and not copy_options.report_path:
+        print("error: --profile and --trace-memory need --report", file=sys.stderr)
+        return 1
+    if copy_options.verify_reread and not copy_options.verify_algorithm:
+        print("error: --reread needs --verify", file=sys.stderr)
+        return 1
+    links = copy_options.output_mode != OutputMode.COPY and not copy_options.compress_after_copy
+    if copy_options.verify_algorithm and links:
+        print("error: --verify can't be used with links", file=sys.stderr)
+        return 1
+    if copy_options.hash_buckets < 1 or (copy_options.max_files_per_folder or 1) < 1:
+        print("error: --buckets and --max-per-folder must be at least 1", file=sys.stderr)
+        return 1
+    if args.watch and (not copy_options.destination or copy_options.compress_after_copy):
+        print("error: --watch needs --destination and can't be used with --compress", file=sys.stderr)
+        return 1
+    try:
+        to_folder_path, created_folder = create_destination_folder(copy_options)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    if args.watch:
+        return watch(copy_options, to_folder_path, args)
+
+    report = RunReport()
+    profiler = start_profiler(copy_options)
+    engine = CopyEngine(
+        start_scan(copy_options, to_folder_path, report),
+        to_folder_path,
+        copy_options,
+        on_progress=None if args.quiet else print_progress,
+        report=report,
+        profiler=profiler,
+    )
+    result = {}
+    # the engine runs on its own thread so Ctrl+C reaches the main thread
+    worker = threading.Thread(target=lambda: result.update(status=engine.run()))
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.2)
+    except KeyboardInterrupt:
+        engine.cancel_copy()
+        worker.join()
+    if not args.quiet:
+        sys.stderr.write("\n")
+
+    status = result.get("status")
+    if status == CopyEngine.CANCELED:
+        if created_folder:
+            # unfinished files are already gone, the folder goes too if nothing was copied
+            try:
+                os.rmdir(to_folder_path)
+            except OSError:
+                pass
+        print("Copy canceled", file=sys.stderr)
+        return 130
+    if status == CopyEngine.NOT_FOUND:
+        if created_folder:
+            try:
+                os.rmdir(to_folder_path)
+            except OSError:
+                pass
+        print("No files found", file=sys.stderr)
+        return 1
+    if status is None:
+        # the engine raised, its traceback was already printed
+        return 1
+    for line in engine.summary():
+        print(line)
+    print(to_folder_path)
+    if engine.fan_out is not None and any(
+        destination.failed for destination in engine.fan_out.destinations
+    ):
+        return 1
+    if engine.verifier is not None and engine.verifier.mismatches:
+        return 1
+    return 0
+
+
+def watch(copy_options: CopyOptions, to_folder_path: str, args) -> int:
+    def print_batch(engine, status):
+        if not args.quiet:
+            sys.stderr.write("\n")
+        if status == CopyEngine.FINISHED:
+            for line in engine.summary():
+                print(line, flush=True)
+
+    try:
+        watch_copy = WatchCopy(
+            copy_options,
+            to_folder_path,
+            on_progress=None if args.quiet else print_progress,
+            on_batch=print_batch,
+            settle_seconds=args.settle,
+        )
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    worker = threading.Thread(target=watch_copy.run)
+    worker.start()
+    if not args.quiet:
+        print(f"Watching {copy_options.source}, Ctrl+C to stop", file=sys.stderr)
+    try:
+        while worker.is_alive():
+            worker.join(0.2)
+    except KeyboardInterrupt:
+        watch_copy.stop()
+        worker.join()
+    print(f"{watch_copy.files_done} files copied into {to_folder_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+"""
+Compiles src/main.ui into src/ui_main.py so the window is built from Python
+code instead of parsing the .ui file (and importing PyQt6.uic) on every launch.
+Run it after editing main.ui; setup.py runs it before every build.
+"""
+import os
+from PyQt6 import uic
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+UI_PATH = os.path.join(BASE_DIR, "src", "main.ui")
+COMPILED_UI_PATH = os.path.join(BASE_DIR, "src", "ui_main.py")
+
+
+def compile_ui(ui_path: str = UI_PATH, compiled_path: str = COMPILED_UI_PATH):
+    with open(compiled_path, "w", encoding="utf-8") as compiled:
+        uic.compileUi(ui_path, compiled)
+
+
+if __name__ == "__main__":
+    compile_ui()
+    print(f"Wrote {COMPILED_UI_PATH}")
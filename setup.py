@@ -1,5 +1,9 @@
 import sys
 from cx_Freeze import setup, Executable
+from compile_ui import compile_ui
+
+# the window is built from the compiled module, main.ui isn't shipped
+compile_ui()
 
 base = None
 
@@ -11,7 +15,7 @@ executables = [Executable("main.py", base=base)]
 options = {
     "build_exe": {
         "packages": [],
-        "include_files": [("./src/main.ui", "./src/main.ui")],
+        "include_files": [],
         "excludes": ["tkinter"],
     },
 }
@@ -1,2 +1,12 @@
-from .main_controller import MainController
-from .main_window import MainWindow
\ No newline at end of file
+# the GUI classes are imported on first use, so the copy engine and the
+# command line tool can be used without loading Qt
+def __getattr__(name):
+    if name == "MainController":
+        from .main_controller import MainController
+
+        return MainController
+    if name == "MainWindow":
+        from .main_window import MainWindow
+
+        return MainWindow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
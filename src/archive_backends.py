@@ -0,0 +1,196 @@
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+import os
+import tarfile
+import time
+from .copy_control import part_path, remove_part
+from .file_options import ArchiveFormat
+from .parallel_zip import ParallelZipWriter, CHUNK_SIZE
+
+ARCHIVE_NAME = "compressed_files"
+
+
+class ArchiveBackend(ABC):
+    """
+    Writes the collected files into a single archive. Backends read every source
+    file once, front to back, in large blocks. on_entry_written is called with the
+    file once its entry is in the archive and on_bytes with the number of source
+    bytes archived as it goes; stats is set by backends that keep compression
+    statistics. A RunReport gets the time spent reading and writing.
+
+    The archive is written under a hidden .part name and only renamed to
+    archive_path by close(). Leaving the with block with an exception, such as
+    CopyCanceled raised from on_bytes, aborts it instead and removes the file.
+    """
+
+    def __init__(self, archive_path: str, on_entry_written=None, on_bytes=None, report=None):
+        self.archive_path = archive_path
+        self.part_path = part_path(archive_path)
+        self.on_entry_written = on_entry_written
+        self.on_bytes = on_bytes
+        self.report = report
+        self.stats = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @abstractmethod
+    def add(self, file, arcname: str, size: int, mtime: float, fileobj=None):
+        """Adds file as arcname, reading it from fileobj when the caller has it open."""
+
+    def close(self):
+        try:
+            # writing the last entries can still be canceled
+            self._close()
+        except BaseException:
+            self.abort()
+            raise
+        os.replace(self.part_path, self.archive_path)
+
+    def abort(self):
+        """Stops writing and removes the unfinished archive."""
+        try:
+            self._abort()
+        finally:
+            remove_part(self.part_path)
+
+    @abstractmethod
+    def _close(self):
+        """Writes the end of the archive to part_path."""
+
+    @abstractmethod
+    def _abort(self):
+        """Stops writing; abort() removes part_path afterwards."""
+
+
+class ZipBackend(ArchiveBackend):
+    def __init__(
+        self,
+        archive_path,
+        on_entry_written=None,
+        on_bytes=None,
+        report=None,
+        workers=4,
+        policy=None,
+    ):
+        super().__init__(archive_path, on_entry_written, on_bytes, report)
+        self._writer = ParallelZipWriter(
+            self.part_path,
+            workers,
+            on_entry_written=on_entry_written,
+            policy=policy,
+            on_bytes=on_bytes,
+            report=report,
+        )
+        self.stats = self._writer.stats
+
+    def add(self, file, arcname, size, mtime, fileobj=None):
+        self._writer.write(file, arcname, size, mtime, fileobj)
+
+    def _close(self):
+        self._writer.close()
+
+    def _abort(self):
+        self._writer.abort()
+
+
+class TarBackend(ArchiveBackend):
+    """
+    A streamed tar, optionally gzip or xz compressed as a whole. Nothing is
+    compressed per entry and the output is never seeked, so a plain tar costs
+    little more than copying the files.
+    """
+
+    def __init__(
+        self, archive_path, on_entry_written=None, on_bytes=None, report=None, compression=""
+    ):
+        super().__init__(archive_path, on_entry_written, on_bytes, report)
+        self._tar = tarfile.open(
+            self.part_path, f"w|{compression}", bufsize=CHUNK_SIZE, copybufsize=CHUNK_SIZE
+        )
+
+    def add(self, file, arcname, size, mtime, fileobj=None):
+        """
+        The header is written before the data, so size must be what fileobj
+        returns; when the file is opened here its current size is used instead,
+        as it may have changed since it was scanned.
+        """
+        start = time.perf_counter()
+        if fileobj is None:
+            fileobj = open(file, "rb", buffering=CHUNK_SIZE)
+            size = os.fstat(fileobj.fileno()).st_size
+        else:
+            fileobj = nullcontext(fileobj)
+        info = tarfile.TarInfo(arcname)
+        info.size = size
+        info.mtime = mtime
+        info.mode = 0o644
+        with fileobj as f:
+            reader = _CountingReader(f, self.on_bytes)
+            self._tar.addfile(info, reader)
+        if self.report is not None:
+            # writing includes the gzip or xz compression of the stream
+            self.report.add_time("archive.read", reader.read_seconds)
+            self.report.add_time(
+                "archive.write", time.perf_counter() - start - reader.read_seconds
+            )
+        if self.on_entry_written is not None:
+            self.on_entry_written(file)
+
+    def _close(self):
+        self._tar.close()
+
+    def _abort(self):
+        # the end of archive blocks written here don't matter, the file is removed
+        self._tar.close()
+
+
+class _CountingReader:
+    __slots__ = ("file", "on_bytes", "read_seconds")
+
+    def __init__(self, file, on_bytes):
+        self.file = file
+        self.on_bytes = on_bytes
+        self.read_seconds = 0.0
+
+    def read(self, size=-1):
+        start = time.perf_counter()
+        data = self.file.read(size)
+        self.read_seconds += time.perf_counter() - start
+        if self.on_bytes is not None:
+            self.on_bytes(len(data))
+        return data
+
+
+def archive_extension(archive_format: ArchiveFormat) -> str:
+    return "." + archive_format.value
+
+
+def open_archive(
+    archive_format: ArchiveFormat,
+    folder_path: str,
+    on_entry_written=None,
+    on_bytes=None,
+    workers: int = 4,
+    policy=None,
+    report=None,
+) -> ArchiveBackend:
+    """Creates compressed_files.<format> inside folder_path once it is closed."""
+    archive_path = os.path.join(folder_path, ARCHIVE_NAME + archive_extension(archive_format))
+    match archive_format:
+        case ArchiveFormat.ZIP:
+            return ZipBackend(
+                archive_path, on_entry_written, on_bytes, report, workers=workers, policy=policy
+            )
+        case ArchiveFormat.TAR:
+            return TarBackend(archive_path, on_entry_written, on_bytes, report)
+        case ArchiveFormat.TAR_GZ:
+            return TarBackend(archive_path, on_entry_written, on_bytes, report, compression="gz")
+        case ArchiveFormat.TAR_XZ:
+            return TarBackend(archive_path, on_entry_written, on_bytes, report, compression="xz")
@@ -0,0 +1,91 @@
+import threading
+import zipfile
+import zlib
+from .file_options import image_extensions, video_extensions
+
+PROBE_SIZE = 64 * 1024
+
+# formats whose content is already compressed, deflating them gains ~0%
+compressed_extensions = frozenset(
+    [ext for ext in image_extensions + video_extensions if ext != ".bmp"]
+    + [
+        ".webp", ".heic", ".heif", ".avif", ".mp3", ".aac", ".m4a", ".opus", ".flac",
+        ".m4v", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar", ".docx",
+        ".xlsx", ".pptx", ".odt", ".pdf",
+    ]
+)
+
+
+class Compression:
+    __slots__ = ("name", "compress_type", "level")
+
+    def __init__(self, name, compress_type, level):
+        self.name = name
+        self.compress_type = compress_type
+        self.level = level
+
+
+STORE = Compression("stored", zipfile.ZIP_STORED, None)
+FAST = Compression("fast deflate", zipfile.ZIP_DEFLATED, 1)
+STRONG = Compression("strong deflate", zipfile.ZIP_DEFLATED, 9)
+
+
+class CompressionPolicy:
+    """
+    Picks how each file is stored in the archive: known compressed formats are
+    stored as they are, anything else is judged by how well its first block
+    deflates at the fastest level. Barely compressible data is stored, very
+    compressible data gets the strong level and the rest the fast one.
+    """
+
+    def __init__(self, store_ratio: float = 0.95, strong_ratio: float = 0.5):
+        self.store_ratio = store_ratio
+        self.strong_ratio = strong_ratio
+
+    def choose(self, filename: str, first_block: bytes) -> Compression:
+        _, dot, suffix = filename.lower().rpartition(".")
+        if dot and "." + suffix in compressed_extensions:
+            return STORE
+        probe = first_block[:PROBE_SIZE]
+        if not probe:
+            return FAST
+        ratio = len(zlib.compress(probe, 1)) / len(probe)
+        if ratio >= self.store_ratio:
+            return STORE
+        if ratio <= self.strong_ratio:
+            return STRONG
+        return FAST
+
+
+class CompressionStats:
+    """Per-run totals for every kind of compression used, safe to update from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_compression = {}
+
+    def file_added(self, compression: Compression):
+        with self._lock:
+            self._totals(compression)["files"] += 1
+
+    def add(self, compression: Compression, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        with self._lock:
+            totals = self._totals(compression)
+            totals["bytes_in"] += bytes_in
+            totals["bytes_out"] += bytes_out
+            totals["cpu_seconds"] += cpu_seconds
+
+    @property
+    def cpu_seconds(self) -> float:
+        return sum(totals["cpu_seconds"] for totals in self.by_compression.values())
+
+    @property
+    def bytes_saved(self) -> int:
+        return sum(
+            totals["bytes_in"] - totals["bytes_out"] for totals in self.by_compression.values()
+        )
+
+    def _totals(self, compression):
+        return self.by_compression.setdefault(
+            compression.name, {"files": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+        )
@@ -0,0 +1,369 @@
+from collections import Counter
+import errno
+import os
+import shutil
+import sys
+import threading
+import time
+from .copy_control import part_path, remove_part
+from .file_options import OutputMode
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# from linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+USERSPACE_BUFFER_SIZE = 1024 * 1024
+# kernel copies are split so progress can be reported within big files
+KERNEL_CHUNK_SIZE = 16 * 1024 * 1024
+# files from this size up are preallocated and kept out of the page cache
+LARGE_FILE_THRESHOLD = 64 * 1024 * 1024
+LARGE_FILE_BUFFER_SIZE = 8 * 1024 * 1024
+# written pages are flushed and dropped from the cache every this many bytes
+CACHE_DROP_WINDOW = 32 * 1024 * 1024
+# errors meaning "this method can't be used for this pair of filesystems"
+UNSUPPORTED_ERRORS = {
+    errno.EXDEV,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EBADF,
+    errno.EPERM,
+}
+
+
+class FileCopier:
+    """
+    Copies files with the fastest method available: a reflink (FICLONE) on
+    filesystems that share extents, then copy_file_range, then sendfile, and
+    finally a plain userspace copy. The kernel methods are Linux only, other
+    platforms go straight to shutil.copyfile, which has its own fast paths
+    there. A method that fails for a pair of devices isn't tried again for
+    that pair. A method that stops short of the size the file had when it was
+    opened hands the file over to the userspace copy, which reads to the end.
+    methods_used counts how many files each method copied.
+
+    With a link output_mode files are hardlinked or symlinked instead, falling
+    back to a copy when the link can't be made (other device, no permission).
+
+    A RunReport gets the read and write time of userspace copies, the only
+    method where the two can be told apart.
+
+    Copies and links are made under a hidden .part name and renamed into place
+    once complete, so an interrupted copy never leaves a truncated file under
+    the real name. on_bytes may raise to stop a copy between chunks.
+
+    A copy given a hashlib object goes through the userspace copy, the only one
+    that sees the data, and hashes it block by block on the way.
+
+    Files of large_file_threshold bytes or more that aren't reflinked take a
+    path meant for multi-GB videos: the destination is preallocated with
+    posix_fallocate, the source is read with POSIX_FADV_SEQUENTIAL, and both
+    files are dropped from the page cache as the copy goes, so copying them
+    doesn't evict everything else the machine has cached.
+    """
+
+    def __init__(
+        self,
+        output_mode: OutputMode = OutputMode.COPY,
+        report=None,
+        large_file_threshold: int = LARGE_FILE_THRESHOLD,
+    ):
+        self.output_mode = output_mode
+        self.report = report
+        self.large_file_threshold = large_file_threshold
+        self.methods_used = Counter()
+        self._unsupported = set()
+        self._lock = threading.Lock()
+        self.methods = []
+        if sys.platform.startswith("linux"):
+            if fcntl is not None:
+                self.methods.append(("reflink", _reflink))
+            if hasattr(os, "copy_file_range"):
+                self.methods.append(("copy_file_range", _copy_file_range))
+            if hasattr(os, "sendfile"):
+                self.methods.append(("sendfile", _sendfile))
+
+    def copy(self, source, destination, on_bytes=None, hasher=None) -> str:
+        """
+        Copies source to destination and returns the name of the method used.
+        on_bytes is called with the number of bytes copied as the copy goes; links
+        report the whole file at once. hasher is updated with the data copied and
+        only works with OutputMode.COPY.
+        """
+        part = part_path(destination)
+        try:
+            method = self._copy_or_link(source, part, on_bytes, hasher)
+            os.replace(part, destination)
+        except BaseException:
+            remove_part(part)
+            raise
+        return method
+
+    def _copy_or_link(self, source, destination, on_bytes, hasher):
+        if self.output_mode == OutputMode.HARDLINK:
+            if self._link(os.link, source, destination):
+                return self._linked("hardlink", destination, on_bytes)
+        elif self.output_mode == OutputMode.SYMLINK:
+            if self._link(os.symlink, os.path.abspath(source), destination):
+                return self._linked("symlink", destination, on_bytes)
+        return self._copy(source, destination, _ByteCounter(on_bytes), hasher)
+
+    def _linked(self, name, destination, on_bytes):
+        if on_bytes is not None:
+            on_bytes(os.path.getsize(destination))
+        return self._used(name)
+
+    def _link(self, link, source, destination) -> bool:
+        try:
+            try:
+                link(source, destination)
+            except FileExistsError:
+                # left over by an interrupted run
+                os.remove(destination)
+                link(source, destination)
+            return True
+        except OSError:
+            return False
+
+    def _copy(self, source, destination, on_bytes, hasher=None) -> str:
+        if not self.methods and hasher is None:
+            shutil.copyfile(source, destination)
+            on_bytes(os.path.getsize(destination))
+            return self._used("shutil")
+
+        with open(source, "rb") as fsrc, open(destination, "wb") as fdst:
+            src_fd = fsrc.fileno()
+            dst_fd = fdst.fileno()
+            src_stat = os.fstat(src_fd)
+            devices = (src_stat.st_dev, os.fstat(dst_fd).st_dev)
+            if src_stat.st_size >= self.large_file_threshold:
+                on_bytes = _LargeFileCopy(src_fd, dst_fd, src_stat.st_size, on_bytes)
+
+            # data the kernel copies never reaches the hasher
+            methods = self.methods if hasher is None else ()
+            for name, method in methods:
+                if (name, devices) in self._unsupported:
+                    continue
+                try:
+                    # a reflink shares extents, there's nothing to preallocate or drop
+                    if name != "reflink":
+                        on_bytes.prepare()
+                    copied = method(src_fd, dst_fd, src_stat.st_size, on_bytes)
+                    if copied == src_stat.st_size:
+                        if name != "reflink":
+                            on_bytes.finish()
+                        return self._used(name)
+                except OSError as e:
+                    if e.errno not in UNSUPPORTED_ERRORS:
+                        raise
+                    with self._lock:
+                        self._unsupported.add((name, devices))
+                    copied = None
+                # start over, the method may have written part of the file
+                os.ftruncate(dst_fd, 0)
+                on_bytes.rewind()
+                if copied is not None:
+                    # the source changed size while it was copied, the userspace
+                    # copy reads it to its actual end
+                    break
+
+            os.lseek(src_fd, 0, os.SEEK_SET)
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+            on_bytes.prepare()
+            _userspace_copy(
+                src_fd, dst_fd, on_bytes, self.report, on_bytes.buffer_size, hasher
+            )
+            on_bytes.finish()
+            return self._used("userspace")
+
+    def _used(self, name):
+        with self._lock:
+            self.methods_used[name] += 1
+        return name
+
+
+class _ByteCounter:
+    """Forwards progress to on_bytes and can take it back when a method fails halfway."""
+
+    __slots__ = ("on_bytes", "reported")
+    buffer_size = USERSPACE_BUFFER_SIZE
+
+    def __init__(self, on_bytes):
+        self.on_bytes = on_bytes
+        self.reported = 0
+
+    def prepare(self):
+        pass
+
+    def finish(self):
+        pass
+
+    def __call__(self, count):
+        self.reported += count
+        if self.on_bytes is not None:
+            self.on_bytes(count)
+
+    def rewind(self):
+        if self.reported and self.on_bytes is not None:
+            self.on_bytes(-self.reported)
+        self.reported = 0
+
+
+class _LargeFileCopy:
+    """
+    Wraps the progress callback of a large file copy. Every method writes the
+    file front to back and reports each chunk, so the bytes reported so far are
+    also the offset reached, which is all that's needed to drop finished windows
+    of both files from the page cache.
+    """
+
+    __slots__ = ("src_fd", "dst_fd", "size", "on_bytes", "offset", "dropped")
+    buffer_size = LARGE_FILE_BUFFER_SIZE
+
+    def __init__(self, src_fd, dst_fd, size, on_bytes):
+        self.src_fd = src_fd
+        self.dst_fd = dst_fd
+        self.size = size
+        self.on_bytes = on_bytes
+        self.offset = 0
+        self.dropped = 0
+
+    def prepare(self):
+        _fadvise(self.src_fd, 0, 0, "POSIX_FADV_SEQUENTIAL")
+        if hasattr(os, "posix_fallocate"):
+            try:
+                # one contiguous allocation instead of growing the file chunk by chunk
+                os.posix_fallocate(self.dst_fd, 0, self.size)
+            except OSError:
+                # not supported by every filesystem, the copy works without it
+                pass
+
+    def __call__(self, count):
+        self.on_bytes(count)
+        self.offset += count
+        if self.offset - self.dropped >= CACHE_DROP_WINDOW:
+            self._drop_cache()
+
+    def finish(self):
+        self._drop_cache()
+        if self.offset < self.size:
+            # the source shrank while copying, don't keep the preallocated tail
+            os.ftruncate(self.dst_fd, self.offset)
+
+    def rewind(self):
+        self.on_bytes.rewind()
+        self.offset = self.dropped = 0
+
+    def _drop_cache(self):
+        length = self.offset - self.dropped
+        if length <= 0:
+            return
+        # dirty pages can't be dropped, they have to reach the disk first
+        os.fdatasync(self.dst_fd)
+        _fadvise(self.dst_fd, self.dropped, length, "POSIX_FADV_DONTNEED")
+        _fadvise(self.src_fd, self.dropped, length, "POSIX_FADV_DONTNEED")
+        self.dropped = self.offset
+
+
+def _fadvise(fd, offset, length, advice):
+    # posix_fadvise is missing on Windows and macOS
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, offset, length, getattr(os, advice))
+        except OSError:
+            pass
+
+
+def _reflink(src_fd, dst_fd, size, on_bytes):
+    fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    on_bytes(size)
+    return size
+
+
+def _copy_file_range(src_fd, dst_fd, size, on_bytes):
+    offset = 0
+    while offset < size:
+        copied = os.copy_file_range(
+            src_fd,
+            dst_fd,
+            min(KERNEL_CHUNK_SIZE, size - offset),
+            offset_src=offset,
+            offset_dst=offset,
+        )
+        if copied == 0:
+            _check_started(offset, "copy_file_range")
+            # the source was truncated while copying
+            break
+        offset += copied
+        on_bytes(copied)
+    return offset
+
+
+def _sendfile(src_fd, dst_fd, size, on_bytes):
+    offset = 0
+    while offset < size:
+        copied = os.sendfile(dst_fd, src_fd, offset, min(KERNEL_CHUNK_SIZE, size - offset))
+        if copied == 0:
+            _check_started(offset, "sendfile")
+            break
+        offset += copied
+        on_bytes(copied)
+    return offset
+
+
+def _check_started(offset, name):
+    # some filesystems answer 0 instead of an error when they can't do it
+    if offset == 0:
+        raise OSError(errno.ENOTSUP, f"{name} copied nothing")
+
+
+_buffers = threading.local()
+
+
+def _readinto(fd, buffer):
+    if hasattr(os, "readv"):
+        return os.readv(fd, [buffer])
+    # Windows, where only hashed copies take the userspace path
+    data = os.read(fd, len(buffer))
+    buffer[: len(data)] = data
+    return len(data)
+
+
+def _buffer(size):
+    """A buffer of size bytes reused by every copy made on the calling thread."""
+    if not hasattr(_buffers, "by_size"):
+        _buffers.by_size = {}
+    buffer = _buffers.by_size.get(size)
+    if buffer is None:
+        buffer = _buffers.by_size[size] = bytearray(size)
+    return buffer
+
+
+def _userspace_copy(
+    src_fd, dst_fd, on_bytes, report=None, buffer_size=USERSPACE_BUFFER_SIZE, hasher=None
+):
+    buffer = _buffer(buffer_size)
+    view = memoryview(buffer)
+    read_seconds = write_seconds = 0.0
+    while True:
+        start = time.perf_counter()
+        read = _readinto(src_fd, buffer)
+        read_done = time.perf_counter()
+        read_seconds += read_done - start
+        if read == 0:
+            break
+        if hasher is not None:
+            hasher.update(view[:read])
+        written = 0
+        while written < read:
+            written += os.write(dst_fd, view[written:read])
+        write_seconds += time.perf_counter() - read_done
+        on_bytes(read)
+    if report is not None:
+        report.add_time("copy.userspace.read", read_seconds)
+        report.add_time("copy.userspace.write", write_seconds)
@@ -0,0 +1,64 @@
+import os
+import threading
+
+PART_SUFFIX = ".part"
+
+
+class CopyCanceled(Exception):
+    """Raised inside a copy or archive loop once the run is canceled."""
+
+
+class CopyControl:
+    """
+    Cancel and pause for a run, from any thread. The copy and archive loops call
+    checkpoint() between chunks, so a canceled run stops within a chunk even in
+    the middle of a huge file. A paused run blocks there on an Event, without
+    using any CPU, until it is resumed or canceled.
+    """
+
+    def __init__(self):
+        self.canceled = False
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def pause(self):
+        if not self.canceled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self.canceled = True
+        # a paused run has to wake up to stop
+        self._running.set()
+
+    def wait(self):
+        """Blocks while paused."""
+        self._running.wait()
+
+    def checkpoint(self):
+        """Blocks while paused and raises CopyCanceled once canceled."""
+        self._running.wait()
+        if self.canceled:
+            raise CopyCanceled()
+
+
+def part_path(path: str) -> str:
+    """
+    The hidden temporary name a file is written under, next to its final name,
+    until it is complete and renamed into place.
+    """
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f".{name}{PART_SUFFIX}")
+
+
+def remove_part(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
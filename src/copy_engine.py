@@ -0,0 +1,587 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import os
+import random
+import string
+import time
+from .file_scanner import FileScanner
+from .name_registry import NameRegistry
+from .deduplicator import REPORT_NAME, Deduplicator
+from .destination_layout import DestinationLayout
+from .copy_control import CopyCanceled, CopyControl
+from .copy_journal import CopyJournal
+from .fan_out import FanOutCopier, TeeOutputs, TeeReader
+from .file_table import FileTable
+from .file_walker import CachedFileEntry, FileEntry, walk_files
+from .file_filter import FileFilter
+from .copy_backends import FileCopier
+from .archive_backends import open_archive
+from .compression_policy import CompressionPolicy
+from .file_options import CopyOptions, OutputMode
+from .progress import ProgressTracker
+from .run_report import RunProfiler, RunReport
+from .scan_cache import ScanCache
+from .verifier import HashingReader, Verifier
+
+
+class CopyEngine:
+    """
+    Copies, links or archives the files it is given into the destination folder,
+    as the CopyOptions say. It has no GUI dependencies: progress goes to the
+    on_progress callback, which may be called from worker threads, and run()
+    returns FINISHED, CANCELED or NOT_FOUND.
+
+    Runs into the same destination, like the batches of watch mode, can share a
+    journal and a destination_layout; the caller closes a journal it passes in.
+    """
+
+    FINISHED = "finished"
+    CANCELED = "canceled"
+    NOT_FOUND = "not_found"
+
+    def __init__(
+        self,
+        absolute_path_files: list | FileTable | FileScanner,
+        to: str,
+        copy_options: CopyOptions,
+        on_progress=None,
+        report: RunReport = None,
+        profiler: RunProfiler = None,
+        journal: CopyJournal = None,
+        destination_layout: DestinationLayout = None,
+    ):
+        self.to = to
+        self.control = CopyControl()
+        self.absolute_path_files = absolute_path_files
+        self.compress_after_copy = copy_options.compress_after_copy
+        self.workers = max(1, copy_options.workers)
+        self.on_progress = on_progress
+        self.files_done = 0
+        self.files_skipped = 0
+        self.layout = destination_layout
+        if self.layout is None:
+            self.layout = DestinationLayout(
+                copy_options.layout,
+                copy_options.source,
+                copy_options.max_files_per_folder,
+                copy_options.hash_buckets,
+            )
+        self._shared_layout = destination_layout is not None
+        self.report = report if report is not None else RunReport()
+        self.report_path = copy_options.report_path
+        self.profiler = profiler
+        if self.profiler is None and (copy_options.profile or copy_options.trace_memory):
+            self.profiler = RunProfiler(copy_options.profile, copy_options.trace_memory)
+        self.deduplicator = Deduplicator(workers=self.workers) if copy_options.deduplicate else None
+        self.extra_destinations = list(copy_options.extra_destinations)
+        self.extra_archive = copy_options.extra_archive
+        self.fan_out = None
+        # only plain copies are journaled, archives are always written from scratch
+        self.incremental = (
+            copy_options.incremental and not self.compress_after_copy and not self.extra_archive
+        )
+        self.journal = journal if self.incremental else None
+        self._shared_journal = self.journal is not None
+        self.file_copier = FileCopier(copy_options.output_mode, self.report)
+        self.verifier = None
+        if copy_options.verify_algorithm is not None:
+            if copy_options.output_mode != OutputMode.COPY and not self.compress_after_copy:
+                raise ValueError("Only copies and archives can be verified, not links")
+            self.verifier = Verifier(
+                copy_options.verify_algorithm, copy_options.verify_reread, report=self.report
+            )
+        self.manifests = []
+        self.compression_policy = CompressionPolicy() if copy_options.adaptive_compression else None
+        self.compression_stats = None
+        self.archive_format = copy_options.archive_format
+        self.progress = ProgressTracker(
+            self._discovered_totals, destinations=self._destination_progress
+        )
+        self.list_totals = None
+
+    def run(self) -> str:
+        if self.profiler is not None:
+            self.profiler.start()
+        try:
+            status = self._run()
+        finally:
+            if self.profiler is not None:
+                self.report.profile = self.profiler.stop(self._profile_dump_path())
+        self.report.finish(status)
+        if self.deduplicator is not None:
+            self.report.count("duplicates", len(self.deduplicator.duplicates))
+            self.report.count("bytes_deduplicated", self.deduplicator.bytes_saved)
+        if self.report_path is not None:
+            self.report.write(self.report_path)
+        return status
+
+    def _profile_dump_path(self):
+        # the raw cProfile stats go next to the report, for pstats or snakeviz
+        if self.report_path is None or not self.profiler.cprofile:
+            return None
+        return os.path.splitext(self.report_path)[0] + ".prof"
+
+    def _run(self) -> str:
+        files = self.absolute_path_files
+        if isinstance(files, FileTable):
+            self.list_totals = [len(files), len(files), files.total_size()]
+        elif not isinstance(files, FileScanner):
+            # like the scanner, stat every path only once it comes up
+            self.list_totals = [len(files), 0, 0]
+            self.absolute_path_files = self._stat_listed(files)
+
+        try:
+            if self.compress_after_copy or self.extra_archive:
+                self._compress_files()
+            else:
+                self._copy_files()
+        except CopyCanceled:
+            pass
+
+        if self.cancel:
+            if self.verifier is not None:
+                self.verifier.abort()
+            return self.CANCELED
+        if self.verifier is not None:
+            self.verifier.close()
+        if self.files_done + self.files_skipped == 0:
+            return self.NOT_FOUND
+        self._emit_progress(force=True)
+        if self.verifier is not None:
+            self.manifests = self.verifier.write_manifests()
+        if self.deduplicator is not None:
+            self._write_dedup_report()
+        return self.FINISHED
+
+    @property
+    def cancel(self) -> bool:
+        return self.control.canceled
+
+    def cancel_copy(self):
+        self.control.cancel()
+        if isinstance(self.absolute_path_files, FileScanner):
+            self.absolute_path_files.stop()
+
+    def pause_copy(self):
+        self.control.pause()
+
+    def resume_copy(self):
+        self.control.resume()
+
+    @property
+    def paused(self) -> bool:
+        return self.control.paused
+
+    def summary(self) -> list:
+        """Human readable lines describing how the run went."""
+        summary = []
+        methods_used = self.file_copier.methods_used
+        if methods_used:
+            methods = ", ".join(
+                f"{method} ({count} files)" for method, count in methods_used.most_common()
+            )
+            summary.append(f"Copy method: {methods}")
+        if self.compression_stats is not None:
+            kinds = ", ".join(
+                f"{name} ({totals['files']} files)"
+                for name, totals in self.compression_stats.by_compression.items()
+            )
+            summary.append(
+                f"Compression: {kinds}; {self.compression_stats.cpu_seconds:.1f} s of CPU "
+                f"saved {self.compression_stats.bytes_saved / 1024 / 1024:.1f} MB"
+            )
+        if self.fan_out is not None:
+            for destination in self.fan_out.destinations:
+                line = (
+                    f"{destination.folder}: {destination.files_done} files, "
+                    f"{destination.bytes_done / 1024 / 1024:.1f} MB"
+                )
+                if destination.failed:
+                    path, error = destination.errors[0]
+                    line += f", {destination.failed} failed (first: {path}: {error})"
+                summary.append(line)
+        if self.deduplicator is not None and self.deduplicator.duplicates:
+            summary.append(
+                f"{len(self.deduplicator.duplicates)} duplicate files were skipped, "
+                f"saving {self.deduplicator.bytes_saved / 1024 / 1024:.1f} MB"
+            )
+        phases = sorted(self.report.phases.items(), key=lambda item: -item[1])[:3]
+        if phases:
+            summary.append(
+                "Most time spent in: "
+                + ", ".join(f"{phase} ({seconds:.1f} s)" for phase, seconds in phases)
+            )
+        if self.verifier is not None:
+            line = f"Checksums ({self.verifier.algorithm}): " + ", ".join(self.manifests)
+            if self.verifier.verified:
+                line += (
+                    f"; {self.verifier.verified} files read back, "
+                    f"{len(self.verifier.mismatches)} mismatches"
+                )
+            summary.append(line)
+            for path, expected, actual in self.verifier.mismatches[:10]:
+                summary.append(f"Checksum mismatch: {path} (expected {expected}, got {actual})")
+        if self.report_path is not None:
+            summary.append(f"Run report: {self.report_path}")
+        return summary
+
+    def _compress_files(self):
+        archive_folder = self.to if self.compress_after_copy else self.extra_archive
+        os.makedirs(archive_folder, exist_ok=True)
+        copy_folders = self._copy_folders()
+        self.layout.folders = copy_folders
+        if copy_folders:
+            self.fan_out = FanOutCopier(copy_folders, self.file_copier)
+
+        with open_archive(
+            self.archive_format,
+            archive_folder,
+            on_entry_written=self._file_written,
+            on_bytes=self._bytes_copied,
+            workers=self.workers,
+            policy=self.compression_policy,
+            report=self.report,
+        ) as archive:
+            self.compression_stats = archive.stats
+            digests = {}
+            for file in self._files_to_copy():
+                # leaving with CopyCanceled removes the unfinished archive
+                self.control.checkpoint()
+
+                entry = FileEntry.from_path(file)
+                unique_filename = self.layout.reserve(entry)
+                start = time.perf_counter()
+                if self.fan_out is None and self.verifier is None:
+                    archive.add(file, unique_filename, entry.size, entry.mtime)
+                else:
+                    self._add_streamed(archive, entry, unique_filename, digests)
+                self.report.file_done(entry, entry.size, time.perf_counter() - start, "archive.add")
+
+            start = time.perf_counter()
+        self.report.add_time("archive.close", time.perf_counter() - start)
+        if self.compression_stats is not None:
+            self.report.add_time("archive.deflate_cpu", self.compression_stats.cpu_seconds)
+
+        if not self.cancel and self.files_done == 0:
+            os.remove(archive.archive_path)
+        elif self.verifier is not None:
+            self.verifier.archive_written(archive.archive_path, digests)
+
+    def _add_streamed(self, archive, entry, filename, digests):
+        # copies and checksums are made from the blocks the archive reads
+        outputs = None
+        if self.fan_out is not None:
+            outputs = TeeOutputs(self.fan_out.destinations, filename)
+        hasher = self.verifier.new_hash() if self.verifier is not None else None
+        completed = False
+        failed = []
+        try:
+            with open(entry, "rb") as f:
+                # tar headers need the size of the file as it is now
+                size = os.fstat(f.fileno()).st_size
+                reader = f if outputs is None else TeeReader(f, outputs)
+                if hasher is not None:
+                    reader = HashingReader(reader, hasher)
+                archive.add(entry, filename, size, entry.mtime, reader)
+            completed = True
+        finally:
+            if outputs is not None:
+                failed = outputs.close(completed)
+        if hasher is not None:
+            digests[filename] = hasher.hexdigest()
+            archive_folder = os.path.dirname(archive.archive_path)
+            self.verifier.file_written(filename, digests[filename], [archive_folder], archived=True)
+            if self.fan_out is not None:
+                folders = [d.folder for d in self.fan_out.destinations if d not in failed]
+                self.verifier.file_written(filename, digests[filename], folders)
+
+    def _copy_files(self):
+        copy_folders = self._copy_folders()
+        self.layout.folders = copy_folders
+        if len(copy_folders) > 1:
+            self.fan_out = FanOutCopier(copy_folders, self.file_copier)
+        if self.incremental and not self._shared_journal:
+            self.journal = CopyJournal.for_folder(self.to)
+        if self.journal is not None and not self._shared_layout:
+            # names used by earlier runs stay reserved for the files that own them
+            self.layout.claim_all(self.journal)
+        try:
+            self._copy_files_with_pool()
+        finally:
+            if self.journal is not None and not self._shared_journal:
+                self.journal.close()
+
+    def _copy_files_with_pool(self):
+        pending = set()
+
+        # names are reserved here, on the dispatching thread only, so two
+        # workers can never be handed the same destination path
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for file in self._files_to_copy():
+                self.control.wait()
+                if self.cancel:
+                    break
+
+                destination = self._reserve_destination(file)
+                pending.add(executor.submit(self._copy_file, file, destination))
+
+                # keep a bounded number of copies in flight
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect_copies(done)
+
+            if self.cancel:
+                for future in pending:
+                    future.cancel()
+                pending = {future for future in pending if not future.cancelled()}
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self._collect_copies(done)
+
+    def _copy_file(self, file, destination):
+        self.control.checkpoint()
+        start = time.perf_counter()
+        if self.journal is not None:
+            self.journal.copy_started(file, destination)
+        hasher = self.verifier.new_hash() if self.verifier is not None else None
+        if self.fan_out is None:
+            dest_path = os.path.join(self.to, destination)
+            method = self.file_copier.copy(file, dest_path, self._bytes_copied, hasher)
+            copied = True
+            folders = [self.to]
+        else:
+            method = "fan_out"
+            failed = self.fan_out.copy(file, destination, self._bytes_copied, hasher)
+            # the journal belongs to the first destination
+            copied = self.fan_out.destinations[0] not in failed
+            folders = [d.folder for d in self.fan_out.destinations if d not in failed]
+        if self.journal is not None and copied:
+            self.journal.copy_completed(file, destination)
+        if hasher is not None and folders:
+            self.verifier.file_written(destination, hasher.hexdigest(), folders)
+        entry = FileEntry.from_path(file)
+        self.report.file_done(entry, entry.size, time.perf_counter() - start, f"copy.{method}")
+
+    def _files_to_copy(self):
+        files = self.absolute_path_files
+        if self.journal is not None:
+            files = self._skip_up_to_date(files)
+        if self.deduplicator is not None:
+            if self.journal is not None:
+                # copies of earlier runs are the originals of their duplicates, in any order
+                self.deduplicator.known = self._copied_with_size
+            files = self.deduplicator.unique(files, self._file_skipped)
+        return files
+
+    def _skip_up_to_date(self, files):
+        for file in files:
+            entry = FileEntry.from_path(file)
+            if isinstance(entry, CachedFileEntry):
+                # edits in place don't change the folder, the cache may be behind
+                try:
+                    entry = FileEntry.from_path(entry.path)
+                except FileNotFoundError:
+                    continue
+            if self.journal.is_up_to_date(entry):
+                self._file_skipped(entry)
+            else:
+                yield entry
+
+    def _copied_with_size(self, size):
+        paths = (os.path.join(self.to, path) for path in self.journal.copied_with_size(size))
+        return [FileEntry(path, size, 0) for path in paths if os.path.isfile(path)]
+
+    def _write_dedup_report(self):
+        report_path = os.path.join(self.to, REPORT_NAME)
+        # every run reports all duplicates, so an earlier report is replaced
+        if not Deduplicator.is_report(report_path):
+            report_name = NameRegistry.from_folder(self.to).reserve(REPORT_NAME)
+            report_path = os.path.join(self.to, report_name)
+        self.deduplicator.write_report(report_path)
+
+    def _collect_copies(self, done):
+        for future in done:
+            try:
+                future.result()
+            except CopyCanceled:
+                continue
+            self._file_done()
+
+    def _file_written(self, file):
+        self._file_done()
+
+    def _file_done(self):
+        self.files_done += 1
+        self.progress.file_done()
+        self._emit_progress()
+
+    def _file_skipped(self, file):
+        self.files_skipped += 1
+        self.report.count("files_skipped")
+        # skipped files count as done, bytes included
+        self.progress.add_bytes(FileEntry.from_path(file).size)
+        self.progress.file_done()
+        self._emit_progress()
+
+    def _bytes_copied(self, count):
+        self.progress.add_bytes(count)
+        self._emit_progress()
+        # called between chunks by every copy and archive loop
+        self.control.checkpoint()
+
+    def _emit_progress(self, force=False):
+        if self.on_progress is None:
+            return
+        snapshot = self.progress.snapshot(force)
+        if snapshot is not None:
+            self.on_progress(snapshot)
+
+    def _copy_folders(self):
+        folders = [] if self.compress_after_copy else [self.to]
+        for folder in self.extra_destinations:
+            os.makedirs(folder, exist_ok=True)
+            folders.append(folder)
+        return folders
+
+    def _destination_progress(self):
+        if self.fan_out is None:
+            return ()
+        return tuple(
+            (destination.folder, destination.files_done, destination.bytes_done, destination.failed)
+            for destination in self.fan_out.destinations
+        )
+
+    def _discovered_totals(self):
+        if isinstance(self.absolute_path_files, FileScanner):
+            scanner = self.absolute_path_files
+            return scanner.discovered, scanner.discovered_bytes, not scanner.finished_scanning
+        if self.list_totals is None:
+            return 0, 0, True
+        files_total, files_seen, bytes_seen = self.list_totals
+        if 0 < files_seen < files_total:
+            # the count of a list is known, its size is estimated until all are stat'ed
+            return files_total, bytes_seen * files_total // files_seen, False
+        return files_total, bytes_seen, False
+
+    def _stat_listed(self, files):
+        for file in files:
+            entry = FileEntry.from_path(file)
+            self.list_totals[1] += 1
+            self.list_totals[2] += entry.size
+            yield entry
+
+    def _reserve_destination(self, file):
+        """The path file is copied to, relative to the destination."""
+        if self.journal is not None:
+            # a changed file overwrites its own earlier copy
+            destination = self.journal.destination(os.fspath(file))
+            if destination is not None:
+                self.layout.make_folders(destination)
+                return destination
+        return self.layout.reserve(file)
+
+
+def create_destination_folder(copy_options: CopyOptions):
+    """
+    Returns the folder a run copies into and whether it was created by this call:
+    the fixed destination if there is one, otherwise a new folder_XXXXX inside
+    the source.
+    """
+    if copy_options.incremental and not copy_options.destination:
+        raise ValueError("Incremental copies need a fixed destination folder")
+
+    if copy_options.destination:
+        created = not os.path.isdir(copy_options.destination)
+        os.makedirs(copy_options.destination, exist_ok=True)
+        return copy_options.destination, created
+
+    folder_name = "folder_" + generate_unique_name()
+    folder_path = os.path.join(copy_options.source, folder_name)
+    os.makedirs(folder_path)
+    return folder_path, True
+
+
+def generate_unique_name(length=5):
+    characters = string.ascii_letters + string.digits
+    unique_name = "".join(random.choice(characters) for _ in range(length))
+    return unique_name
+
+
+def output_folders(copy_options: CopyOptions, to_folder_path: str) -> list:
+    """Every folder a run writes into, none of them should be scanned."""
+    folders = [to_folder_path, *copy_options.extra_destinations]
+    if copy_options.extra_archive:
+        folders.append(copy_options.extra_archive)
+    return folders
+
+
+def scan_files(
+    source_folder_path: str,
+    to_folder_path: str | list,
+    file_filter: FileFilter,
+    scan_workers: int,
+    report: RunReport = None,
+    scan_cache: ScanCache = None,
+):
+    """
+    Yields a FileEntry for every file to copy; the destination folder, or
+    folders, are never entered. The scan_cache is closed when the scan ends.
+    """
+    files = walk_files(
+        source_folder_path,
+        file_filter,
+        exclude_folder=to_folder_path,
+        workers=scan_workers,
+        report=report,
+        scan_cache=scan_cache,
+    )
+    if scan_cache is None:
+        return files
+    return _closing_cache(files, scan_cache)
+
+
+def _closing_cache(files, scan_cache):
+    try:
+        yield from files
+    finally:
+        scan_cache.close()
+
+
+def start_scan(
+    copy_options: CopyOptions, to_folder_path: str, report: RunReport = None
+) -> FileScanner:
+    """Starts scanning the source on a background thread, feeding a bounded queue."""
+    file_filter = FileFilter.from_copy_options(copy_options)
+    return FileScanner(
+        scan_files(
+            copy_options.source,
+            output_folders(copy_options, to_folder_path),
+            file_filter,
+            copy_options.scan_workers,
+            report,
+            open_scan_cache(copy_options, file_filter),
+        )
+    ).start()
+
+
+def start_profiler(copy_options: CopyOptions) -> RunProfiler:
+    """
+    Starts the profiler the options ask for, None when they don't. Call it
+    before start_scan so the scan threads are profiled too, and pass it on to
+    the engine, which stops it.
+    """
+    if not copy_options.profile and not copy_options.trace_memory:
+        return None
+    profiler = RunProfiler(copy_options.profile, copy_options.trace_memory)
+    profiler.start()
+    return profiler
+
+
+def open_scan_cache(copy_options: CopyOptions, file_filter: FileFilter):
+    """The scan cache for the options, None when they don't use one."""
+    if not copy_options.scan_cache:
+        return None
+    scan_cache = ScanCache.open_default(file_filter)
+    if copy_options.refresh_scan_cache:
+        scan_cache.invalidate(copy_options.source)
+    return scan_cache
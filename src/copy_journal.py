@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class CopyJournal:
+    """
+    SQLite record of the files copied into a fixed destination, so a later run
+    only copies files that are new or changed since they were copied. Writes are
+    committed in batches; a crash loses at most the last batch, and those files
+    are copied again on the next run. The database is only created once the
+    first copy is recorded, so a run that copies nothing leaves no journal.
+    """
+
+    FILENAME = ".copy_journal.sqlite3"
+    COMMIT_EVERY = 500
+    COMMIT_INTERVAL = 2.0
+
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+        self._lock = threading.Lock()
+        self._connection = None
+        if os.path.exists(journal_path):
+            self._connect()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    @classmethod
+    def for_folder(cls, folder_path: str):
+        return cls(os.path.join(folder_path, cls.FILENAME))
+
+    def is_up_to_date(self, entry) -> bool:
+        """True if the file was completely copied and hasn't changed since."""
+        row = self._fetch_one(
+            "SELECT size, mtime, completed FROM files WHERE source = ?", entry.path
+        )
+        return row is not None and row == (entry.size, entry.mtime, 1)
+
+    def destination(self, source: str):
+        """The name the file was copied to by an earlier run, if any."""
+        row = self._fetch_one("SELECT destination FROM files WHERE source = ?", source)
+        return row[0] if row is not None else None
+
+    def copied_with_size(self, size: int) -> list:
+        """The destinations of the completed copies of size bytes."""
+        with self._lock:
+            if self._connection is None:
+                return []
+            rows = self._connection.execute(
+                "SELECT destination FROM files WHERE size = ? AND completed = 1", (size,)
+            )
+            return [row[0] for row in rows]
+
+    def destinations(self) -> list:
+        with self._lock:
+            if self._connection is None:
+                return []
+            return [
+                row[0] for row in self._connection.execute("SELECT destination FROM files")
+            ]
+
+    def copy_started(self, entry, destination: str):
+        self._record(entry, destination, completed=False)
+
+    def copy_completed(self, entry, destination: str):
+        self._record(entry, destination, completed=True)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.commit()
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self):
+        self._connection = sqlite3.connect(self.journal_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                source TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                destination TEXT NOT NULL,
+                completed INTEGER NOT NULL
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS files_by_size ON files (size)")
+        self._connection.commit()
+
+    def _fetch_one(self, query, source):
+        with self._lock:
+            if self._connection is None:
+                return None
+            return self._connection.execute(query, (source,)).fetchone()
+
+    def _record(self, entry, destination, completed):
+        with self._lock:
+            if self._connection is None:
+                self._connect()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (entry.path, entry.size, entry.mtime, destination, int(completed)),
+            )
+            self._uncommitted += 1
+            now = time.monotonic()
+            if (
+                self._uncommitted >= self.COMMIT_EVERY
+                or now - self._last_commit >= self.COMMIT_INTERVAL
+            ):
+                self._connection.commit()
+                self._uncommitted = 0
+                self._last_commit = now
@@ -0,0 +1,127 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+import hashlib
+import json
+from .file_walker import FileEntry
+
+REPORT_NAME = "duplicates_report.json"
+PARTIAL_HASH_SIZE = 64 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class Deduplicator:
+    """
+    Drops files whose content was already seen in the run. Files are compared by
+    size first, then by a hash of their first block and only then by a hash of
+    the whole file, so most files are never read. Hashing runs on a thread pool
+    (hashlib releases the GIL), and files of the same size are checked one at a
+    time, in their original order, so the first copy of each content is kept.
+    known is a callable returning the FileEntry of every file of a size that is
+    already in the destination; those count as seen before the first file.
+    """
+
+    def __init__(self, workers: int = 4, window: int = 64, known=None):
+        self.workers = max(1, workers)
+        self.window = max(window, self.workers)
+        self.known = known
+        self.duplicates = []
+        self.bytes_saved = 0
+        self._kept_by_size = {}
+        self._partial_hashes = {}
+        self._full_hashes = {}
+
+    def unique(self, files, on_duplicate=None):
+        """
+        Yields the files of the iterable that are not duplicates, in their
+        original order. on_duplicate is called with every skipped file.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        pending = deque()
+        # the last check of every size, the next file of that size waits for it
+        last_by_size = {}
+        try:
+            for file in files:
+                entry = FileEntry.from_path(file)
+                future = executor.submit(self._find_original, entry, last_by_size.get(entry.size))
+                last_by_size[entry.size] = future
+                pending.append((file, future))
+                while pending and (len(pending) > self.window or pending[0][1].done()):
+                    yield from self._take_first(pending, on_duplicate)
+            while pending:
+                yield from self._take_first(pending, on_duplicate)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def report(self) -> dict:
+        return {
+            "files_skipped": len(self.duplicates),
+            "bytes_saved": self.bytes_saved,
+            "duplicates": [
+                {"file": file, "duplicate_of": original, "size": size}
+                for file, original, size in self.duplicates
+            ],
+        }
+
+    def write_report(self, report_path: str):
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    @staticmethod
+    def is_report(path: str) -> bool:
+        """True if path holds a report written by an earlier run."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return isinstance(report, dict) and "duplicates" in report
+
+    def _take_first(self, pending, on_duplicate):
+        file, future = pending.popleft()
+        entry, original = future.result()
+        if original is None:
+            yield file
+            return
+        self.duplicates.append((entry.path, original.path, entry.size))
+        self.bytes_saved += entry.size
+        if on_duplicate is not None:
+            on_duplicate(file)
+
+    def _find_original(self, entry, earlier):
+        if earlier is not None:
+            wait([earlier])
+        kept = self._kept_by_size.get(entry.size)
+        if kept is None:
+            known = self.known(entry.size) if self.known is not None else ()
+            kept = self._kept_by_size[entry.size] = list(known)
+        for original in kept:
+            if self._is_same_content(original, entry):
+                return entry, original
+        kept.append(entry)
+        return entry, None
+
+    def _is_same_content(self, original, file):
+        if self._partial_hash(original) != self._partial_hash(file):
+            return False
+        if file.size <= PARTIAL_HASH_SIZE:
+            return True
+        return self._full_hash(original) == self._full_hash(file)
+
+    def _partial_hash(self, file):
+        digest = self._partial_hashes.get(file.path)
+        if digest is None:
+            with open(file, "rb") as f:
+                digest = hashlib.blake2b(f.read(PARTIAL_HASH_SIZE)).digest()
+            self._partial_hashes[file.path] = digest
+        return digest
+
+    def _full_hash(self, file):
+        digest = self._full_hashes.get(file.path)
+        if digest is None:
+            hasher = hashlib.blake2b()
+            with open(file, "rb") as f:
+                while block := f.read(HASH_BLOCK_SIZE):
+                    hasher.update(block)
+            digest = hasher.digest()
+            self._full_hashes[file.path] = digest
+        return digest
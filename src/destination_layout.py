@@ -0,0 +1,152 @@
+import hashlib
+import os
+import posixpath
+import time
+from .file_options import OutputLayout, default_hash_buckets
+from .file_walker import FileEntry
+from .name_registry import NameRegistry
+
+# the date and hash layouts keep folders below this unless told otherwise
+DEFAULT_MAX_FILES_PER_FOLDER = 10_000
+# layouts that mirror something are only capped when asked to
+UNCAPPED_LAYOUTS = (OutputLayout.FLAT, OutputLayout.PRESERVE)
+
+
+class DestinationLayout:
+    """
+    Decides where inside the destination every file goes. FLAT puts them all in
+    one folder, PRESERVE keeps their folders relative to source_root, DATE sorts
+    them into YYYY/MM folders by modification time, in local time, and HASH
+    spreads them over hash_buckets folders by a hash of their name. A folder
+    holding max_files_per_folder entries overflows into a sibling named with a
+    _2, _3... suffix, or part_2, part_3... for the top folder, skipping names
+    another shard, the source or a file in the destination already uses. Flat
+    and preserve are only capped when max_files_per_folder is given.
+
+    Every folder gets a NameRegistry of its own, seeded by listing only that
+    folder the first time a file goes into it, so name collisions are resolved
+    per folder. Returned paths are relative to the destination, with /
+    separators, so they work as archive entry names and in the copy journal.
+    Folders are created in every one of folders, which the engine sets to the
+    folders it copies into before reserving.
+    """
+
+    def __init__(
+        self,
+        layout: OutputLayout = OutputLayout.FLAT,
+        source_root: str = None,
+        max_files_per_folder: int = None,
+        hash_buckets: int = default_hash_buckets,
+    ):
+        if layout == OutputLayout.PRESERVE and source_root is None:
+            raise ValueError("The preserve layout needs the source folder")
+        if hash_buckets < 1:
+            raise ValueError("The hash layout needs at least one bucket")
+        if max_files_per_folder is None and layout not in UNCAPPED_LAYOUTS:
+            max_files_per_folder = DEFAULT_MAX_FILES_PER_FOLDER
+        self.layout = layout
+        self.source_root = source_root
+        self.max_files_per_folder = max_files_per_folder
+        self.hash_buckets = hash_buckets
+        self.folders = []
+        self._bucket_width = len(f"{hash_buckets - 1:x}")
+        self._registries = {}
+        # the folder every shard is currently filling, after overflowing
+        self._filling = {}
+        # shards and overflow folders handed out, no overflow may reuse them
+        self._used_folders = set()
+        self._created = set()
+
+    def reserve(self, file) -> str:
+        """Returns a free path for file, relative to the destination."""
+        name = os.path.basename(file)
+        shard = self.shard(file)
+        self._used_folders.add(shard)
+        folder, overflows = self._filling.get(shard, (shard, 1))
+        registry = self._registry(folder)
+        while self.max_files_per_folder and len(registry) >= self.max_files_per_folder:
+            folder, overflows = self._overflow_folder(shard, overflows)
+            registry = self._registry(folder)
+        self._filling[shard] = (folder, overflows)
+        path = posixpath.join(folder, registry.reserve(name))
+        self.make_folders(path)
+        return path
+
+    def claim(self, path: str):
+        """Marks a path handed out by an earlier run as taken."""
+        folder, name = posixpath.split(path)
+        self._registry(folder).reserve(name)
+
+    def claim_all(self, journal):
+        """Claims every path the copy journal of the destination has handed out."""
+        for path in journal.destinations():
+            self.claim(path)
+
+    def make_folders(self, path: str):
+        """Creates the folder of path in every destination folder."""
+        folder = posixpath.dirname(path)
+        if folder and folder not in self._created:
+            for root in self.folders:
+                os.makedirs(os.path.join(root, folder), exist_ok=True)
+            self._created.add(folder)
+            # a new folder is an entry of its parent as well
+            while folder:
+                parent, name = posixpath.split(folder)
+                registry = self._registries.get(parent)
+                if registry is not None and name not in registry:
+                    registry.reserve(name)
+                folder = parent
+
+    def shard(self, file) -> str:
+        """The folder the layout puts file in, before any overflow."""
+        match self.layout:
+            case OutputLayout.PRESERVE:
+                try:
+                    folder = os.path.relpath(os.path.dirname(file), self.source_root)
+                except ValueError:
+                    # on another drive
+                    return ""
+                # files from outside the source go to the top folder
+                if folder == os.curdir or folder.split(os.sep, 1)[0] == os.pardir:
+                    return ""
+                return folder.replace(os.sep, "/")
+            case OutputLayout.DATE:
+                modified = time.localtime(FileEntry.from_path(file).mtime)
+                return f"{modified.tm_year:04d}/{modified.tm_mon:02d}"
+            case OutputLayout.HASH:
+                # names that collide on this filesystem land in the same bucket
+                name = os.fsencode(os.path.normcase(os.path.basename(file)))
+                digest = hashlib.blake2b(name, digest_size=8).digest()
+                bucket = int.from_bytes(digest, "big") % self.hash_buckets
+                return f"{bucket:0{self._bucket_width}x}"
+        return ""
+
+    def _overflow_folder(self, shard, number):
+        while True:
+            number += 1
+            folder = f"{shard}_{number}" if shard else f"part_{number}"
+            if not self._folder_taken(folder):
+                self._used_folders.add(folder)
+                return folder, number
+
+    def _folder_taken(self, folder):
+        if folder in self._used_folders:
+            return True
+        # a source folder that hasn't been reached yet
+        if self.layout == OutputLayout.PRESERVE and os.path.lexists(
+            os.path.join(self.source_root, folder)
+        ):
+            return True
+        for root in self.folders:
+            path = os.path.join(root, folder)
+            if os.path.lexists(path) and not os.path.isdir(path):
+                return True
+        return False
+
+    def _registry(self, folder):
+        registry = self._registries.get(folder)
+        if registry is None:
+            paths = [os.path.join(root, folder) for root in self.folders]
+            registry = self._registries[folder] = NameRegistry.from_folders(paths)
+        return registry
+
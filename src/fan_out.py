@@ -0,0 +1,197 @@
+import os
+import threading
+from .copy_backends import FileCopier, LARGE_FILE_BUFFER_SIZE, _buffer, _fadvise
+from .copy_control import part_path, remove_part
+from .file_options import OutputMode
+
+
+class Destination:
+    """One folder a run copies into, with its own progress and errors."""
+
+    # errors kept per destination, the rest are only counted
+    MAX_ERRORS_KEPT = 20
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.files_done = 0
+        self.bytes_done = 0
+        self.failed = 0
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def file_done(self, size: int):
+        with self._lock:
+            self.files_done += 1
+            self.bytes_done += size
+
+    def file_failed(self, path: str, error: OSError):
+        with self._lock:
+            self.failed += 1
+            if len(self.errors) < self.MAX_ERRORS_KEPT:
+                self.errors.append((path, str(error)))
+
+    def __repr__(self):
+        return f"Destination({self.folder!r}, files_done={self.files_done}, failed={self.failed})"
+
+
+class TeeOutputs:
+    """
+    The copies of one source file being written, one per destination. Every
+    block read from the source is written to all of them, under a .part name
+    until the copy is complete. A destination that fails loses this file only:
+    its partial copy is removed, the error is recorded against it and the other
+    destinations carry on.
+    """
+
+    def __init__(self, destinations, filename: str):
+        self._outputs = []
+        # destinations that didn't get the file
+        self.failed = []
+        for destination in destinations:
+            path = os.path.join(destination.folder, filename)
+            try:
+                fd = os.open(
+                    part_path(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o666
+                )
+            except OSError as e:
+                destination.file_failed(path, e)
+                self.failed.append(destination)
+                continue
+            self._outputs.append(_Output(destination, path, fd))
+
+    def write(self, data):
+        view = memoryview(data)
+        for output in self._outputs:
+            if output.fd is None:
+                continue
+            try:
+                written = 0
+                while written < len(view):
+                    written += os.write(output.fd, view[written:])
+                output.size += written
+            except OSError as e:
+                self._fail(output, e)
+
+    def close(self, completed: bool = True) -> list:
+        """
+        Closes every copy; they count as done if completed, otherwise they are
+        removed. Returns the destinations that didn't get the file.
+        """
+        for output in self._outputs:
+            if output.fd is None:
+                continue
+            try:
+                os.close(output.fd)
+                output.fd = None
+                if completed:
+                    os.replace(part_path(output.path), output.path)
+            except OSError as e:
+                # a delayed write error can show up on close
+                self._fail(output, e)
+                continue
+            if completed:
+                output.destination.file_done(output.size)
+            else:
+                remove_part(part_path(output.path))
+                self.failed.append(output.destination)
+        return self.failed
+
+    def _fail(self, output, error):
+        if output.fd is not None:
+            try:
+                os.close(output.fd)
+            except OSError:
+                pass
+        output.fd = None
+        remove_part(part_path(output.path))
+        output.destination.file_failed(output.path, error)
+        self.failed.append(output.destination)
+
+
+class TeeReader:
+    """A readable file that writes everything read from it to a TeeOutputs."""
+
+    __slots__ = ("file", "outputs")
+
+    def __init__(self, file, outputs: TeeOutputs):
+        self.file = file
+        self.outputs = outputs
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        if data:
+            self.outputs.write(data)
+        return data
+
+
+class FanOutCopier:
+    """
+    Copies every source file to several destinations while reading it only
+    once. In the link output modes nothing is read and every destination gets
+    its own link from file_copier.
+    """
+
+    def __init__(self, folders, file_copier: FileCopier = None):
+        self.destinations = [Destination(folder) for folder in folders]
+        self.file_copier = file_copier or FileCopier()
+
+    def copy(self, source, filename: str, on_bytes=None, hasher=None) -> list:
+        """
+        Copies source as filename into every destination and returns the
+        destinations that failed. on_bytes is called with the number of source
+        bytes read, once for all the destinations, and hasher, a hashlib object,
+        is updated with them in copy mode.
+        """
+        if self.file_copier.output_mode != OutputMode.COPY:
+            return self._link(source, filename, on_bytes)
+
+        outputs = TeeOutputs(self.destinations, filename)
+        completed = False
+        try:
+            with open(source, "rb", buffering=0) as src:
+                _fadvise(src.fileno(), 0, 0, "POSIX_FADV_SEQUENTIAL")
+                buffer = _buffer(LARGE_FILE_BUFFER_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    read = src.readinto(buffer)
+                    if not read:
+                        break
+                    outputs.write(view[:read])
+                    if hasher is not None:
+                        hasher.update(view[:read])
+                    if on_bytes is not None:
+                        on_bytes(read)
+            completed = True
+        finally:
+            # a source that can't be read fails the file for every destination
+            failed = outputs.close(completed)
+        return failed
+
+    def _link(self, source, filename, on_bytes):
+        failed = []
+        for destination in self.destinations:
+            path = os.path.join(destination.folder, filename)
+            try:
+                self.file_copier.copy(source, path, on_bytes)
+            except OSError as e:
+                destination.file_failed(path, e)
+                failed.append(destination)
+                continue
+            destination.file_done(os.path.getsize(path))
+            # progress counts each source once
+            on_bytes = None
+        return failed
+
+
+class _Output:
+    __slots__ = ("destination", "path", "fd", "size")
+
+    def __init__(self, destination, path, fd):
+        self.destination = destination
+        self.path = path
+        self.fd = fd
+        self.size = 0
+
+
+# keeps Windows from translating line endings
+_O_BINARY = getattr(os, "O_BINARY", 0)
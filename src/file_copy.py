@@ -1,14 +1,18 @@
 from PyQt6.QtCore import QObject, pyqtSignal
-import random
-import string
 import os
 import platform
-from .copy_thread import CopyThread
-from .file_options import FileType, CopyOptions, image_extensions, video_extensions
+from .file_filter import FileFilter, file_extensions
+from .file_options import FileType, CopyOptions, default_scan_workers
 
 
 class FileCopy(QObject):
+    """
+    Qt adapter over CopyEngine. The engine and its modules (archives, hashing,
+    sqlite) are imported on the first copy so they don't slow down startup.
+    """
+
     progress_changed = pyqtSignal(int)
+    progress_stats = pyqtSignal(object)
     not_files_found = pyqtSignal()
     copy_finished = pyqtSignal()
     copy_canceled = pyqtSignal()
@@ -18,54 +22,74 @@ class FileCopy(QObject):
         super().__init__()
         self.copy_finished.connect(self._copy_finished_func)
         self.copy_thread = None
+        self.scan_workers = default_scan_workers
+        self.custom_file_types = []
+        self.file_filter = None
+        self.report = None
 
     def start_copy(self, copy_options: CopyOptions):
-        self.file_type = copy_options.file_type
-        self.source = copy_options.source
-        self.compress_after_copy = copy_options.compress_after_copy
-        self.custom_file_types = copy_options.custom_file_types
-
         if self.is_copying_files():
             return
+        from .copy_engine import create_destination_folder, start_scan
+        from .run_report import RunReport, default_report_path
 
-        to_folder_path = self._create_folder(self.source)
+        self.file_type = copy_options.file_type
+        self.source = copy_options.source
+        self.custom_file_types = copy_options.custom_file_types
+        self.scan_workers = copy_options.scan_workers
+        self.file_filter = FileFilter.from_copy_options(copy_options)
+        # shared by the scan and the copy, written by the engine when it is done
+        self.report = RunReport()
+        self.report_path = copy_options.report_path or default_report_path()
 
-        if to_folder_path is None:
-            return
+        to_folder_path, self.created_folder = create_destination_folder(copy_options)
 
         self.to_folder_path = to_folder_path
-        absolute_path_files = self._find_files_to_copy(self.source, to_folder_path)
-
-        if not absolute_path_files:
-            # the folder that was created is deleted
-            os.rmdir(to_folder_path)
-            self.not_files_found.emit()
-            return
-
-        self._start_thread_copy(to_folder_path, absolute_path_files)
+        # the scan runs in the background and feeds the copy thread as it goes
+        file_scanner = start_scan(copy_options, to_folder_path, self.report)
+        self._start_thread_copy(to_folder_path, file_scanner, copy_options)
 
     def cancel_copy(self):
         if self.is_copying_files():
             self.copy_thread.cancel_copy()
 
+    def pause_copy(self):
+        if self.is_copying_files():
+            self.copy_thread.pause_copy()
+
+    def resume_copy(self):
+        if self.is_copying_files():
+            self.copy_thread.resume_copy()
+
+    def is_paused(self):
+        return self.is_copying_files() and self.copy_thread.engine.paused
+
     def is_copying_files(self):
         return self.copy_thread is not None
 
     def _copy_finished_func(self):
+        summary = self.copy_thread.engine.summary()
         self.copy_thread = None
+        if summary:
+            self.show_message.emit({"type_message": "Info", "message": "\n".join(summary)})
         self._open_folder(self.to_folder_path)
 
-    def _start_thread_copy(self, to_folder_path, absolute_path_files):
+    def _start_thread_copy(self, to_folder_path, absolute_path_files, copy_options):
+        from .copy_thread import CopyThread
+
         self.show_message.emit(
             {
                 "type_message": "Info",
                 "message": f"All content will be copied to the folder: {to_folder_path}",
             }
         )
-        self.copy_thread = CopyThread(
-            absolute_path_files, to_folder_path, self.compress_after_copy
+        self.copy_thread = CopyThread.from_options(
+            absolute_path_files, to_folder_path, copy_options, self.report
         )
+        self.copy_thread.engine.report_path = self.report_path
         self.copy_thread.progress_changed.connect(self.progress_changed)
+        self.copy_thread.progress_stats.connect(self.progress_stats)
+        self.copy_thread.not_files_found.connect(self._not_files_found_emit)
         self.copy_thread.finished.connect(self.copy_finished)
         self.copy_thread.copy_canceled.connect(self._cancel_copy_emit)
         self.copy_thread.start()
@@ -74,8 +98,25 @@ class FileCopy(QObject):
         self.copy_thread.quit()
         self.copy_thread.wait()
         self.copy_thread = None
+        if self.created_folder:
+            # unfinished files are already gone, the folder goes too if nothing was copied
+            try:
+                os.rmdir(self.to_folder_path)
+            except OSError:
+                pass
         self.copy_canceled.emit()
 
+    def _not_files_found_emit(self):
+        self.copy_thread.wait()
+        self.copy_thread = None
+        if self.created_folder:
+            # the folder that was created is deleted, unless something was put in it
+            try:
+                os.rmdir(self.to_folder_path)
+            except OSError:
+                pass
+        self.not_files_found.emit()
+
     def _open_folder(self, folder_path):
         operating_system = platform.system()
         if operating_system == "Windows":
@@ -85,17 +126,6 @@ class FileCopy(QObject):
         else:
             print("Unsupported operating system.")
 
-    def _create_folder(self, source_folder_path: str):
-        folder_name = "folder_" + self._generate_unique_name()
-        folder_path = os.path.join(source_folder_path, folder_name)
-        os.makedirs(folder_path)
-        return folder_path
-
-    def _generate_unique_name(self, length=5):
-        characters = string.ascii_letters + string.digits
-        unique_name = "".join(random.choice(characters) for _ in range(length))
-        return unique_name
-
     def _find_files_to_copy(self, source_folder_path: str, to_folder_path: str) -> list:
         """
         finds and returns a list of absolute file paths in the source directory that should be copied.
@@ -103,26 +133,28 @@ class FileCopy(QObject):
         Returns:
             list: A list of absolute file paths that should be copied.
         """
-        files_to_copy = []
-        for root, _, files in os.walk(source_folder_path):
-            if root == to_folder_path:
-                # avoid the folder that was created
-                continue
-            for file in files:
-                if self._should_handle_file(file):
-                    abs_path = os.path.join(root, file)
-                    files_to_copy.append(abs_path)
-        return files_to_copy
+        return [
+            entry.path
+            for entry in self._iter_files_to_copy(source_folder_path, to_folder_path)
+        ]
+
+    def _iter_files_to_copy(self, source_folder_path: str, to_folder_path: str):
+        from .copy_engine import scan_files
+
+        return scan_files(
+            source_folder_path,
+            to_folder_path,
+            self._get_file_filter(),
+            self.scan_workers,
+            self.report,
+        )
 
     def _should_handle_file(self, filename: str):
-        file_extensions: tuple
-        match self.file_type:
-            case FileType.IMAGES:
-                file_extensions = image_extensions
-            case FileType.VIDEOS:
-                file_extensions = video_extensions
-            case FileType.IMAGES_VIDEOS:
-                file_extensions = image_extensions + video_extensions
-            case FileType.CUSTOM:
-                file_extensions = self.custom_file_types
-        return any(filename.lower().endswith(ext) for ext in file_extensions)
+        return self._get_file_filter().match_name(filename)
+
+    def _get_file_filter(self) -> FileFilter:
+        if self.file_filter is None:
+            self.file_filter = FileFilter(
+                file_extensions(self.file_type, self.custom_file_types)
+            )
+        return self.file_filter
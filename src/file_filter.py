@@ -0,0 +1,138 @@
+import fnmatch
+import re
+from .file_options import FileType, CopyOptions, image_extensions, video_extensions
+
+
+def file_extensions(file_type: FileType, custom_file_types) -> tuple:
+    match file_type:
+        case FileType.IMAGES:
+            return image_extensions
+        case FileType.VIDEOS:
+            return video_extensions
+        case FileType.IMAGES_VIDEOS:
+            return image_extensions + video_extensions
+        case FileType.CUSTOM:
+            return tuple(custom_file_types)
+
+
+class FileFilter:
+    """
+    Decides which files are copied and which folders are walked. It is built
+    once per run, so matching a file is a set lookup plus, only when patterns
+    are configured, a single precompiled regex. Names and patterns are compared
+    case-insensitively.
+    """
+
+    def __init__(
+        self,
+        extensions,
+        include_patterns=(),
+        exclude_patterns=(),
+        min_size: int = None,
+        max_size: int = None,
+        modified_after: float = None,
+        modified_before: float = None,
+        skip_folders=(),
+        same_filesystem: bool = False,
+    ):
+        extensions = [ext.lower() for ext in extensions]
+        # ".jpg" style extensions are looked up in a set, anything else
+        # (".tar.gz", "jpg") keeps the old suffix comparison
+        self.suffixes = frozenset(ext for ext in extensions if _is_simple_suffix(ext))
+        self.other_suffixes = tuple(ext for ext in extensions if not _is_simple_suffix(ext))
+        self.include = _compile_patterns(include_patterns)
+        self.exclude = _compile_patterns(exclude_patterns)
+        self.skip_folders = _compile_patterns(skip_folders)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_after = modified_after
+        self.modified_before = modified_before
+        self.same_filesystem = same_filesystem
+        self.checks_stat = any(
+            limit is not None
+            for limit in (min_size, max_size, modified_after, modified_before)
+        )
+
+    @classmethod
+    def from_copy_options(cls, copy_options: CopyOptions):
+        return cls(
+            file_extensions(copy_options.file_type, copy_options.custom_file_types),
+            include_patterns=copy_options.include_patterns,
+            exclude_patterns=copy_options.exclude_patterns,
+            min_size=copy_options.min_size,
+            max_size=copy_options.max_size,
+            modified_after=copy_options.modified_after,
+            modified_before=copy_options.modified_before,
+            skip_folders=copy_options.skip_folders,
+            same_filesystem=copy_options.same_filesystem,
+        )
+
+    def match_name(self, filename: str) -> bool:
+        name = filename.lower()
+        _, dot, suffix = name.rpartition(".")
+        if not (dot and "." + suffix in self.suffixes):
+            if not (self.other_suffixes and name.endswith(self.other_suffixes)):
+                return False
+        if self.include is not None and not self.include.match(name):
+            return False
+        if self.exclude is not None and self.exclude.match(name):
+            return False
+        return True
+
+    def match_stat(self, size: int, mtime: float) -> bool:
+        if not self.checks_stat:
+            return True
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        if self.modified_after is not None and mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and mtime > self.modified_before:
+            return False
+        return True
+
+    def fingerprint(self) -> str:
+        """Identifies the settings of the filter, filters with the same one accept the same files."""
+        import hashlib
+
+        settings = (
+            sorted(self.suffixes),
+            self.other_suffixes,
+            _pattern(self.include),
+            _pattern(self.exclude),
+            _pattern(self.skip_folders),
+            self.min_size,
+            self.max_size,
+            self.modified_after,
+            self.modified_before,
+            self.same_filesystem,
+        )
+        return hashlib.sha1(repr(settings).encode()).hexdigest()
+
+    def should_enter_folder(self, entry, root_device: int = None) -> bool:
+        """
+        entry is the os.DirEntry of the folder. root_device is the st_dev of the
+        walked source and is only needed when same_filesystem is set.
+        """
+        if self.skip_folders is not None and self.skip_folders.match(entry.name.lower()):
+            return False
+        if self.same_filesystem and root_device is not None:
+            return entry.stat(follow_symlinks=False).st_dev == root_device
+        return True
+
+
+def _is_simple_suffix(extension: str) -> bool:
+    return extension.startswith(".") and extension.count(".") == 1
+
+
+def _pattern(compiled):
+    return compiled.pattern if compiled is not None else None
+
+
+def _compile_patterns(patterns):
+    if not patterns:
+        return None
+    return re.compile(
+        "|".join(fnmatch.translate(pattern.lower()) for pattern in patterns)
+    )
@@ -1,4 +1,5 @@
 from enum import Enum
+import os
 
 
 class FileType(Enum):
@@ -8,6 +9,30 @@ class FileType(Enum):
     CUSTOM = "Custom"
 
 
+class OutputMode(Enum):
+    COPY = "Copy"
+    # link modes fall back to copying when a link can't be created
+    HARDLINK = "Hardlink"
+    SYMLINK = "Symlink"
+
+
+class OutputLayout(Enum):
+    FLAT = "flat"
+    # the folders of the source, relative to it
+    PRESERVE = "preserve"
+    # YYYY/MM folders by modification time
+    DATE = "date"
+    # a fixed number of folders picked by a hash of the file name
+    HASH = "hash"
+
+
+class ArchiveFormat(Enum):
+    ZIP = "zip"
+    TAR = "tar"
+    TAR_GZ = "tar.gz"
+    TAR_XZ = "tar.xz"
+
+
 video_extensions = (
     ".mp4",
     ".avi",
@@ -24,6 +49,13 @@ video_extensions = (
 )
 image_extensions = (".png", ".jpg", ".jpeg", ".gif", ".bmp")
 
+# copying is I/O bound, so a handful of workers keeps fast disks busy
+default_copy_workers = min(8, os.cpu_count() or 1)
+# listing folders is dominated by metadata latency rather than CPU
+default_scan_workers = 4
+# enough folders to keep each of them small without nesting deeper
+default_hash_buckets = 256
+
 
 class CopyOptions:
 
@@ -33,8 +65,85 @@ class CopyOptions:
         file_type: FileType = FileType.IMAGES,
         compress_after_copy: bool = False,
         custom_file_types: [str] = [],
+        workers: int = default_copy_workers,
+        scan_workers: int = default_scan_workers,
+        include_patterns: [str] = (),
+        exclude_patterns: [str] = (),
+        min_size: int = None,
+        max_size: int = None,
+        modified_after: float = None,
+        modified_before: float = None,
+        skip_folders: [str] = (),
+        same_filesystem: bool = False,
+        deduplicate: bool = False,
+        destination: str = None,
+        incremental: bool = False,
+        output_mode: OutputMode = OutputMode.COPY,
+        adaptive_compression: bool = True,
+        archive_format: ArchiveFormat = ArchiveFormat.ZIP,
+        report_path: str = None,
+        profile: bool = False,
+        trace_memory: bool = False,
+        extra_destinations: [str] = (),
+        extra_archive: str = None,
+        scan_cache: bool = False,
+        refresh_scan_cache: bool = False,
+        verify_algorithm: str = None,
+        verify_reread: bool = False,
+        layout: OutputLayout = OutputLayout.FLAT,
+        max_files_per_folder: int = None,
+        hash_buckets: int = default_hash_buckets,
     ):
         self.source = source
         self.file_type = file_type
         self.compress_after_copy = compress_after_copy
         self.custom_file_types = custom_file_types
+        self.workers = workers
+        self.scan_workers = scan_workers
+        # glob patterns matched against file names
+        self.include_patterns = include_patterns
+        self.exclude_patterns = exclude_patterns
+        # sizes in bytes, times as unix timestamps
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_after = modified_after
+        self.modified_before = modified_before
+        # glob patterns matched against folder names, e.g. "node_modules"
+        self.skip_folders = skip_folders
+        # don't walk into folders mounted from other filesystems
+        self.same_filesystem = same_filesystem
+        # copy only one file for every distinct content
+        self.deduplicate = deduplicate
+        # fixed folder to copy into, instead of a new folder inside the source
+        self.destination = destination
+        # skip files already copied into the destination by an earlier run
+        self.incremental = incremental
+        # how copied files are materialized, ignored when compressing
+        self.output_mode = output_mode
+        # store already compressed media instead of deflating it again
+        self.adaptive_compression = adaptive_compression
+        # format written when compress_after_copy is set
+        self.archive_format = archive_format
+        # where the JSON run report goes, the GUI picks a new file in the user's state folder
+        self.report_path = report_path
+        # cProfile and tracemalloc results in the run report, both slow the run down
+        self.profile = profile
+        self.trace_memory = trace_memory
+        # more folders that get the same files, every source is read once for all of them
+        self.extra_destinations = extra_destinations
+        # a folder that also gets an archive of the files, next to the copies
+        self.extra_archive = extra_archive
+        # reuse the listings of folders that haven't changed since an earlier scan
+        self.scan_cache = scan_cache
+        # list every folder again, replacing what the scan cache has for the source
+        self.refresh_scan_cache = refresh_scan_cache
+        # hashlib algorithm the copies are checksummed with, None to skip it
+        self.verify_algorithm = verify_algorithm
+        # read the copies back and compare, on a pool of their own
+        self.verify_reread = verify_reread
+        # how files are spread over folders inside the destination
+        self.layout = layout
+        # a full folder overflows into a sibling, None for the layout's default
+        self.max_files_per_folder = max_files_per_folder
+        # number of folders the hash layout uses
+        self.hash_buckets = hash_buckets
@@ -0,0 +1,65 @@
+import queue
+import threading
+
+
+class FileScanner:
+    """
+    Runs a file discovery iterator on a background thread and hands the results
+    over through a bounded queue, so copying can start while the scan goes on.
+    """
+
+    _done = object()
+
+    def __init__(self, files, max_queued: int = 10000):
+        self.files = files
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.discovered = 0
+        self.discovered_bytes = 0
+        self.finished_scanning = False
+        self.cancel = False
+        self.error = None
+        self._thread = threading.Thread(target=self._scan, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # both sides poll this flag while waiting on the queue
+        self.cancel = True
+
+    def __iter__(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.cancel:
+                    return
+                continue
+            if item is self._done:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
+
+    def _scan(self):
+        try:
+            for file in self.files:
+                self.discovered += 1
+                self.discovered_bytes += getattr(file, "size", 0)
+                if not self._put(file):
+                    return
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_scanning = True
+            self._put(self._done)
+
+    def _put(self, item):
+        while not self.cancel:
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -0,0 +1,85 @@
+from array import array
+import os
+from .file_walker import FileEntry
+
+
+class FileTable:
+    """
+    A list of files that takes a fraction of the memory of a list of paths.
+    Every folder is stored once, files keep the index of their folder and their
+    name, encoded into one shared buffer, and sizes and mtimes live in typed
+    arrays. Iterating or indexing it builds the FileEntry, and its path, only
+    for the file asked for.
+    """
+
+    __slots__ = (
+        "_folders",
+        "_folder_ids",
+        "_folder_indexes",
+        "_names",
+        "_name_ends",
+        "_sizes",
+        "_mtimes",
+    )
+
+    def __init__(self):
+        self._folders = []
+        self._folder_ids = {}
+        self._folder_indexes = array("I")
+        self._names = bytearray()
+        self._name_ends = array("Q")
+        self._sizes = array("q")
+        self._mtimes = array("d")
+
+    @classmethod
+    def from_files(cls, files):
+        """Builds a table from paths or FileEntry objects; paths are stat'ed."""
+        if isinstance(files, cls):
+            return files
+        table = cls()
+        for file in files:
+            table.append(FileEntry.from_path(file))
+        return table
+
+    def append(self, entry: FileEntry):
+        folder, name = os.path.split(entry.path)
+        folder_index = self._folder_ids.get(folder)
+        if folder_index is None:
+            folder_index = self._folder_ids[folder] = len(self._folders)
+            self._folders.append(folder)
+        self._folder_indexes.append(folder_index)
+        self._names += os.fsencode(name)
+        self._name_ends.append(len(self._names))
+        self._sizes.append(entry.size)
+        self._mtimes.append(entry.mtime)
+
+    def path(self, index: int) -> str:
+        start = self._name_ends[index - 1] if index > 0 else 0
+        name = os.fsdecode(bytes(self._names[start : self._name_ends[index]]))
+        return os.path.join(self._folders[self._folder_indexes[index]], name)
+
+    def total_size(self) -> int:
+        return sum(self._sizes)
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def __getitem__(self, index: int) -> FileEntry:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("file table index out of range")
+        return FileEntry(self.path(index), self._sizes[index], self._mtimes[index])
+
+    def __iter__(self):
+        folders, names, join = self._folders, self._names, os.path.join
+        start = 0
+        for folder_index, end, size, mtime in zip(
+            self._folder_indexes, self._name_ends, self._sizes, self._mtimes
+        ):
+            name = os.fsdecode(bytes(names[start:end]))
+            start = end
+            yield FileEntry(join(folders[folder_index], name), size, mtime)
+
+    def __repr__(self):
+        return f"FileTable({len(self)} files in {len(self._folders)} folders)"
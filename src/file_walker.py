@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import os
+import time
+from .file_filter import FileFilter
+
+
+class FileEntry:
+    """
+    A file found while walking, together with the stat data the walk already
+    paid for. It is path-like, so it can be handed straight to os/shutil calls.
+    """
+
+    __slots__ = ("path", "size", "mtime")
+
+    def __init__(self, path: str, size: int, mtime: float):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+
+    @classmethod
+    def from_path(cls, path):
+        if isinstance(path, cls):
+            return path
+        stat = os.stat(path)
+        return cls(os.fspath(path), stat.st_size, stat.st_mtime)
+
+    def __fspath__(self):
+        return self.path
+
+    def __repr__(self):
+        return f"FileEntry({self.path!r}, size={self.size}, mtime={self.mtime})"
+
+
+class CachedFileEntry(FileEntry):
+    """
+    A FileEntry listed from the scan cache. Its size and mtime are those of the
+    last listing of its folder, a file edited in place since then has others.
+    """
+
+    __slots__ = ()
+
+
+def walk_files(
+    source_folder_path: str,
+    file_filter: FileFilter,
+    exclude_folder: str | list = None,
+    workers: int = 4,
+    report=None,
+    scan_cache=None,
+):
+    """
+    Walks the source folder with os.scandir, listing independent subfolders in
+    parallel, and yields a FileEntry for every file accepted by file_filter.
+    Folders rejected by the filter are never listed. Folders that can't be listed
+    are skipped, like os.walk does. exclude_folder is a folder, or a list of
+    them, never entered. The order of the results is not deterministic.
+    A RunReport gets the time spent listing folders and stat'ing files. With a
+    ScanCache, folders that haven't changed since they were last listed are
+    only stat'ed, and what they contain comes from the cache.
+    """
+    exclude_folders = _normalized_folders(exclude_folder)
+    root_device = None
+    if file_filter.same_filesystem:
+        root_device = os.stat(source_folder_path).st_dev
+
+    def scan(folder_path):
+        if scan_cache is not None:
+            return _scan_folder_cached(
+                folder_path, file_filter, exclude_folders, root_device, report, scan_cache
+            )
+        return _scan_folder(folder_path, file_filter, exclude_folders, root_device, report)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        pending = {executor.submit(scan, source_folder_path)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, folders = future.result()
+                for folder in folders:
+                    pending.add(executor.submit(scan, folder))
+                yield from files
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _scan_folder(
+    folder_path, file_filter, exclude_folders, root_device, report=None, entered=None
+):
+    files = []
+    folders = []
+    entries = 0
+    stat_seconds = 0.0
+    start = time.perf_counter()
+    try:
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                entries += 1
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if file_filter.should_enter_folder(entry, root_device):
+                            if entered is not None:
+                                entered.append(entry.name)
+                            if not (exclude_folders and _normalize(entry.path) in exclude_folders):
+                                folders.append(entry.path)
+                    elif entry.is_file() and file_filter.match_name(entry.name):
+                        stat_start = time.perf_counter()
+                        stat = entry.stat()
+                        stat_seconds += time.perf_counter() - stat_start
+                        if file_filter.match_stat(stat.st_size, stat.st_mtime):
+                            files.append(FileEntry(entry.path, stat.st_size, stat.st_mtime))
+                except OSError:
+                    # the entry vanished or can't be stat'ed
+                    continue
+    except OSError:
+        if report is not None:
+            report.count("folders_unreadable")
+        if entered is not None:
+            raise
+    if report is not None:
+        report.add_time("scan.list", time.perf_counter() - start - stat_seconds)
+        report.add_time("scan.stat", stat_seconds)
+        report.count("folders_listed")
+        report.count("entries_seen", entries)
+        report.count("files_matched", len(files))
+    return files, folders
+
+
+def _scan_folder_cached(folder_path, file_filter, exclude_folders, root_device, report, scan_cache):
+    start = time.perf_counter()
+    try:
+        folder_stat = os.stat(folder_path)
+    except OSError:
+        if report is not None:
+            report.count("folders_unreadable")
+        return [], []
+    cached = scan_cache.lookup(folder_path, folder_stat)
+    if cached is None:
+        listed_at = time.time()
+        entered = []
+        try:
+            files, folders = _scan_folder(
+                folder_path, file_filter, exclude_folders, root_device, report, entered
+            )
+        except OSError:
+            return [], []
+        scan_cache.store(
+            folder_path,
+            folder_stat,
+            [(os.path.basename(entry.path), entry.size, entry.mtime) for entry in files],
+            entered,
+            listed_at,
+        )
+        return files, folders
+
+    cached_files, cached_folders = cached
+    files = [
+        CachedFileEntry(os.path.join(folder_path, name), size, mtime)
+        for name, size, mtime in cached_files
+    ]
+    folders = []
+    for name in cached_folders:
+        path = os.path.join(folder_path, name)
+        if not (exclude_folders and _normalize(path) in exclude_folders):
+            folders.append(path)
+    if report is not None:
+        report.add_time("scan.cache", time.perf_counter() - start)
+        report.count("folders_cached")
+        report.count("files_matched", len(files))
+    return files, folders
+
+
+def _normalize(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _normalized_folders(folders):
+    """The normalized paths of a folder, a list of them or None."""
+    if folders is None:
+        return frozenset()
+    if isinstance(folders, (str, os.PathLike)):
+        folders = [folders]
+    return frozenset(_normalize(folder) for folder in folders)
@@ -10,7 +10,9 @@ class MainController:
         self.file_model = file_model
         self.view.selectFolderButton.clicked.connect(self.start_copy)
         self.view.cancelPushButton.clicked.connect(self.cancel_copy)
+        self.view.pausePushButton.clicked.connect(self.toggle_pause)
         self.file_model.progress_changed.connect(self.view.update_progressBar_progress)
+        self.file_model.progress_stats.connect(self.view.update_progress_stats)
         self.file_model.not_files_found.connect(self.view.not_files)
         self.file_model.copy_finished.connect(self.view.copy_finished)
         self.file_model.copy_canceled.connect(self.view.copy_canceled)
@@ -33,6 +35,8 @@ class MainController:
                 file_type,
                 compress_after_copy,
                 self._convert_file_type_to_list(custom_file_types),
+                # the GUI has no size or date filters, the only ones stale cached stats could fool
+                scan_cache=True,
             )
             self.view.show_progressBar()
             self.view.selectButtonSetEnabled(False)
@@ -50,6 +54,18 @@ class MainController:
         except Exception as e:
             self.view.show_message("Error", str(e))
 
+    def toggle_pause(self):
+        try:
+            if not self.file_model.is_copying_files():
+                return
+            if self.file_model.is_paused():
+                self.file_model.resume_copy()
+            else:
+                self.file_model.pause_copy()
+            self.view.set_paused(self.file_model.is_paused())
+        except Exception as e:
+            self.view.show_message("Error", str(e))
+
     def show_message_view(self, dict):
         type_message = dict["type_message"]
         message = dict["message"]
@@ -1,19 +1,42 @@
 from PyQt6.QtWidgets import QMainWindow, QFileDialog, QMessageBox
-from PyQt6 import uic
 import os
-import sys
 from .file_options import FileType
 
+UI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.ui")
 
-class MainWindow(QMainWindow):
+
+def _compiled_ui():
+    """
+    Returns the Ui_MainWindow class written by compile_ui.py, or None when it
+    hasn't been compiled or main.ui was edited afterwards.
+    """
+    try:
+        from . import ui_main
+    except ImportError:
+        return None
+    try:
+        if os.path.getmtime(UI_PATH) > os.path.getmtime(ui_main.__file__):
+            return None
+    except OSError:
+        # frozen builds ship only the compiled module
+        pass
+    return ui_main.Ui_MainWindow
+
+
+_CompiledUi = _compiled_ui()
+
+
+class MainWindow(QMainWindow, _CompiledUi or object):
     def __init__(self):
         super().__init__()
-        # base_dir = os.path.dirname(os.path.abspath(__file__))
-        base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-        filename = "src/main.ui"
-        absolute_path = os.path.join(base_dir, filename)
-        uic.loadUi(absolute_path, self)
+        if _CompiledUi is not None:
+            self.setupUi(self)
+        else:
+            from PyQt6 import uic
+
+            uic.loadUi(UI_PATH, self)
         self.progressBar.hide()
+        self.progressLabel.hide()
         self.customLineEdit.hide()
         self._init_Combo_box()
         self.show()
@@ -43,25 +66,52 @@ class MainWindow(QMainWindow):
     def get_source_folder_path(self):
         return QFileDialog.getExistingDirectory(self, "Select Folder")
 
+    def set_paused(self, paused: bool):
+        self.pausePushButton.setText("Resume" if paused else "Pause")
+
     def update_progressBar_progress(self, progress):
         self.progressBar.setValue(progress)
 
+    def update_progress_stats(self, snapshot):
+        files = f"{snapshot.files_done} / {snapshot.files_total} files"
+        if snapshot.scanning:
+            files += " found so far"
+        speed = (
+            f"{snapshot.bytes_per_second / 1024 / 1024:.1f} MB/s, "
+            f"{snapshot.files_per_second:.0f} files/s"
+        )
+        text = f"{files} - {speed}"
+        failed = sum(destination[3] for destination in snapshot.destinations)
+        if failed:
+            text += f" - {failed} failed copies"
+        if snapshot.eta_seconds is not None and not snapshot.scanning:
+            minutes, seconds = divmod(int(snapshot.eta_seconds), 60)
+            text += f" - ETA {minutes}:{seconds:02d}"
+        self.progressLabel.setText(text)
+
     def show_progressBar(self):
         self.progressBar.setValue(0)
         self.progressBar.show()
+        self.progressLabel.clear()
+        self.progressLabel.show()
 
     def copy_finished(self):
         self.progressBar.setValue(0)
+        self.progressLabel.clear()
         self.selectFolderButton.setEnabled(True)
+        self.set_paused(False)
         self.show_message("Alert", "The files have finished copying")
 
     def copy_canceled(self):
         self.progressBar.setValue(0)
+        self.progressLabel.clear()
         self.selectFolderButton.setEnabled(True)
+        self.set_paused(False)
         self.show_message("Alert", "The process was canceled")
 
     def not_files(self):
         self.selectFolderButton.setEnabled(True)
+        self.set_paused(False)
         self.show_message("Alert", "No file found to copy")
 
     def show_message(self, type_message: str, message: str):
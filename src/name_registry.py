@@ -0,0 +1,57 @@
+import os
+import threading
+
+
+class NameRegistry:
+    """
+    Hands out unique file names inside one destination. Names already taken are
+    kept in memory, along with the last counter used for every name, so a
+    collision costs a couple of set lookups instead of probing the disk once per
+    candidate. Taken names are compared with os.path.normcase, so the registry
+    matches how the filesystem sees collisions on Windows.
+    """
+
+    def __init__(self, existing_names=()):
+        self._lock = threading.Lock()
+        self._taken = {os.path.normcase(name) for name in existing_names}
+        self._counters = {}
+
+    @classmethod
+    def from_folder(cls, folder_path: str):
+        """Seeds the registry with a single listing of the destination folder."""
+        return cls.from_folders([folder_path])
+
+    @classmethod
+    def from_folders(cls, folder_paths):
+        """Seeds the registry with several folders, for names that must be free in all of them."""
+        names = []
+        for folder_path in folder_paths:
+            try:
+                names.extend(os.listdir(folder_path))
+            except FileNotFoundError:
+                pass
+        return cls(names)
+
+    def reserve(self, filename: str) -> str:
+        """Returns filename, or filename with a _N suffix if it's already taken."""
+        key = os.path.normcase(filename)
+        with self._lock:
+            if key not in self._taken:
+                self._taken.add(key)
+                return filename
+
+            name, ext = os.path.splitext(filename)
+            counter = self._counters.get(key, 0) + 1
+            while os.path.normcase(f"{name}_{counter}{ext}") in self._taken:
+                counter += 1
+            self._counters[key] = counter
+
+            unique_filename = f"{name}_{counter}{ext}"
+            self._taken.add(os.path.normcase(unique_filename))
+            return unique_filename
+
+    def __contains__(self, filename: str):
+        return os.path.normcase(filename) in self._taken
+
+    def __len__(self):
+        return len(self._taken)
@@ -0,0 +1,217 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import nullcontext
+import os
+import time
+import zipfile
+import zlib
+from .compression_policy import Compression, CompressionPolicy, CompressionStats
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class ParallelZipWriter:
+    """
+    Writes a ZIP archive whose entries are deflated on a thread pool (zlib
+    releases the GIL while compressing). Every file is split in chunks that are
+    deflated independently and end with a sync flush, so the chunks of one entry
+    simply concatenate into a valid deflate stream, the way pigz does it. Many
+    small files and a single huge one both keep every worker busy. Sources are
+    read once, sequentially; entries are written in the order they were added,
+    with ZIP64 extensions when they are needed.
+
+    With a policy every entry gets its own compression (stored, fast or strong
+    deflate) picked from its name and first chunk; stats keeps the CPU time
+    spent against the bytes saved.
+
+    A RunReport gets the time spent reading sources, waiting for deflated
+    chunks and writing them.
+    """
+
+    def __init__(
+        self,
+        zip_path: str,
+        workers: int = 4,
+        compresslevel: int = zlib.Z_DEFAULT_COMPRESSION,
+        on_entry_written=None,
+        policy: CompressionPolicy = None,
+        on_bytes=None,
+        report=None,
+    ):
+        self.report = report
+        self.compression = Compression("deflate", zipfile.ZIP_DEFLATED, compresslevel)
+        self.policy = policy
+        self.stats = CompressionStats()
+        self.on_entry_written = on_entry_written
+        self.on_bytes = on_bytes
+        self._zip = zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._window = max(1, workers) * 4
+        # (entry, chunk, future deflating it, is last chunk), in archive order
+        self._pending = deque()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, file, arcname: str, size: int = None, mtime: float = None, fileobj=None):
+        """
+        Adds file to the archive as arcname. size and mtime can be passed when the
+        caller already has them, to save a stat, and fileobj when the caller has
+        already opened it. on_entry_written is called with file once its entry is
+        completely written, and on_bytes with the size of every chunk written.
+        """
+        if size is None or mtime is None:
+            stat = os.stat(file)
+            size, mtime = stat.st_size, stat.st_mtime
+        entry = _Entry(file, _zip_info(arcname, size, mtime))
+        read_seconds = 0.0
+
+        try:
+            with open(file, "rb") if fileobj is None else nullcontext(fileobj) as f:
+                start = time.perf_counter()
+                chunk = f.read(CHUNK_SIZE)
+                read_seconds += time.perf_counter() - start
+                self._choose_compression(entry, arcname, chunk)
+                while True:
+                    start = time.perf_counter()
+                    next_chunk = f.read(CHUNK_SIZE)
+                    read_seconds += time.perf_counter() - start
+                    is_last = not next_chunk
+                    future = self._compress(entry.compression, chunk, is_last)
+                    self._pending.append((entry, chunk, future, is_last))
+                    self._write_ready(self._window)
+                    if is_last:
+                        break
+                    chunk = next_chunk
+        except BaseException:
+            self._discard(entry)
+            raise
+        finally:
+            if self.report is not None:
+                self.report.add_time("archive.read", read_seconds)
+
+    def close(self):
+        try:
+            self._write_ready(0)
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._zip.close()
+
+    def abort(self):
+        """Stops writing, leaving out everything not written yet."""
+        self._pending.clear()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._zip.close()
+
+    def _choose_compression(self, entry, arcname, first_chunk):
+        if self.policy is None:
+            entry.compression = self.compression
+        else:
+            start = time.thread_time()
+            entry.compression = self.policy.choose(arcname, first_chunk)
+            # the probe is part of the price paid for compressing
+            self.stats.add(entry.compression, 0, 0, time.thread_time() - start)
+        entry.info.compress_type = entry.compression.compress_type
+        self.stats.file_added(entry.compression)
+
+    def _compress(self, compression, chunk, is_last) -> Future:
+        if compression.compress_type == zipfile.ZIP_STORED:
+            future = Future()
+            future.set_result((chunk, 0.0))
+            return future
+        return self._executor.submit(_deflate, chunk, is_last, compression.level)
+
+    def _write_ready(self, keep_pending):
+        wait_seconds = write_seconds = 0.0
+        while len(self._pending) > keep_pending:
+            entry, chunk, future, is_last = self._pending.popleft()
+            start = time.perf_counter()
+            compressed, cpu_seconds = future.result()
+            deflated = time.perf_counter()
+            wait_seconds += deflated - start
+            self.stats.add(entry.compression, len(chunk), len(compressed), cpu_seconds)
+            if entry.header_offset is None:
+                self._start_entry(entry)
+            self._zip.fp.write(compressed)
+            write_seconds += time.perf_counter() - deflated
+            entry.info.CRC = zlib.crc32(chunk, entry.info.CRC)
+            entry.info.file_size += len(chunk)
+            entry.info.compress_size += len(compressed)
+            if self.on_bytes is not None:
+                self.on_bytes(len(chunk))
+            if is_last:
+                self._finish_entry(entry)
+        if self.report is not None and (wait_seconds or write_seconds):
+            self.report.add_time("archive.wait_deflate", wait_seconds)
+            self.report.add_time("archive.write", write_seconds)
+
+    def _discard(self, entry):
+        self._pending = deque(item for item in self._pending if item[0] is not entry)
+        if entry.header_offset is not None:
+            self._zip.fp.seek(entry.header_offset)
+            self._zip.fp.truncate()
+
+    def _start_entry(self, entry):
+        fp = self._zip.fp
+        entry.header_offset = entry.info.header_offset = fp.tell()
+        # the header is rewritten with the real sizes once the data is written,
+        # so it has to keep its length
+        entry.zip64 = entry.expected_size * 1.05 > zipfile.ZIP64_LIMIT
+        fp.write(entry.info.FileHeader(entry.zip64))
+
+    def _finish_entry(self, entry):
+        info = entry.info
+        if not entry.zip64 and max(info.file_size, info.compress_size) > zipfile.ZIP64_LIMIT:
+            raise zipfile.LargeZipFile(f"{entry.file} grew too large while it was compressed")
+        fp = self._zip.fp
+        end = fp.tell()
+        fp.seek(entry.header_offset)
+        fp.write(info.FileHeader(entry.zip64))
+        fp.seek(end)
+
+        self._zip.filelist.append(info)
+        self._zip.NameToInfo[info.filename] = info
+        self._zip.start_dir = end
+        self._zip._didModify = True
+        if self.on_entry_written is not None:
+            self.on_entry_written(entry.file)
+
+
+class _Entry:
+    __slots__ = ("file", "info", "compression", "expected_size", "header_offset", "zip64")
+
+    def __init__(self, file, info):
+        self.file = file
+        self.info = info
+        self.compression = None
+        self.expected_size = info.file_size
+        self.header_offset = None
+        self.zip64 = False
+        info.file_size = 0
+
+
+def _zip_info(arcname, size, mtime):
+    # like ZipFile.write with strict_timestamps=False, zip can't store dates before 1980
+    date_time = time.localtime(mtime)[:6]
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)
+    elif date_time[0] > 2107:
+        date_time = (2107, 12, 31, 23, 59, 59)
+    info = zipfile.ZipInfo(arcname, date_time)
+    info.external_attr = 0o644 << 16
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.file_size = size
+    info.compress_size = 0
+    info.CRC = 0
+    return info
+
+
+def _deflate(chunk, is_last, compresslevel):
+    start = time.thread_time()
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+    flush_mode = zlib.Z_FINISH if is_last else zlib.Z_SYNC_FLUSH
+    compressed = compressor.compress(chunk) + compressor.flush(flush_mode)
+    return compressed, time.thread_time() - start
@@ -0,0 +1,101 @@
+import threading
+import time
+
+
+class ProgressSnapshot:
+    """
+    What the user sees of a run at one moment. eta_seconds is None while unknown.
+    destinations has a (folder, files_done, bytes_done, failed) tuple for every
+    destination of a fan-out copy, and is empty otherwise.
+    """
+
+    __slots__ = (
+        "percent",
+        "files_done",
+        "files_total",
+        "bytes_done",
+        "bytes_total",
+        "bytes_per_second",
+        "files_per_second",
+        "eta_seconds",
+        "scanning",
+        "destinations",
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+
+class ProgressTracker:
+    """
+    Aggregates progress from every thread of a run, weighted by bytes so a big
+    video counts for what it costs. snapshot() only returns something every
+    1 / max_updates_per_second seconds, which keeps the GUI event queue calm on
+    runs with many small files. totals is a callable returning the number of
+    files and bytes known so far, and whether they may still grow; destinations
+    one returning the per-destination progress of a fan-out copy.
+    """
+
+    def __init__(
+        self,
+        totals,
+        max_updates_per_second: float = 10,
+        clock=time.monotonic,
+        destinations=tuple,
+    ):
+        self.totals = totals
+        self.destinations = destinations
+        self.min_interval = 1 / max_updates_per_second
+        self.clock = clock
+        self.files_done = 0
+        self.bytes_done = 0
+        self._lock = threading.Lock()
+        self._start = clock()
+        self._last_update = None
+
+    def add_bytes(self, count: int):
+        with self._lock:
+            self.bytes_done += count
+
+    def file_done(self):
+        with self._lock:
+            self.files_done += 1
+
+    def snapshot(self, force: bool = False):
+        now = self.clock()
+        with self._lock:
+            if (
+                not force
+                and self._last_update is not None
+                and now - self._last_update < self.min_interval
+            ):
+                return None
+            self._last_update = now
+            files_done, bytes_done = self.files_done, self.bytes_done
+
+        files_total, bytes_total, scanning = self.totals()
+        files_total = max(files_total, files_done)
+        bytes_total = max(bytes_total, bytes_done)
+        elapsed = max(now - self._start, 1e-9)
+        bytes_per_second = bytes_done / elapsed
+        if bytes_total:
+            percent = int(bytes_done / bytes_total * 100)
+        else:
+            percent = int(files_done / files_total * 100) if files_total else 0
+        eta_seconds = None
+        if bytes_per_second > 0:
+            eta_seconds = (bytes_total - bytes_done) / bytes_per_second
+
+        return ProgressSnapshot(
+            percent=percent,
+            files_done=files_done,
+            files_total=files_total,
+            bytes_done=bytes_done,
+            bytes_total=bytes_total,
+            bytes_per_second=bytes_per_second,
+            files_per_second=files_done / elapsed,
+            eta_seconds=eta_seconds,
+            scanning=scanning,
+            destinations=self.destinations(),
+        )
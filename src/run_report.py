@@ -0,0 +1,195 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+
+APP_FOLDER = "recursive_files_copier"
+
+
+class RunReport:
+    """
+    Timings and counters of one run, written as JSON at the end. Phase times
+    are summed over all the threads doing that work, so with several workers
+    they can add up to more than the wall time; what matters is how they
+    compare. Phases nest by name: copy.userspace.read is part of
+    copy.userspace, and the archive.read, archive.write and archive.wait_deflate
+    times are spent inside archive.add and archive.close. The slowest files are
+    kept with the time spent on each of them.
+    """
+
+    def __init__(self, slowest_count: int = 10, clock=time.perf_counter):
+        self.slowest_count = slowest_count
+        self.clock = clock
+        self.phases = defaultdict(float)
+        self.counters = Counter()
+        self.status = None
+        self.started_at = datetime.now(timezone.utc)
+        self.profile = None
+        self._start = clock()
+        self._wall_seconds = None
+        self._slowest = []
+        self._lock = threading.Lock()
+
+    def add_time(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] += seconds
+
+    def count(self, counter: str, value: int = 1):
+        with self._lock:
+            self.counters[counter] += value
+
+    def file_done(self, file, size: int, seconds: float, phase: str):
+        """Records a file that took seconds to copy or archive, with phase as its method."""
+        item = (seconds, os.fspath(file), size, phase)
+        with self._lock:
+            self.phases[phase] += seconds
+            self.counters["files"] += 1
+            self.counters["bytes"] += size
+            if len(self._slowest) < self.slowest_count:
+                heapq.heappush(self._slowest, item)
+            elif item > self._slowest[0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def finish(self, status: str):
+        self.status = status
+        self._wall_seconds = self.clock() - self._start
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            wall_seconds = self._wall_seconds
+            if wall_seconds is None:
+                wall_seconds = self.clock() - self._start
+            report = {
+                "status": self.status,
+                "started_at": self.started_at.isoformat(),
+                "wall_seconds": wall_seconds,
+                "phases": dict(sorted(self.phases.items(), key=lambda item: -item[1])),
+                "counters": dict(self.counters),
+                "slowest_files": [
+                    {"path": path, "size": size, "seconds": seconds, "phase": phase}
+                    for seconds, path, size, phase in sorted(self._slowest, reverse=True)
+                ],
+                "pid": os.getpid(),
+                "python": sys.version.split()[0],
+            }
+        if wall_seconds > 0:
+            report["files_per_second"] = self.counters["files"] / wall_seconds
+            report["mb_per_second"] = self.counters["bytes"] / 1024 / 1024 / wall_seconds
+        if self.profile is not None:
+            report["profile"] = self.profile
+        return report
+
+    def write(self, path: str):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+
+def default_report_path() -> str:
+    """A new file in the user's state folder, one per run, named after when it started."""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(
+        os.path.expanduser("~"), ".local", "state"
+    )
+    name = f"report_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}.json"
+    return os.path.join(base, APP_FOLDER, "reports", name)
+
+
+class RunProfiler:
+    """
+    Optional profiling for a run. cprofile profiles every thread started while
+    it is running (the scan and worker pools are) and keeps the functions with
+    the most own time; trace_memory records the peak of Python allocations and
+    where the most memory was allocated. Both slow the run down noticeably.
+    Start it before the scan, so the scan threads are profiled too.
+    """
+
+    TOP_COUNT = 20
+
+    def __init__(self, cprofile: bool = False, trace_memory: bool = False):
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.running = False
+        self._profilers = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts profiling, unless it is already running."""
+        if self.running:
+            return
+        self.running = True
+        if self.cprofile:
+            self._profile_current_thread()
+            if sys.version_info < (3, 12):
+                # new threads run this hook once, and replace it with their own profiler
+                threading.setprofile(self._start_thread_profiler)
+        if self.trace_memory:
+            import tracemalloc
+
+            tracemalloc.start()
+
+    def stop(self, dump_path: str = None) -> dict:
+        """Stops profiling and returns the results; dump_path gets the raw cProfile stats."""
+        results = {}
+        self.running = False
+        if self.cprofile:
+            if sys.version_info < (3, 12):
+                threading.setprofile(None)
+            results["functions"] = self._cprofile_results(dump_path)
+        if self.trace_memory:
+            import tracemalloc
+
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results["peak_traced_mb"] = peak / 1024 / 1024
+            results["allocations"] = [
+                {"line": str(stat.traceback), "mb": stat.size / 1024 / 1024, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[: self.TOP_COUNT]
+            ]
+        return results
+
+    def _profile_current_thread(self):
+        # from 3.12 on a profiler uses sys.monitoring and sees every thread,
+        # only one can be enabled at a time
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiling tool is active in this thread
+            return
+        with self._lock:
+            self._profilers.append(profiler)
+
+    def _start_thread_profiler(self, frame, event, arg):
+        sys.setprofile(None)
+        self._profile_current_thread()
+
+    def _cprofile_results(self, dump_path):
+        import pstats
+
+        if not self._profilers:
+            return []
+        self._profilers[0].disable()
+        stats = pstats.Stats(*self._profilers)
+        if dump_path is not None:
+            stats.dump_stats(dump_path)
+        functions = sorted(stats.stats.items(), key=lambda item: -item[1][2])
+        return [
+            {
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "own_seconds": own_seconds,
+                "cumulative_seconds": cumulative_seconds,
+            }
+            for (filename, line, name), (_, calls, own_seconds, cumulative_seconds, _) in functions[
+                : self.TOP_COUNT
+            ]
+        ]
@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from .run_report import APP_FOLDER
+
+
+class ScanCache:
+    """
+    SQLite record of what a walk found in every folder, so walking a tree again
+    only stats its folders: a folder whose mtime, inode and device haven't
+    changed since it was listed gets its files and subfolders from the cache
+    instead of from os.scandir. Entries are kept per filter fingerprint, since
+    another filter accepts other files.
+
+    Adding, removing or renaming an entry changes its folder's mtime, editing a
+    file in place doesn't, so a file rewritten with the same name keeps its old
+    size and mtime until invalidate() is called for it or its folder changes.
+    Its entries are CachedFileEntry objects, so callers that can't live with
+    that, like incremental copies, know to stat them again.
+    Only the max_folders most recently used folders are kept.
+    """
+
+    FILENAME = "scan_cache.sqlite3"
+    MAX_FOLDERS = 500_000
+    COMMIT_EVERY = 1000
+    # a folder changed this recently can change again without its mtime moving
+    RACY_SECONDS = 2.0
+
+    def __init__(self, cache_path: str, fingerprint: str = "", max_folders: int = MAX_FOLDERS):
+        self.fingerprint = fingerprint
+        self.max_folders = max_folders
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._used = []
+        self._uncommitted = 0
+        self._now = int(time.time())
+        folder = os.path.dirname(cache_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS folders (
+                path TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                device INTEGER NOT NULL,
+                files TEXT NOT NULL,
+                folders TEXT NOT NULL,
+                used INTEGER NOT NULL,
+                PRIMARY KEY (path, fingerprint)
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS folders_used ON folders (used)")
+        self._connection.commit()
+
+    @classmethod
+    def open_default(cls, file_filter=None):
+        fingerprint = file_filter.fingerprint() if file_filter is not None else ""
+        return cls(default_cache_path(), fingerprint)
+
+    def lookup(self, folder_path: str, stat: os.stat_result):
+        """
+        The (files, folders) stored for the folder, if it is unchanged since:
+        files as (name, size, mtime) and folders as names. None otherwise.
+        """
+        path = os.path.abspath(folder_path)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT mtime_ns, inode, device, files, folders FROM folders "
+                "WHERE path = ? AND fingerprint = ?",
+                (path, self.fingerprint),
+            ).fetchone()
+            if row is None or row[:3] != (stat.st_mtime_ns, stat.st_ino, stat.st_dev):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._used.append(path)
+        return json.loads(row[3]), json.loads(row[4])
+
+    def store(self, folder_path: str, stat: os.stat_result, files, folders, listed_at: float):
+        """
+        Stores what listing the folder found; stat was taken before listing it,
+        at listed_at (time.time()). Folders modified just before are left out.
+        """
+        if listed_at - stat.st_mtime < self.RACY_SECONDS:
+            return
+        row = (
+            os.path.abspath(folder_path),
+            self.fingerprint,
+            stat.st_mtime_ns,
+            stat.st_ino,
+            stat.st_dev,
+            json.dumps(files, separators=(",", ":")),
+            json.dumps(folders, separators=(",", ":")),
+            self._now,
+        )
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= self.COMMIT_EVERY:
+                self._connection.commit()
+                self._uncommitted = 0
+
+    def invalidate(self, folder_path: str = None):
+        """Forgets the folder and everything below it, or the whole cache."""
+        with self._lock:
+            if folder_path is None:
+                self._connection.execute("DELETE FROM folders")
+            else:
+                path = os.path.abspath(folder_path)
+                # every path below it sorts between "path/" and "path0"
+                below = path.rstrip(os.sep) + os.sep
+                self._connection.execute(
+                    "DELETE FROM folders WHERE path = ? OR (path >= ? AND path < ?)",
+                    (path, below, below[:-1] + chr(ord(os.sep) + 1)),
+                )
+            self._connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM folders").fetchone()[0]
+
+    def close(self):
+        """Saves which folders were used and evicts the least recently used ones."""
+        with self._lock:
+            self._connection.executemany(
+                "UPDATE folders SET used = ? WHERE path = ? AND fingerprint = ?",
+                ((self._now, path, self.fingerprint) for path in self._used),
+            )
+            self._used = []
+            count = self._connection.execute("SELECT COUNT(*) FROM folders").fetchone()[0]
+            if count > self.max_folders:
+                self._connection.execute(
+                    "DELETE FROM folders WHERE rowid IN "
+                    "(SELECT rowid FROM folders ORDER BY used LIMIT ?)",
+                    (count - self.max_folders,),
+                )
+            self._connection.commit()
+            self._connection.close()
+
+
+def default_cache_path() -> str:
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, APP_FOLDER, ScanCache.FILENAME)
@@ -0,0 +1,226 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import re
+import tarfile
+import threading
+import time
+import zipfile
+from .copy_backends import _buffer, _fadvise
+from .copy_control import part_path
+from .name_registry import NameRegistry
+
+DEFAULT_ALGORITHM = "sha256"
+REREAD_WORKERS = 2
+REREAD_BLOCK_SIZE = 1024 * 1024
+_MANIFEST_LINE = re.compile(r"\\?[0-9a-f]+  (.+)\n")
+
+
+def check_algorithm(name: str) -> str:
+    """Returns the hashlib name of the algorithm, raising ValueError if it can't be used."""
+    algorithm = name.lower().replace("-", "")
+    # shake digests need a length, sha256sum style manifests can't say which
+    if algorithm not in hashlib.algorithms_available or algorithm.startswith("shake_"):
+        raise ValueError(f"Unsupported checksum algorithm: {name}")
+    return algorithm
+
+
+class HashingReader:
+    """A readable file that feeds everything read from it to a hashlib object."""
+
+    __slots__ = ("file", "hasher")
+
+    def __init__(self, file, hasher):
+        self.file = file
+        self.hasher = hasher
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.hasher.update(data)
+        return data
+
+
+class Verifier:
+    """
+    Checksums of the files written by a run. The copy and archive loops hash
+    every block as it goes through them, so the sources are read only once;
+    file_written() records the result. With reread the written files are read
+    back and hashed again on a pool of their own, after flushing them out of
+    the page cache, so copying isn't held up. write_manifests() writes a
+    sha256sum-compatible file (SHA256SUMS, MD5SUMS...) into every folder that
+    got files; `sha256sum -c SHA256SUMS` checks it. A manifest left there by an
+    earlier run is updated, so it keeps covering the whole folder.
+    """
+
+    def __init__(
+        self,
+        algorithm: str = DEFAULT_ALGORITHM,
+        reread: bool = False,
+        workers: int = REREAD_WORKERS,
+        report=None,
+    ):
+        self.algorithm = check_algorithm(algorithm)
+        self.report = report
+        self.verified = 0
+        # (path, expected, actual) for every copy that read back different
+        self.mismatches = []
+        self._entries = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers)) if reread else None
+        self._futures = []
+
+    @property
+    def manifest_name(self) -> str:
+        return self.algorithm.upper() + "SUMS"
+
+    def new_hash(self):
+        return hashlib.new(self.algorithm)
+
+    def file_written(self, name: str, hexdigest: str, folders, archived: bool = False):
+        """
+        Records name, written into every one of folders with the given digest,
+        or into the archive inside them when archived.
+        """
+        folders = tuple(folders)
+        with self._lock:
+            self._entries.append((name, hexdigest, folders))
+            if self._executor is not None and not archived:
+                for folder in folders:
+                    path = os.path.join(folder, name)
+                    self._futures.append(self._executor.submit(self._check_file, path, hexdigest))
+
+    def archive_written(self, archive_path: str, hexdigests: dict):
+        """Reads the archive back when rereading, hexdigests maps entry names to digests."""
+        if self._executor is not None:
+            with self._lock:
+                self._futures.append(
+                    self._executor.submit(self._check_archive, archive_path, hexdigests)
+                )
+
+    def close(self):
+        """Waits for the files being read back."""
+        if self._executor is None:
+            return
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        if self.report is not None:
+            self.report.count("files_verified", self.verified)
+            self.report.count("checksum_mismatches", len(self.mismatches))
+
+    def abort(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def write_manifests(self) -> list:
+        """Writes a manifest into every folder that got files and returns their paths."""
+        by_folder = {}
+        for name, hexdigest, folders in self._entries:
+            for folder in folders:
+                by_folder.setdefault(folder, []).append(_manifest_line(name, hexdigest))
+        paths = []
+        for folder, lines in by_folder.items():
+            entries = {_manifest_name(line): line for line in lines}
+            path = os.path.join(folder, self.manifest_name)
+            earlier = _read_manifest(path)
+            if earlier is None or self.manifest_name in entries:
+                # the name belongs to a file that isn't a manifest
+                name = NameRegistry.from_folder(folder).reserve(self.manifest_name)
+                path = os.path.join(folder, name)
+                earlier = {}
+            earlier.update(entries)
+            with open(part_path(path), "w", encoding="utf-8", newline="\n") as manifest:
+                manifest.writelines(earlier[name] for name in sorted(earlier))
+            os.replace(part_path(path), path)
+            paths.append(path)
+        return paths
+
+    def _check_file(self, path, expected):
+        start = time.perf_counter()
+        hasher = self.new_hash()
+        buffer = _buffer(REREAD_BLOCK_SIZE)
+        view = memoryview(buffer)
+        try:
+            with open(path, "rb", buffering=0) as file:
+                # read the disk, not what the copy left in the page cache
+                _flush(file.fileno())
+                _fadvise(file.fileno(), 0, 0, "POSIX_FADV_DONTNEED")
+                while read := file.readinto(buffer):
+                    hasher.update(view[:read])
+            actual = hasher.hexdigest()
+        except OSError as e:
+            actual = f"unreadable: {e}"
+        self._checked(path, expected, actual, time.perf_counter() - start)
+
+    def _check_archive(self, archive_path, hexdigests):
+        start = time.perf_counter()
+        found = {}
+        try:
+            if zipfile.is_zipfile(archive_path):
+                with zipfile.ZipFile(archive_path) as archive:
+                    for info in archive.infolist():
+                        with archive.open(info) as file:
+                            found[info.filename] = _hash_file(file, self.new_hash())
+            else:
+                with tarfile.open(archive_path, "r:*") as archive:
+                    for member in archive:
+                        if member.isfile():
+                            file = archive.extractfile(member)
+                            found[member.name] = _hash_file(file, self.new_hash())
+        except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+            found = {name: f"unreadable: {e}" for name in hexdigests}
+        seconds = time.perf_counter() - start
+        for name, expected in hexdigests.items():
+            self._checked(f"{archive_path}:{name}", expected, found.get(name, "missing"), 0.0)
+        if self.report is not None:
+            self.report.add_time("verify.reread", seconds)
+
+    def _checked(self, path, expected, actual, seconds):
+        with self._lock:
+            self.verified += 1
+            if actual != expected:
+                self.mismatches.append((path, expected, actual))
+        if self.report is not None and seconds:
+            self.report.add_time("verify.reread", seconds)
+
+
+def _flush(fd):
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Windows can't flush a file opened for reading
+        pass
+
+
+def _hash_file(file, hasher):
+    while block := file.read(REREAD_BLOCK_SIZE):
+        hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _read_manifest(path):
+    """The lines of the manifest at path by name, {} if there is none, None if it isn't one."""
+    try:
+        with open(path, encoding="utf-8", newline="\n") as manifest:
+            lines = manifest.readlines()
+    except FileNotFoundError:
+        return {}
+    except (OSError, UnicodeDecodeError):
+        return None
+    if not all(_MANIFEST_LINE.fullmatch(line) for line in lines):
+        return None
+    return {_manifest_name(line): line for line in lines}
+
+
+def _manifest_name(line):
+    return line.split("  ", 1)[1].rstrip("\n")
+
+
+def _manifest_line(name, hexdigest):
+    # GNU coreutils escapes these and marks the line with a leading backslash
+    if "\\" in name or "\n" in name:
+        name = name.replace("\\", "\\\\").replace("\n", "\\n")
+        return f"\\{hexdigest}  {name}\n"
+    return f"{hexdigest}  {name}\n"
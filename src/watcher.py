@@ -0,0 +1,427 @@
+from abc import ABC, abstractmethod
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from .copy_engine import CopyEngine, output_folders, start_scan
+from .copy_journal import CopyJournal
+from .destination_layout import DestinationLayout
+from .file_filter import FileFilter
+from .file_options import CopyOptions
+from .file_table import FileTable
+from .file_walker import FileEntry, _normalize, _normalized_folders, walk_files
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+# files are handed over once nothing has written to them for this long
+DEFAULT_SETTLE_SECONDS = 2.0
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+class Watcher(ABC):
+    """
+    Watches a source folder for new files accepted by file_filter. batches()
+    yields lists of FileEntry for files that were closed after writing, or moved
+    in, and haven't changed for settle_seconds since, so a file still being
+    written by a camera or a slow network copy isn't picked up half done. It
+    runs until stop() is called, from any thread.
+    """
+
+    def __init__(
+        self,
+        source_folder_path: str,
+        file_filter: FileFilter,
+        exclude_folder: str | list = None,
+        settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+    ):
+        self.source = source_folder_path
+        self.file_filter = file_filter
+        self.exclude_folder = exclude_folder
+        self.settle_seconds = settle_seconds
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Starts watching; files that arrive from now on are reported."""
+        return self
+
+    @abstractmethod
+    def batches(self):
+        """Yields lists of FileEntry for the files that arrived, until stop()."""
+
+    def stop(self):
+        self._stopped.set()
+
+    def _accepts(self, path: str):
+        if not self.file_filter.match_name(os.path.basename(path)):
+            return None
+        try:
+            entry = FileEntry.from_path(path)
+        except OSError:
+            # gone again
+            return None
+        if not self.file_filter.match_stat(entry.size, entry.mtime):
+            return None
+        return entry
+
+
+class InotifyWatcher(Watcher):
+    """
+    Linux watcher on inotify, through ctypes. Every folder of the tree has a
+    watch, folders created later get one as they appear. While nothing happens
+    the thread sleeps in select(), so an idle watch costs no CPU. If the kernel
+    queue overflows the whole tree is scanned again, which only finds files the
+    copy journal doesn't know yet.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._libc = _load_libc()
+        self._fd = None
+        self._folders = {}
+        # path -> monotonic time after which it is considered complete
+        self._pending = {}
+        self._wake_read, self._wake_write = os.pipe()
+        self._root_device = None
+        self._excluded = _normalized_folders(self.exclude_folder)
+        # stop() closes the descriptors itself unless batches() is running
+        self._iterating = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith("linux") and _load_libc() is not None
+
+    def start(self):
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        if self.file_filter.same_filesystem:
+            self._root_device = os.stat(self.source).st_dev
+        self._add_tree(self.source, report_files=False)
+        return self
+
+    def stop(self):
+        super().stop()
+        with self._lock:
+            if not self._iterating:
+                self._close()
+                return
+            os.write(self._wake_write, b"x")
+
+    def batches(self):
+        with self._lock:
+            self._iterating = True
+        try:
+            while not self._stopped.is_set():
+                timeout = None
+                if self._pending:
+                    timeout = max(0.0, min(self._pending.values()) - time.monotonic())
+                readable, _, _ = select.select([self._fd, self._wake_read], [], [], timeout)
+                if self._fd in readable:
+                    self._read_events()
+                due = self._take_due()
+                if due:
+                    yield due
+        finally:
+            with self._lock:
+                self._iterating = False
+                self._close()
+
+    def _read_events(self):
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                self._handle_event(wd, mask, os.fsdecode(name))
+
+    def _handle_event(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            self._rescan()
+            return
+        folder = self._folders.get(wd)
+        if folder is None:
+            return
+        if mask & IN_IGNORED:
+            # the folder was deleted or moved away
+            del self._folders[wd]
+            return
+        path = os.path.join(folder, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_folder(path)
+            return
+        if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+            if self.file_filter.match_name(name):
+                self._pending[path] = time.monotonic() + self.settle_seconds
+        elif mask & IN_MODIFY:
+            # still being written, wait for it to settle again
+            if path in self._pending:
+                self._pending[path] = time.monotonic() + self.settle_seconds
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self._pending.pop(path, None)
+
+    def _take_due(self):
+        now = time.monotonic()
+        due = [path for path, deadline in self._pending.items() if deadline <= now]
+        entries = []
+        for path in due:
+            del self._pending[path]
+            entry = self._accepts(path)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def _add_folder(self, path):
+        entry = _FolderEntry(path)
+        if _normalize(path) in self._excluded:
+            return
+        if not self.file_filter.should_enter_folder(entry, self._root_device):
+            return
+        # files may have landed before the watch existed
+        self._add_tree(path, report_files=True)
+
+    def _add_tree(self, root, report_files):
+        folders = [root]
+        while folders:
+            folder = folders.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                # vanished or not readable, like walk_files skips it
+                continue
+            self._folders[wd] = folder
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if _normalize(entry.path) in self._excluded:
+                                continue
+                            if self.file_filter.should_enter_folder(entry, self._root_device):
+                                folders.append(entry.path)
+                        elif report_files and self.file_filter.match_name(entry.name):
+                            self._pending[entry.path] = time.monotonic() + self.settle_seconds
+            except OSError:
+                continue
+
+    def _rescan(self):
+        for entry in walk_files(self.source, self.file_filter, self.exclude_folder):
+            self._pending.setdefault(entry.path, time.monotonic() + self.settle_seconds)
+
+    def _close(self):
+        fds = (self._fd, self._wake_read, self._wake_write)
+        self._fd = self._wake_read = self._wake_write = None
+        for fd in fds:
+            if fd is not None:
+                os.close(fd)
+
+
+class PollingWatcher(Watcher):
+    """
+    Fallback for systems without inotify: the tree is walked every
+    poll_interval seconds, and a new or changed file is handed over once two
+    walks at least settle_seconds apart saw the same size and modification time.
+    """
+
+    def __init__(self, *args, poll_interval: float = DEFAULT_POLL_INTERVAL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.poll_interval = max(poll_interval, 0.01)
+        self._seen = {}
+        self._candidates = {}
+
+    def start(self):
+        # what's already there is left to the initial copy
+        self._seen = {entry.path: _signature(entry) for entry in self._walk()}
+        return self
+
+    def batches(self):
+        while not self._stopped.wait(self.poll_interval):
+            due = self._poll()
+            if due:
+                yield due
+
+    def _walk(self):
+        return walk_files(self.source, self.file_filter, self.exclude_folder)
+
+    def _poll(self):
+        now = time.monotonic()
+        due = []
+        candidates = {}
+        for entry in self._walk():
+            signature = _signature(entry)
+            if self._seen.get(entry.path) == signature:
+                continue
+            first_seen = self._candidates.get(entry.path)
+            if first_seen is not None and first_seen[0] == signature:
+                if now - first_seen[1] >= self.settle_seconds:
+                    self._seen[entry.path] = signature
+                    due.append(entry)
+                    continue
+                candidates[entry.path] = first_seen
+            else:
+                candidates[entry.path] = (signature, now)
+        self._candidates = candidates
+        return due
+
+
+class WatchCopy:
+    """
+    Watch mode: an incremental copy of the whole source, then every batch of
+    files the watcher reports is copied as it arrives, until stop(). The copy
+    journal makes sure a file is only copied again when it changed. on_batch is
+    called with the engine of every copy once it has run. The journal and the
+    names taken in the destination are loaded once and shared by every batch,
+    so a new file costs the same however much was copied before it.
+    """
+
+    def __init__(
+        self,
+        copy_options: CopyOptions,
+        to_folder_path: str,
+        on_progress=None,
+        on_batch=None,
+        watcher: Watcher = None,
+        settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        if copy_options.compress_after_copy or copy_options.extra_archive:
+            raise ValueError("Watch mode copies files, it can't keep an archive up to date")
+        if not copy_options.incremental:
+            raise ValueError("Watch mode needs an incremental copy into a fixed destination")
+        self.copy_options = copy_options
+        self.to = to_folder_path
+        self.on_progress = on_progress
+        self.on_batch = on_batch
+        if watcher is None:
+            watcher = open_watcher(
+                copy_options.source,
+                FileFilter.from_copy_options(copy_options),
+                output_folders(copy_options, to_folder_path),
+                settle_seconds,
+                poll_interval,
+            )
+        self.watcher = watcher
+        self.files_done = 0
+        self._engine = None
+        self._journal = None
+        self._layout = None
+        self._stopped = False
+
+    def run(self):
+        options = self.copy_options
+        self._journal = CopyJournal.for_folder(self.to)
+        self._layout = DestinationLayout(
+            options.layout, options.source, options.max_files_per_folder, options.hash_buckets
+        )
+        self._layout.folders = output_folders(options, self.to)
+        self._layout.claim_all(self._journal)
+        try:
+            # watching starts first, so nothing arriving during the initial copy is missed
+            self.watcher.start()
+            self._copy(start_scan(options, self.to))
+            for batch in self.watcher.batches():
+                if self._stopped:
+                    break
+                # the batch is stat'ed already, the table only packs it
+                self._copy(FileTable.from_files(batch))
+        finally:
+            self._journal.close()
+
+    def stop(self):
+        self._stopped = True
+        self.watcher.stop()
+        engine = self._engine
+        if engine is not None:
+            engine.cancel_copy()
+
+    def _copy(self, files):
+        if self._stopped:
+            return
+        self._engine = CopyEngine(
+            files,
+            self.to,
+            self.copy_options,
+            on_progress=self.on_progress,
+            journal=self._journal,
+            destination_layout=self._layout,
+        )
+        status = self._engine.run()
+        self.files_done += self._engine.files_done
+        if self.on_batch is not None:
+            self.on_batch(self._engine, status)
+
+
+def open_watcher(
+    source_folder_path: str,
+    file_filter: FileFilter,
+    exclude_folder: str | list = None,
+    settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> Watcher:
+    """An inotify watcher where it is available, a polling one everywhere else."""
+    if InotifyWatcher.available():
+        return InotifyWatcher(source_folder_path, file_filter, exclude_folder, settle_seconds)
+    return PollingWatcher(
+        source_folder_path,
+        file_filter,
+        exclude_folder,
+        settle_seconds,
+        poll_interval=poll_interval,
+    )
+
+
+class _FolderEntry:
+    """The bits of os.DirEntry FileFilter.should_enter_folder looks at."""
+
+    __slots__ = ("path", "name")
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+
+    def stat(self, follow_symlinks=True):
+        return os.stat(self.path, follow_symlinks=follow_symlinks)
+
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1
+        except (OSError, AttributeError):
+            return None
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc = libc
+    return _libc
+
+
+def _signature(entry):
+    return entry.size, entry.mtime
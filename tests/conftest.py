@@ -0,0 +1,51 @@
+import os
+import pytest
+
+SOURCE_FILES = {
+    "a.jpg": b"a" * 1000,
+    "nested/b.png": b"b" * 2000,
+    "notes.txt": b"text",
+}
+
+
+@pytest.fixture
+def make_source(tmp_path):
+    """Writes a source folder holding files, a dict of relative paths and contents."""
+
+    def make(files):
+        folder = tmp_path / "source"
+        folder.mkdir(exist_ok=True)
+        for name, content in files.items():
+            path = folder / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+        return folder
+
+    return make
+
+
+@pytest.fixture
+def source(make_source):
+    return make_source(SOURCE_FILES)
+
+
+@pytest.fixture
+def video(tmp_path):
+    # a few odd-sized chunks of the kernel and fan-out copy loops
+    path = tmp_path / "video.mp4"
+    path.write_bytes(os.urandom(9 * 1024 * 1024 + 5))
+    return str(path)
+
+
+def files_of(folder, pattern="*"):
+    return sorted(str(path) for path in folder.rglob(pattern) if path.is_file())
+
+
+def copied_files(folder):
+    """Every file below folder, relative and with / separators, without hidden ones."""
+    return sorted(
+        os.path.relpath(os.path.join(root, name), folder).replace(os.sep, "/")
+        for root, _, names in os.walk(folder)
+        for name in names
+        if not name.startswith(".")
+    )
@@ -0,0 +1,88 @@
+import os
+import tarfile
+import zipfile
+import pytest
+from src.archive_backends import ArchiveBackend, open_archive
+from src.copy_engine import CopyEngine
+from src.file_options import ArchiveFormat, CopyOptions
+from src.file_walker import FileEntry
+
+
+@pytest.fixture
+def files(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    contents = {"a.jpg": os.urandom(3000), "b.txt": b"text " * 1000, "empty.txt": b""}
+    paths = {}
+    for name, content in contents.items():
+        path = source / name
+        path.write_bytes(content)
+        paths[name] = (str(path), content)
+    return paths
+
+
+def add_all(archive, files):
+    for name, (path, content) in files.items():
+        archive.add(path, name, len(content), os.path.getmtime(path))
+
+
+@pytest.mark.parametrize(
+    "archive_format", [ArchiveFormat.TAR, ArchiveFormat.TAR_GZ, ArchiveFormat.TAR_XZ]
+)
+def test_tar_archives(files, tmp_path, archive_format):
+    written = []
+
+    with open_archive(archive_format, str(tmp_path), on_entry_written=written.append) as archive:
+        add_all(archive, files)
+
+    assert archive.archive_path == os.path.join(str(tmp_path), f"compressed_files.{archive_format.value}")
+    assert written == [path for path, _ in files.values()]
+    with tarfile.open(archive.archive_path) as tar:
+        assert tar.getnames() == list(files)
+        for name, (_, content) in files.items():
+            assert tar.extractfile(name).read() == content
+
+
+def test_zip_archive(files, tmp_path):
+    with open_archive(ArchiveFormat.ZIP, str(tmp_path), workers=2) as archive:
+        add_all(archive, files)
+
+    assert archive.stats is not None
+    with zipfile.ZipFile(os.path.join(str(tmp_path), "compressed_files.zip")) as zipf:
+        assert zipf.testzip() is None
+        for name, (_, content) in files.items():
+            assert zipf.read(name) == content
+
+
+@pytest.mark.parametrize("also_copy", [False, True])
+def test_tar_entries_have_the_size_of_the_file_when_archived(tmp_path, also_copy):
+    path = tmp_path / "growing.log"
+    path.write_bytes(b"x" * 1000)
+    scanned = FileEntry.from_path(path)
+    path.write_bytes(b"y" * 6000)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    extra = [str(tmp_path / "copies")] if also_copy else []
+
+    engine = CopyEngine(
+        [scanned],
+        str(destination),
+        CopyOptions(
+            str(tmp_path),
+            compress_after_copy=True,
+            archive_format=ArchiveFormat.TAR,
+            extra_destinations=extra,
+            verify_algorithm="sha256",
+            verify_reread=True,
+        ),
+    )
+
+    assert engine.run() == CopyEngine.FINISHED
+    assert engine.verifier.mismatches == []
+    with tarfile.open(destination / "compressed_files.tar") as tar:
+        assert tar.extractfile("growing.log").read() == b"y" * 6000
+
+
+def test_archive_backend_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        ArchiveBackend(str(tmp_path / "archive"))
@@ -0,0 +1,35 @@
+import os
+import zipfile
+from src.compression_policy import CompressionPolicy, CompressionStats, STORE, FAST, STRONG
+
+
+def test_compressed_media_is_stored():
+    policy = CompressionPolicy()
+
+    assert policy.choose("photo.JPG", b"a" * 1000) is STORE
+    assert policy.choose("movie.mkv", b"a" * 1000) is STORE
+
+
+def test_probe_decides_for_other_files():
+    policy = CompressionPolicy()
+
+    assert policy.choose("random.bin", os.urandom(64 * 1024)) is STORE
+    assert policy.choose("log.txt", b"the same line again\n" * 5000) is STRONG
+    half_random = bytes(b & 0x0F for b in os.urandom(64 * 1024))
+    assert policy.choose("data.bmp", half_random) is FAST
+    assert policy.choose("empty.txt", b"") is FAST
+
+
+def test_stats_totals():
+    stats = CompressionStats()
+
+    stats.file_added(STORE)
+    stats.add(STORE, 100, 100, 0.0)
+    stats.file_added(STRONG)
+    stats.add(STRONG, 1000, 100, 0.5)
+
+    assert stats.by_compression["stored"]["files"] == 1
+    assert stats.by_compression["strong deflate"]["bytes_out"] == 100
+    assert stats.bytes_saved == 900
+    assert stats.cpu_seconds == 0.5
+    assert STORE.compress_type == zipfile.ZIP_STORED
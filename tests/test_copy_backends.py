@@ -0,0 +1,200 @@
+import errno
+import os
+import pytest
+from src.copy_backends import FileCopier
+from src.file_options import OutputMode
+
+
+def test_copy_picks_a_method(video, tmp_path):
+    copier = FileCopier()
+    destination = str(tmp_path / "copy.mp4")
+
+    method = copier.copy(video, destination)
+
+    with open(video, "rb") as src, open(destination, "rb") as dst:
+        assert src.read() == dst.read()
+    assert copier.methods_used == {method: 1}
+
+
+@pytest.mark.parametrize("method", ["copy_file_range", "sendfile"])
+def test_kernel_copies_report_progress(video, tmp_path, method, monkeypatch):
+    monkeypatch.setattr("src.copy_backends.KERNEL_CHUNK_SIZE", 1024 * 1024)
+    copier = FileCopier()
+    copier.methods = [entry for entry in copier.methods if entry[0] == method]
+    if not copier.methods:
+        pytest.skip(f"{method} is not available")
+    reported = []
+
+    copier.copy(video, str(tmp_path / "copy.mp4"), on_bytes=reported.append)
+
+    assert len(reported) == 10
+    assert sum(reported) == os.path.getsize(video)
+    assert copier.methods_used == {method: 1}
+
+
+def test_unsupported_methods_fall_back(video, tmp_path):
+    copier = FileCopier()
+    calls = []
+
+    def unsupported(src_fd, dst_fd, size, on_bytes):
+        calls.append(size)
+        os.write(dst_fd, b"partial")
+        on_bytes(7)
+        raise OSError(errno.EXDEV, "cross-device")
+
+    copier.methods = [("unsupported", unsupported)]
+
+    reported = []
+    copier.copy(video, str(tmp_path / "a.mp4"), on_bytes=reported.append)
+    copier.copy(video, str(tmp_path / "b.mp4"))
+
+    with open(video, "rb") as src, open(str(tmp_path / "a.mp4"), "rb") as dst:
+        assert src.read() == dst.read()
+    # not retried for the same pair of devices
+    assert len(calls) == 1
+    # progress from the failed attempt is taken back
+    assert sum(reported) == os.path.getsize(video)
+    assert copier.methods_used == {"userspace": 2}
+
+
+def test_other_errors_are_raised(video, tmp_path):
+    copier = FileCopier()
+
+    def broken(src_fd, dst_fd, size, on_bytes):
+        raise OSError(errno.EIO, "I/O error")
+
+    copier.methods = [("broken", broken)]
+
+    with pytest.raises(OSError):
+        copier.copy(video, str(tmp_path / "a.mp4"))
+
+
+def test_hardlink_mode(video, tmp_path):
+    copier = FileCopier(OutputMode.HARDLINK)
+    destination = str(tmp_path / "link.mp4")
+
+    assert copier.copy(video, destination) == "hardlink"
+    assert os.path.samefile(video, destination)
+
+    # replacing an earlier copy
+    assert copier.copy(video, destination) == "hardlink"
+
+
+def test_symlink_mode(video, tmp_path):
+    copier = FileCopier(OutputMode.SYMLINK)
+    destination = str(tmp_path / "link.mp4")
+
+    assert copier.copy(video, destination) == "symlink"
+    assert os.path.islink(destination)
+    assert os.path.samefile(video, destination)
+
+
+def test_link_mode_falls_back_to_copy(video, tmp_path, monkeypatch):
+    def cross_device_link(source, destination):
+        raise OSError(errno.EXDEV, "cross-device link")
+
+    monkeypatch.setattr(os, "link", cross_device_link)
+    copier = FileCopier(OutputMode.HARDLINK)
+    destination = str(tmp_path / "copy.mp4")
+
+    assert copier.copy(video, destination) != "hardlink"
+    assert not os.path.samefile(video, destination)
+    assert os.path.getsize(video) == os.path.getsize(destination)
+
+
+@pytest.mark.parametrize("method", ["copy_file_range", "sendfile", "userspace"])
+def test_large_files_are_dropped_from_the_page_cache(video, tmp_path, method, monkeypatch):
+    if not hasattr(os, "posix_fadvise"):
+        pytest.skip("posix_fadvise is not available")
+    monkeypatch.setattr("src.copy_backends.CACHE_DROP_WINDOW", 1024 * 1024)
+    advice = []
+    fadvise = os.posix_fadvise
+
+    def recording_fadvise(fd, offset, length, flag):
+        advice.append((offset, length, flag))
+        fadvise(fd, offset, length, flag)
+
+    monkeypatch.setattr(os, "posix_fadvise", recording_fadvise)
+    copier = FileCopier(large_file_threshold=1024 * 1024)
+    if method == "userspace":
+
+        def unsupported(src_fd, dst_fd, size, on_bytes):
+            raise OSError(errno.EXDEV, "cross-device")
+
+        copier.methods = [("unsupported", unsupported)]
+    else:
+        copier.methods = [entry for entry in copier.methods if entry[0] == method]
+        if not copier.methods:
+            pytest.skip(f"{method} is not available")
+    destination = str(tmp_path / "copy.mp4")
+    reported = []
+
+    assert copier.copy(video, destination, on_bytes=reported.append) == method
+
+    with open(video, "rb") as src, open(destination, "rb") as dst:
+        assert src.read() == dst.read()
+    assert sum(reported) == os.path.getsize(video)
+    assert (0, 0, os.POSIX_FADV_SEQUENTIAL) in advice
+    dropped = [(offset, length) for offset, length, flag in advice if flag == os.POSIX_FADV_DONTNEED]
+    # source and destination, window by window, up to the end of the file
+    assert max(offset + length for offset, length in dropped) == os.path.getsize(video)
+
+
+def test_large_file_preallocation_is_trimmed_when_the_source_shrinks(video, tmp_path):
+    copier = FileCopier(large_file_threshold=1)
+
+    def shrinking(src_fd, dst_fd, size, on_bytes):
+        os.truncate(video, size // 2)
+        os.write(dst_fd, os.pread(src_fd, size, 0))
+        on_bytes(size // 2)
+        return size // 2
+
+    copier.methods = [("shrinking", shrinking)]
+    destination = str(tmp_path / "copy.mp4")
+
+    copier.copy(video, destination)
+
+    with open(video, "rb") as src, open(destination, "rb") as dst:
+        assert src.read() == dst.read()
+    assert copier.methods_used == {"userspace": 1}
+
+
+@pytest.mark.parametrize("method", ["copy_file_range", "sendfile"])
+def test_kernel_copies_that_copy_nothing_are_unsupported(video, tmp_path, method, monkeypatch):
+    copier = FileCopier()
+    copier.methods = [entry for entry in copier.methods if entry[0] == method]
+    if not copier.methods:
+        pytest.skip(f"{method} is not available")
+    # what some filesystems answer instead of an error
+    monkeypatch.setattr(os, method, lambda *args, **kwargs: 0)
+    destination = str(tmp_path / "copy.mp4")
+
+    copier.copy(video, destination)
+    copier.copy(video, str(tmp_path / "again.mp4"))
+
+    with open(video, "rb") as src, open(destination, "rb") as dst:
+        assert src.read() == dst.read()
+    assert copier.methods_used == {"userspace": 2}
+    assert len(copier._unsupported) == 1
+
+
+def test_copies_that_stop_short_fall_back(video, tmp_path):
+    copier = FileCopier()
+
+    def short(src_fd, dst_fd, size, on_bytes):
+        os.write(dst_fd, os.pread(src_fd, 1000, 0))
+        on_bytes(1000)
+        return 1000
+
+    copier.methods = [("short", short)]
+    reported = []
+    destination = str(tmp_path / "copy.mp4")
+
+    copier.copy(video, destination, on_bytes=reported.append)
+
+    with open(video, "rb") as src, open(destination, "rb") as dst:
+        assert src.read() == dst.read()
+    assert sum(reported) == os.path.getsize(video)
+    assert copier.methods_used == {"userspace": 1}
+    # the method still works for other files
+    assert not copier._unsupported
@@ -0,0 +1,168 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+import cli
+from src.copy_control import CopyControl
+from src.copy_engine import CopyEngine
+from src.file_options import CopyOptions
+
+
+def test_engine_copies_files_and_reports_progress(source, tmp_path):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    snapshots = []
+    files = [str(source / "a.jpg"), str(source / "nested" / "b.png")]
+
+    engine = CopyEngine(files, str(destination), CopyOptions(str(source)), on_progress=snapshots.append)
+
+    assert engine.run() == CopyEngine.FINISHED
+    assert sorted(os.listdir(destination)) == ["a.jpg", "b.png"]
+    assert snapshots[-1].percent == 100
+    assert snapshots[-1].bytes_done == 3000
+
+
+def test_listed_files_are_stat_ed_when_their_turn_comes(source, tmp_path):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    later = source / "later.jpg"
+    snapshots = []
+
+    def on_progress(snapshot):
+        # the copy has started before the last file of the list exists
+        if not later.exists():
+            later.write_bytes(b"c" * 500)
+        snapshots.append(snapshot)
+
+    # one worker keeps two copies in flight, the third file waits for the first
+    files = [str(source / "a.jpg"), str(source / "nested" / "b.png"), str(later)]
+    engine = CopyEngine(
+        files, str(destination), CopyOptions(str(source), workers=1), on_progress=on_progress
+    )
+
+    assert engine.run() == CopyEngine.FINISHED
+    assert sorted(os.listdir(destination)) == ["a.jpg", "b.png", "later.jpg"]
+    assert snapshots[0].files_total == 3 and not snapshots[0].scanning
+    assert snapshots[-1].bytes_total == 3500 and snapshots[-1].percent == 100
+
+
+def test_engine_reports_not_found(tmp_path):
+    assert CopyEngine([], str(tmp_path), CopyOptions(str(tmp_path))).run() == CopyEngine.NOT_FOUND
+
+
+class CancelAfter(CopyControl):
+    """Cancels the run at its nth checkpoint."""
+
+    def __init__(self, checkpoints):
+        super().__init__()
+        self.checkpoints = checkpoints
+
+    def checkpoint(self):
+        self.checkpoints -= 1
+        if self.checkpoints == 0:
+            self.cancel()
+        super().checkpoint()
+
+
+@pytest.fixture
+def big_file(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(os.urandom(20 * 1024 * 1024))
+    return str(path)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_cancel_stops_within_a_file_and_leaves_no_partial_output(big_file, tmp_path, compress):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    snapshots = []
+    options = CopyOptions(str(tmp_path), compress_after_copy=compress)
+    engine = CopyEngine([big_file], str(destination), options, on_progress=snapshots.append)
+    # the first checkpoint is before the file starts, the second after its first chunk
+    engine.control = CancelAfter(2)
+
+    assert engine.run() == CopyEngine.CANCELED
+    assert os.listdir(destination) == []
+    assert engine.progress.snapshot(force=True).bytes_done < os.path.getsize(big_file)
+
+
+def test_pause_blocks_the_copy_until_resumed(big_file, tmp_path):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    engine = CopyEngine([big_file], str(destination), CopyOptions(str(tmp_path)))
+    engine.pause_copy()
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(status=engine.run()))
+    worker.start()
+
+    time.sleep(0.2)
+    assert worker.is_alive()
+    assert os.listdir(destination) == []
+    engine.resume_copy()
+    worker.join(10)
+
+    assert result["status"] == CopyEngine.FINISHED
+    assert os.listdir(destination) == ["video.mp4"]
+
+
+def test_cancel_wakes_a_paused_copy(big_file, tmp_path):
+    engine = CopyEngine([big_file], str(tmp_path), CopyOptions(str(tmp_path)))
+    engine.pause_copy()
+    worker = threading.Thread(target=engine.run)
+    worker.start()
+
+    engine.cancel_copy()
+    worker.join(10)
+
+    assert not worker.is_alive()
+    assert not engine.paused
+
+
+def test_cli_copies_into_destination(source, tmp_path):
+    destination = tmp_path / "destination"
+
+    exit_code = cli.main(
+        [str(source), "--destination", str(destination), "--min-size", "1.5K", "-q"]
+    )
+
+    assert exit_code == 0
+    assert os.listdir(destination) == ["b.png"]
+
+
+def test_cli_copies_to_several_destinations(source, tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+
+    exit_code = cli.main(
+        [str(source), "-d", str(first), "--also-copy-to", str(second), "--type", "images", "-q"]
+    )
+
+    assert exit_code == 0
+    assert sorted(os.listdir(first)) == sorted(os.listdir(second)) == ["a.jpg", "b.png"]
+
+
+def test_cli_exits_with_1_when_nothing_matches(source):
+    assert cli.main([str(source), "--type", "videos", "-q"]) == 1
+    # the folder created for the run is removed again
+    assert sorted(os.listdir(source)) == ["a.jpg", "nested", "notes.txt"]
+
+
+def test_cli_removes_a_new_destination_when_nothing_matches(source, tmp_path):
+    destination = tmp_path / "destination"
+
+    exit_code = cli.main([str(source), "--type", "videos", "-d", str(destination), "--incremental", "-q"])
+
+    assert exit_code == 1
+    assert not destination.exists()
+
+
+def test_cli_parses_sizes():
+    assert cli.parse_size("512") == 512
+    assert cli.parse_size("10k") == 10 * 1024
+    assert cli.parse_size("2GB") == 2 * 1024**3
+
+
+def test_cli_does_not_import_qt():
+    code = "import sys, cli; sys.exit(any(m.startswith('PyQt6') for m in sys.modules))"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
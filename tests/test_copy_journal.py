@@ -0,0 +1,40 @@
+import os
+from src.copy_journal import CopyJournal
+from src.file_walker import FileEntry
+
+
+def test_completed_copies_are_up_to_date(tmp_path):
+    journal = CopyJournal.for_folder(str(tmp_path))
+    entry = FileEntry("/source/a.jpg", 10, 1000.5)
+
+    journal.copy_started(entry, "a.jpg")
+    assert not journal.is_up_to_date(entry)
+
+    journal.copy_completed(entry, "a.jpg")
+    assert journal.is_up_to_date(entry)
+    assert not journal.is_up_to_date(FileEntry("/source/a.jpg", 11, 1000.5))
+    assert not journal.is_up_to_date(FileEntry("/source/a.jpg", 10, 2000.0))
+    assert not journal.is_up_to_date(FileEntry("/source/b.jpg", 10, 1000.5))
+
+
+def test_journal_survives_reopening(tmp_path):
+    journal = CopyJournal.for_folder(str(tmp_path))
+    journal.copy_completed(FileEntry("/source/a.jpg", 10, 1000.5), "a_1.jpg")
+    journal.close()
+
+    journal = CopyJournal.for_folder(str(tmp_path))
+
+    assert os.path.exists(os.path.join(str(tmp_path), CopyJournal.FILENAME))
+    assert journal.is_up_to_date(FileEntry("/source/a.jpg", 10, 1000.5))
+    assert journal.destination("/source/a.jpg") == "a_1.jpg"
+    assert journal.destination("/source/b.jpg") is None
+    assert journal.destinations() == ["a_1.jpg"]
+
+
+def test_journal_is_only_created_by_the_first_copy(tmp_path):
+    journal = CopyJournal.for_folder(str(tmp_path))
+
+    assert not journal.is_up_to_date(FileEntry("/source/a.jpg", 10, 1000.5))
+    assert journal.destinations() == []
+    journal.close()
+    assert os.listdir(tmp_path) == []
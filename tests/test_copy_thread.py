@@ -1,9 +1,13 @@
 import pytest
 import os
 import shutil
+import tarfile
 import zipfile
 from unittest.mock import MagicMock
+from src.copy_engine import CopyEngine
 from src.copy_thread import CopyThread
+from src.file_scanner import FileScanner
+from src.file_options import CopyOptions, OutputMode, ArchiveFormat
 
 def clean_output_dir():
     """Helper function to clean the output directory before each test"""
@@ -210,4 +214,207 @@ def test_recursive_copy(setup_test_env):
         
     # Check if files with same names were properly renamed
     dest_filenames = [os.path.basename(f) for f in copied_files]
-    assert len(dest_filenames) == len(set(dest_filenames)), "Files were not renamed properly" 
\ No newline at end of file
+    assert len(dest_filenames) == len(set(dest_filenames)), "Files were not renamed properly" 
+
+def test_parallel_copy(setup_test_env):
+    # Arrange
+    test_files = setup_test_env["test_files"]
+    dest_dir = setup_test_env["dest_dir"]
+
+    thread = CopyThread(test_files, str(dest_dir), compress_after_copy=False, workers=4)
+    thread.finished = MagicMock()
+    thread.progress_changed = MagicMock()
+    thread.copy_canceled = MagicMock()
+
+    # Act
+    thread.run()
+
+    # Assert
+    assert thread.finished.emit.called
+    assert not thread.copy_canceled.emit.called
+    thread.progress_changed.emit.assert_called_with(100)
+
+    # Same-named files coming from different folders must not overwrite each other
+    copied_files = os.listdir(dest_dir)
+    assert len(copied_files) == len(test_files)
+    assert len(copied_files) == len(set(copied_files))
+
+
+def test_streaming_copy_from_scanner(setup_test_env):
+    # Arrange
+    test_files = setup_test_env["test_files"]
+    dest_dir = setup_test_env["dest_dir"]
+
+    scanner = FileScanner(iter(test_files), max_queued=2).start()
+    thread = CopyThread(scanner, str(dest_dir), compress_after_copy=False, workers=2)
+    thread.finished = MagicMock()
+    thread.progress_changed = MagicMock()
+    thread.progress_stats = MagicMock()
+    thread.not_files_found = MagicMock()
+
+    # Act
+    thread.run()
+
+    # Assert
+    assert thread.finished.emit.called
+    assert not thread.not_files_found.emit.called
+    snapshot = thread.progress_stats.emit.call_args[0][0]
+    assert snapshot.files_done == snapshot.files_total == len(test_files)
+    assert not snapshot.scanning
+    assert len(os.listdir(dest_dir)) == len(test_files)
+
+
+def test_no_files_found_from_empty_scan(setup_test_env):
+    # Arrange
+    dest_dir = setup_test_env["dest_dir"]
+
+    thread = CopyThread(FileScanner(iter([])).start(), str(dest_dir), compress_after_copy=True)
+    thread.finished = MagicMock()
+    thread.progress_changed = MagicMock()
+    thread.not_files_found = MagicMock()
+
+    # Act
+    thread.run()
+
+    # Assert
+    assert thread.not_files_found.emit.called
+    assert not thread.finished.emit.called
+    assert os.listdir(dest_dir) == []
+
+
+def test_deduplicated_copy(setup_test_env):
+    # Arrange
+    test_files = setup_test_env["test_files"]
+    dest_dir = setup_test_env["dest_dir"]
+    distinct_contents = set()
+    for file in test_files:
+        with open(file, "rb") as f:
+            distinct_contents.add(f.read())
+
+    thread = CopyThread(test_files, str(dest_dir), compress_after_copy=False, workers=4, deduplicate=True)
+    thread.finished = MagicMock()
+    thread.progress_changed = MagicMock()
+
+    # Act
+    thread.run()
+
+    # Assert
+    assert thread.finished.emit.called
+    thread.progress_changed.emit.assert_called_with(100)
+    copied_files = [f for f in os.listdir(dest_dir) if f != "duplicates_report.json"]
+    assert len(copied_files) == len(distinct_contents)
+    assert len(thread.engine.deduplicator.duplicates) == len(test_files) - len(distinct_contents)
+    assert os.path.exists(os.path.join(dest_dir, "duplicates_report.json"))
+
+
+def test_incremental_copy_only_copies_new_and_changed_files(setup_test_env):
+    # Arrange
+    test_files = setup_test_env["test_files"]
+    dest_dir = setup_test_env["dest_dir"]
+
+    def run_copy():
+        thread = CopyThread(list(test_files), str(dest_dir), compress_after_copy=False, incremental=True)
+        thread.finished = MagicMock()
+        thread.progress_changed = MagicMock()
+        thread.not_files_found = MagicMock()
+        thread.run()
+        assert thread.finished.emit.called
+        return thread
+
+    first_run = run_copy()
+    names_after_first_run = sorted(os.listdir(dest_dir))
+
+    # Act
+    unchanged_run = run_copy()
+    with open(test_files[0], "ab") as f:
+        f.write(b"changed")
+    changed_run = run_copy()
+
+    # Assert
+    assert first_run.engine.files_done == len(test_files)
+    assert unchanged_run.engine.files_done == 0
+    assert unchanged_run.engine.files_skipped == len(test_files)
+    assert changed_run.engine.files_done == 1
+    # the changed file replaced its own earlier copy
+    assert sorted(os.listdir(dest_dir)) == names_after_first_run
+
+
+def test_hardlink_copy_keeps_collision_naming(setup_test_env):
+    # Arrange
+    test_files = setup_test_env["test_files"]
+    dest_dir = setup_test_env["dest_dir"]
+
+    thread = CopyThread(test_files, str(dest_dir), compress_after_copy=False, output_mode=OutputMode.HARDLINK)
+    thread.finished = MagicMock()
+    thread.progress_changed = MagicMock()
+
+    # Act
+    thread.run()
+
+    # Assert
+    assert thread.finished.emit.called
+    assert thread.engine.file_copier.methods_used == {"hardlink": len(test_files)}
+    assert len(os.listdir(dest_dir)) == len(test_files)
+    assert os.path.exists(os.path.join(dest_dir, "altumcode-dMUt0X3f59Q-unsplash_1.jpg"))
+
+
+def test_compressed_copy_as_tar_gz(setup_test_env):
+    # Arrange
+    test_files = setup_test_env["test_files"]
+    dest_dir = setup_test_env["dest_dir"]
+
+    thread = CopyThread(test_files, str(dest_dir), compress_after_copy=True, archive_format=ArchiveFormat.TAR_GZ)
+    thread.finished = MagicMock()
+    thread.progress_changed = MagicMock()
+
+    # Act
+    thread.run()
+
+    # Assert
+    assert thread.finished.emit.called
+    with tarfile.open(os.path.join(dest_dir, "compressed_files.tar.gz")) as tar:
+        names = tar.getnames()
+    assert len(names) == len(test_files)
+    assert len(names) == len(set(names))
+
+
+def test_progress_updates_are_coalesced(setup_test_env):
+    # Arrange
+    test_files = setup_test_env["test_files"] * 20
+    dest_dir = setup_test_env["dest_dir"]
+
+    thread = CopyThread(test_files, str(dest_dir), compress_after_copy=False, workers=4)
+    thread.finished = MagicMock()
+    thread.progress_changed = MagicMock()
+    thread.progress_stats = MagicMock()
+
+    # Act
+    thread.run()
+
+    # Assert
+    assert thread.progress_stats.emit.call_count < len(test_files)
+    snapshot = thread.progress_stats.emit.call_args[0][0]
+    assert snapshot.percent == 100
+    assert snapshot.bytes_done == snapshot.bytes_total == sum(os.path.getsize(f) for f in test_files)
+
+
+def test_from_options_builds_one_engine(setup_test_env, monkeypatch):
+    # Arrange
+    dest_dir = setup_test_env["dest_dir"]
+    built = []
+    original_init = CopyEngine.__init__
+
+    def counting_init(self, *args, **kwargs):
+        built.append(self)
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(CopyEngine, "__init__", counting_init)
+    copy_options = CopyOptions(setup_test_env["source_dir"], workers=2)
+
+    # Act
+    thread = CopyThread.from_options(setup_test_env["test_files"], str(dest_dir), copy_options)
+
+    # Assert
+    assert built == [thread.engine]
+    assert thread.engine.workers == 2
+    assert thread.engine.on_progress == thread._progress
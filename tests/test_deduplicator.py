@@ -0,0 +1,87 @@
+import json
+import os
+import pytest
+from src.copy_engine import CopyEngine
+from src.deduplicator import Deduplicator, PARTIAL_HASH_SIZE
+from src.file_options import CopyOptions
+from tests.conftest import copied_files
+
+
+@pytest.fixture
+def files(tmp_path):
+    contents = {
+        "a.jpg": b"same content",
+        "b.jpg": b"same content",
+        "c.jpg": b"same lengths",
+        "d.jpg": b"unique",
+        # same first block, different tail
+        "big1.mp4": b"x" * PARTIAL_HASH_SIZE + b"1" * 10,
+        "big2.mp4": b"x" * PARTIAL_HASH_SIZE + b"2" * 10,
+        "big3.mp4": b"x" * PARTIAL_HASH_SIZE + b"1" * 10,
+    }
+    paths = {}
+    for name, content in contents.items():
+        path = tmp_path / name
+        path.write_bytes(content)
+        paths[name] = str(path)
+    return paths
+
+
+def test_unique_keeps_first_copy_of_each_content(files):
+    deduplicator = Deduplicator(workers=4)
+    skipped = []
+
+    unique = list(deduplicator.unique(files.values(), on_duplicate=skipped.append))
+
+    names = [os.path.basename(path) for path in unique]
+    assert names == ["a.jpg", "c.jpg", "d.jpg", "big1.mp4", "big2.mp4"]
+    assert sorted(os.path.basename(path) for path in skipped) == ["b.jpg", "big3.mp4"]
+    assert deduplicator.bytes_saved == len(b"same content") + PARTIAL_HASH_SIZE + 10
+
+
+def test_report(files, tmp_path):
+    deduplicator = Deduplicator()
+    list(deduplicator.unique(files.values()))
+    report_path = str(tmp_path / "report.json")
+
+    deduplicator.write_report(report_path)
+
+    with open(report_path) as f:
+        report = json.load(f)
+    assert report["files_skipped"] == 2
+    assert report["bytes_saved"] == deduplicator.bytes_saved
+    assert {"file": files["b.jpg"], "duplicate_of": files["a.jpg"], "size": 12} in report["duplicates"]
+
+
+def test_files_with_unique_sizes_are_never_read(tmp_path):
+    paths = []
+    for size in range(1, 20):
+        path = tmp_path / f"{size}.jpg"
+        path.write_bytes(b"x" * size)
+        paths.append(str(path))
+    deduplicator = Deduplicator()
+
+    assert list(deduplicator.unique(paths)) == paths
+    assert deduplicator._partial_hashes == {}
+
+
+def test_incremental_reruns_still_skip_the_duplicates(make_source, tmp_path):
+    source = make_source({"x/a.jpg": b"same content", "y/b.jpg": b"same content"})
+    files = [str(source / "x" / "a.jpg"), str(source / "y" / "b.jpg")]
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    def run(files):
+        options = CopyOptions(str(source), deduplicate=True, incremental=True)
+        engine = CopyEngine(files, str(destination), options)
+        assert engine.run() == CopyEngine.FINISHED
+        return engine
+
+    run(files)
+    # the rerun meets the duplicate before the file that was copied
+    engine = run(files[::-1])
+
+    assert engine.files_done == 0 and engine.files_skipped == 2
+    assert copied_files(destination) == ["a.jpg", "duplicates_report.json"]
+    with open(destination / "duplicates_report.json") as f:
+        assert [entry["file"] for entry in json.load(f)["duplicates"]] == [files[1]]
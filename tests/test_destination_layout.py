@@ -0,0 +1,129 @@
+import os
+import time
+import zipfile
+import pytest
+import cli
+from src.copy_engine import CopyEngine
+from src.destination_layout import DestinationLayout
+from src.file_options import CopyOptions, OutputLayout
+from src.file_walker import FileEntry
+from tests.conftest import copied_files, files_of
+
+
+@pytest.fixture
+def source(make_source):
+    folder = make_source({"a.jpg": b"a", "2019/a.jpg": b"aa", "2019/trip/b.jpg": b"bbb"})
+    march = time.mktime((2019, 3, 15, 12, 0, 0, 0, 0, -1))
+    os.utime(folder / "2019" / "trip" / "b.jpg", (march, march))
+    return folder
+
+
+def test_preserve_keeps_the_source_folders(source, tmp_path):
+    destination = tmp_path / "destination"
+    engine = CopyEngine(
+        files_of(source),
+        str(destination),
+        CopyOptions(str(source), layout=OutputLayout.PRESERVE),
+    )
+
+    assert engine.run() == CopyEngine.FINISHED
+    assert copied_files(destination) == ["2019/a.jpg", "2019/trip/b.jpg", "a.jpg"]
+
+
+def test_date_layout_uses_the_modification_month(source, tmp_path):
+    layout = DestinationLayout(OutputLayout.DATE)
+    entry = FileEntry.from_path(source / "2019" / "trip" / "b.jpg")
+
+    assert layout.reserve(entry) == "2019/03/b.jpg"
+
+
+def test_hash_layout_puts_equal_names_in_one_bucket(source):
+    layout = DestinationLayout(OutputLayout.HASH, hash_buckets=16)
+    first = layout.reserve(str(source / "a.jpg"))
+    second = layout.reserve(str(source / "2019" / "a.jpg"))
+
+    folder = first.split("/")[0]
+    assert len(folder) == 1 and int(folder, 16) < 16
+    assert first == f"{folder}/a.jpg"
+    assert second == f"{folder}/a_1.jpg"
+
+
+def test_full_folders_overflow_into_siblings(tmp_path):
+    (tmp_path / "2019").mkdir()
+    (tmp_path / "2019" / "old.jpg").write_bytes(b"")
+    layout = DestinationLayout(OutputLayout.PRESERVE, str(tmp_path), max_files_per_folder=2)
+    layout.folders = [str(tmp_path / "destination")]
+
+    paths = [layout.reserve(str(tmp_path / "2019" / f"{i}.jpg")) for i in range(5)]
+
+    assert paths == ["2019/0.jpg", "2019/1.jpg", "2019_2/2.jpg", "2019_2/3.jpg", "2019_3/4.jpg"]
+    assert sorted(os.listdir(tmp_path / "destination")) == ["2019", "2019_2", "2019_3"]
+
+
+def test_overflow_folders_skip_names_the_source_uses(tmp_path):
+    source = tmp_path / "source"
+    for folder in ("b", "b_2"):
+        (source / folder).mkdir(parents=True)
+        for i in range(3):
+            (source / folder / f"{folder}-{i}.jpg").write_bytes(b"")
+    destination = tmp_path / "destination"
+
+    exit_code = cli.main(
+        [str(source), "-d", str(destination), "--layout", "preserve", "--max-per-folder", "2", "-q"]
+    )
+
+    assert exit_code == 0
+    # the files of b_2 are never mixed with the overflow of b
+    for folder in ("b", "b_2"):
+        names = os.listdir(destination / folder)
+        assert len(names) == 2 and all(name.startswith(folder + "-") for name in names)
+    overflows = set(os.listdir(destination)) - {"b", "b_2"}
+    overflowed = [name for folder in overflows for name in os.listdir(destination / folder)]
+    assert len(overflows) == 2 and len(overflowed) == 2
+
+
+def test_names_on_disk_are_taken_per_folder(tmp_path):
+    destination = tmp_path / "destination"
+    (destination / "2019").mkdir(parents=True)
+    (destination / "2019" / "a.jpg").write_bytes(b"")
+    layout = DestinationLayout(OutputLayout.PRESERVE, str(tmp_path))
+    layout.folders = [str(destination)]
+
+    assert layout.reserve(str(tmp_path / "2019" / "a.jpg")) == "2019/a_1.jpg"
+    assert layout.reserve(str(tmp_path / "a.jpg")) == "a.jpg"
+
+
+def test_only_date_and_hash_layouts_are_capped_by_default(tmp_path):
+    assert DestinationLayout().max_files_per_folder is None
+    assert DestinationLayout(OutputLayout.PRESERVE, str(tmp_path)).max_files_per_folder is None
+    assert DestinationLayout(OutputLayout.DATE).max_files_per_folder == 10_000
+    assert DestinationLayout(OutputLayout.HASH).max_files_per_folder == 10_000
+    with pytest.raises(ValueError):
+        DestinationLayout(OutputLayout.PRESERVE)
+
+
+def test_archive_entries_follow_the_layout(source, tmp_path):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    engine = CopyEngine(
+        files_of(source),
+        str(destination),
+        CopyOptions(str(source), compress_after_copy=True, layout=OutputLayout.PRESERVE),
+    )
+
+    assert engine.run() == CopyEngine.FINISHED
+    with zipfile.ZipFile(destination / "compressed_files.zip") as archive:
+        assert sorted(archive.namelist()) == ["2019/a.jpg", "2019/trip/b.jpg", "a.jpg"]
+
+
+def test_incremental_copies_keep_their_sharded_paths(source, tmp_path):
+    destination = tmp_path / "destination"
+    arguments = [str(source), "-d", str(destination), "--layout", "hash", "--incremental", "-q"]
+    assert cli.main(arguments) == 0
+    first = copied_files(destination)
+
+    (source / "2019" / "a.jpg").write_bytes(b"changed")
+    assert cli.main(arguments) == 0
+
+    assert copied_files(destination) == first
+    assert len(first) == 3 and all("/" in path for path in first)
@@ -0,0 +1,112 @@
+import errno
+import os
+import zipfile
+from src import fan_out
+from src.copy_control import part_path
+from src.copy_engine import CopyEngine
+from src.fan_out import FanOutCopier
+from src.file_options import ArchiveFormat, CopyOptions, OutputMode
+
+
+def make_folders(tmp_path, count):
+    folders = []
+    for i in range(count):
+        folder = tmp_path / f"destination{i}"
+        folder.mkdir()
+        folders.append(str(folder))
+    return folders
+
+
+def test_copies_to_every_destination_reading_once(video, tmp_path):
+    folders = make_folders(tmp_path, 3)
+    copier = FanOutCopier(folders)
+    reported = []
+
+    assert copier.copy(video, "copy.mp4", on_bytes=reported.append) == []
+
+    with open(video, "rb") as src:
+        content = src.read()
+    for folder in folders:
+        with open(os.path.join(folder, "copy.mp4"), "rb") as dst:
+            assert dst.read() == content
+    # progress counts the source once, not once per destination
+    assert sum(reported) == len(content)
+    assert [destination.files_done for destination in copier.destinations] == [1, 1, 1]
+
+
+def test_a_failing_destination_does_not_stop_the_others(video, tmp_path, monkeypatch):
+    folders = make_folders(tmp_path, 3)
+    full_disk = os.path.join(folders[1], "copy.mp4")
+    real_open, real_write = os.open, os.write
+    full_fds = set()
+
+    def tracking_open(path, *args):
+        fd = real_open(path, *args)
+        if path == part_path(full_disk):
+            full_fds.add(fd)
+        return fd
+
+    def failing_write(fd, data):
+        if fd in full_fds:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        return real_write(fd, data)
+
+    monkeypatch.setattr(fan_out.os, "open", tracking_open)
+    monkeypatch.setattr(fan_out.os, "write", failing_write)
+    copier = FanOutCopier(folders)
+
+    failed = copier.copy(video, "copy.mp4")
+
+    assert failed == [copier.destinations[1]]
+    assert os.listdir(folders[1]) == []
+    assert os.path.getsize(os.path.join(folders[0], "copy.mp4")) == os.path.getsize(video)
+    assert os.path.getsize(os.path.join(folders[2], "copy.mp4")) == os.path.getsize(video)
+    assert copier.destinations[1].failed == 1
+    assert "No space left" in copier.destinations[1].errors[0][1]
+
+
+def test_unreachable_destination_is_isolated(video, tmp_path):
+    folders = make_folders(tmp_path, 1) + [str(tmp_path / "missing")]
+    copier = FanOutCopier(folders)
+
+    failed = copier.copy(video, "copy.mp4")
+
+    assert failed == [copier.destinations[1]]
+    assert copier.destinations[0].files_done == 1
+
+
+def test_hardlink_fan_out(video, tmp_path):
+    folders = make_folders(tmp_path, 2)
+    copier = FanOutCopier(folders, fan_out.FileCopier(OutputMode.HARDLINK))
+
+    copier.copy(video, "link.mp4")
+
+    for folder in folders:
+        assert os.path.samefile(video, os.path.join(folder, "link.mp4"))
+
+
+def test_engine_copies_and_archives_in_one_pass(video, tmp_path):
+    folders = make_folders(tmp_path, 2)
+    archive_folder = str(tmp_path / "archive")
+    snapshots = []
+
+    engine = CopyEngine(
+        [video],
+        folders[0],
+        CopyOptions(
+            str(tmp_path),
+            extra_destinations=folders[1:],
+            extra_archive=archive_folder,
+            archive_format=ArchiveFormat.ZIP,
+        ),
+        on_progress=snapshots.append,
+    )
+
+    assert engine.run() == CopyEngine.FINISHED
+    for folder in folders:
+        assert os.listdir(folder) == ["video.mp4"]
+    with zipfile.ZipFile(os.path.join(archive_folder, "compressed_files.zip")) as archive:
+        with open(video, "rb") as src:
+            assert archive.read("video.mp4") == src.read()
+    assert snapshots[-1].bytes_done == os.path.getsize(video)
+    assert [item[1] for item in snapshots[-1].destinations] == [1, 1]
@@ -0,0 +1,83 @@
+import os
+from src.file_filter import FileFilter, file_extensions
+from src.file_options import CopyOptions, FileType, image_extensions
+
+
+class FakeFolder:
+    def __init__(self, name, device=1):
+        self.name = name
+        self.device = device
+
+    def stat(self, follow_symlinks=True):
+        return os.stat_result((0, 0, self.device, 0, 0, 0, 0, 0, 0, 0))
+
+
+def test_match_name_by_extension():
+    file_filter = FileFilter(image_extensions)
+
+    assert file_filter.match_name("photo.jpg")
+    assert file_filter.match_name("PHOTO.JPEG")
+    assert file_filter.match_name("archive.tar.png")
+    assert not file_filter.match_name("movie.mp4")
+    assert not file_filter.match_name("jpg")
+    assert not file_filter.match_name("photo.jpg.txt")
+
+
+def test_match_name_multi_dot_extension():
+    file_filter = FileFilter([".tar.gz", ".txt"])
+
+    assert file_filter.match_name("backup.tar.gz")
+    assert file_filter.match_name("notes.TXT")
+    assert not file_filter.match_name("backup.gz")
+
+
+def test_include_and_exclude_patterns():
+    file_filter = FileFilter(
+        image_extensions,
+        include_patterns=["img_*", "dsc*"],
+        exclude_patterns=["*_thumb.*"],
+    )
+
+    assert file_filter.match_name("IMG_0001.jpg")
+    assert file_filter.match_name("dsc0001.png")
+    assert not file_filter.match_name("holiday.jpg")
+    assert not file_filter.match_name("img_0001_thumb.jpg")
+
+
+def test_match_stat_limits():
+    file_filter = FileFilter(
+        image_extensions, min_size=10, max_size=100, modified_after=1000, modified_before=2000
+    )
+
+    assert file_filter.match_stat(50, 1500)
+    assert not file_filter.match_stat(5, 1500)
+    assert not file_filter.match_stat(500, 1500)
+    assert not file_filter.match_stat(50, 500)
+    assert not file_filter.match_stat(50, 2500)
+    assert FileFilter(image_extensions).match_stat(0, 0)
+
+
+def test_should_enter_folder():
+    file_filter = FileFilter(image_extensions, skip_folders=["node_modules", ".cache"], same_filesystem=True)
+
+    assert file_filter.should_enter_folder(FakeFolder("photos"), root_device=1)
+    assert not file_filter.should_enter_folder(FakeFolder("node_modules"), root_device=1)
+    assert not file_filter.should_enter_folder(FakeFolder(".Cache"), root_device=1)
+    assert not file_filter.should_enter_folder(FakeFolder("usb", device=2), root_device=1)
+
+
+def test_from_copy_options():
+    copy_options = CopyOptions(
+        "/source",
+        FileType.CUSTOM,
+        custom_file_types=[".txt"],
+        exclude_patterns=["secret*"],
+        min_size=1,
+    )
+
+    file_filter = FileFilter.from_copy_options(copy_options)
+
+    assert file_filter.match_name("notes.txt")
+    assert not file_filter.match_name("secret.txt")
+    assert not file_filter.match_stat(0, 0)
+    assert file_extensions(FileType.IMAGES_VIDEOS, [])[0] == ".png"
@@ -0,0 +1,41 @@
+import time
+from src.file_scanner import FileScanner
+
+
+def test_scanner_yields_all_files_in_order():
+    files = [f"file_{i}.jpg" for i in range(100)]
+
+    scanner = FileScanner(iter(files), max_queued=5).start()
+
+    assert list(scanner) == files
+    assert scanner.discovered == len(files)
+    assert scanner.finished_scanning
+
+
+def test_scanner_reraises_scan_errors():
+    def failing_scan():
+        yield "a.jpg"
+        raise OSError("disk went away")
+
+    scanner = FileScanner(failing_scan()).start()
+
+    try:
+        list(scanner)
+        assert False, "the scan error should be raised to the consumer"
+    except OSError as e:
+        assert str(e) == "disk went away"
+
+
+def test_stop_unblocks_a_full_queue():
+    def endless_scan():
+        i = 0
+        while True:
+            yield f"file_{i}.jpg"
+            i += 1
+
+    scanner = FileScanner(endless_scan(), max_queued=2).start()
+    time.sleep(0.05)
+    scanner.stop()
+    scanner._thread.join(timeout=1)
+
+    assert not scanner._thread.is_alive()
@@ -0,0 +1,49 @@
+import os
+import pytest
+from src.copy_engine import CopyEngine
+from src.file_options import CopyOptions
+from src.file_table import FileTable
+from src.file_walker import FileEntry
+
+
+def test_rebuilds_entries_from_shared_folders():
+    folder = os.path.join("share", "photos")
+    table = FileTable()
+    table.append(FileEntry(os.path.join(folder, "a.jpg"), 10, 1.5))
+    table.append(FileEntry(os.path.join(folder, "b.jpg"), 20, 2.5))
+    table.append(FileEntry(os.path.join("other", "ñandú.png"), 30, 3.5))
+
+    assert len(table) == 3
+    assert table.total_size() == 60
+    assert [(entry.path, entry.size, entry.mtime) for entry in table] == [
+        (os.path.join(folder, "a.jpg"), 10, 1.5),
+        (os.path.join(folder, "b.jpg"), 20, 2.5),
+        (os.path.join("other", "ñandú.png"), 30, 3.5),
+    ]
+    assert table[-1].path == table.path(2) == os.path.join("other", "ñandú.png")
+    assert len(table._folders) == 2
+    with pytest.raises(IndexError):
+        table[3]
+
+
+def test_from_files_stats_paths(tmp_path):
+    (tmp_path / "a.jpg").write_bytes(b"abc")
+
+    table = FileTable.from_files([str(tmp_path / "a.jpg")])
+
+    assert FileTable.from_files(table) is table
+    assert table[0].size == 3
+
+
+def test_engine_copies_from_a_table(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "a.jpg").write_bytes(b"abc")
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    files = FileTable.from_files([str(source / "a.jpg")])
+    engine = CopyEngine(files, str(destination), CopyOptions(str(source)))
+
+    assert engine.run() == CopyEngine.FINISHED
+    assert os.listdir(destination) == ["a.jpg"]
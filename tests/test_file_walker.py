@@ -0,0 +1,71 @@
+import os
+import pytest
+from src.file_filter import FileFilter
+from src.file_walker import FileEntry, walk_files
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for folder in ["", "a", "a/b", "a/b/c", "skip", "d"]:
+        os.makedirs(tmp_path / folder, exist_ok=True)
+        (tmp_path / folder / "photo.jpg").write_bytes(b"x" * 10)
+        (tmp_path / folder / "notes.txt").write_bytes(b"text")
+    return tmp_path
+
+
+is_jpg = FileFilter([".jpg"])
+
+
+def test_walk_files_finds_every_matching_file(tree):
+    found = list(walk_files(str(tree), is_jpg, workers=3))
+
+    expected = sorted(
+        os.path.join(root, file)
+        for root, _, files in os.walk(tree)
+        for file in files
+        if is_jpg.match_name(file)
+    )
+    assert sorted(entry.path for entry in found) == expected
+
+
+def test_walk_files_reuses_stat_data(tree):
+    found = list(walk_files(str(tree), is_jpg))
+
+    for entry in found:
+        stat = os.stat(entry)
+        assert entry.size == stat.st_size == 10
+        assert entry.mtime == stat.st_mtime
+
+
+def test_walk_files_never_enters_excluded_folder(tree):
+    excluded = os.path.join(str(tree), "skip")
+
+    found = list(walk_files(str(tree), is_jpg, exclude_folder=excluded))
+
+    assert len(found) == 5
+    assert not any(entry.path.startswith(excluded + os.sep) for entry in found)
+
+
+def test_walk_files_prunes_skipped_folders(tree):
+    file_filter = FileFilter([".jpg"], skip_folders=["b", "sk*"])
+
+    found = list(walk_files(str(tree), file_filter))
+
+    assert sorted(os.path.relpath(entry.path, tree) for entry in found) == sorted(
+        ["photo.jpg", os.path.join("a", "photo.jpg"), os.path.join("d", "photo.jpg")]
+    )
+
+
+def test_walk_files_single_worker(tree):
+    assert len(list(walk_files(str(tree), is_jpg, workers=1))) == 6
+
+
+def test_file_entry_from_path(tree):
+    path = os.path.join(str(tree), "photo.jpg")
+
+    entry = FileEntry.from_path(path)
+
+    assert entry.path == path
+    assert entry.size == 10
+    assert FileEntry.from_path(entry) is entry
+    assert os.path.basename(entry) == "photo.jpg"
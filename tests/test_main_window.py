@@ -0,0 +1,107 @@
+import importlib.util
+import os
+import sys
+import types
+import pytest
+from PyQt6.QtWidgets import QApplication, QMainWindow
+import compile_ui
+import src
+from src import main_window
+from src.main_window import MainWindow
+from src.progress import ProgressSnapshot
+
+WIDGETS = (
+    "comboBox",
+    "progressBar",
+    "progressLabel",
+    "selectFolderButton",
+    "cancelPushButton",
+    "pausePushButton",
+    "compressCheckBox",
+    "customLineEdit",
+)
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def test_compiled_ui_builds_the_window(app, tmp_path):
+    compiled_path = tmp_path / "ui_main.py"
+    compile_ui.compile_ui(compiled_path=str(compiled_path))
+    spec = importlib.util.spec_from_file_location("compiled_ui", compiled_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    class Window(QMainWindow, module.Ui_MainWindow):
+        pass
+
+    window = Window()
+    window.setupUi(window)
+
+    for name in WIDGETS:
+        assert hasattr(window, name)
+
+
+def test_loads_ui_file_when_not_compiled(app, monkeypatch):
+    monkeypatch.setattr(main_window, "_CompiledUi", None)
+
+    window = MainWindow()
+
+    for name in WIDGETS:
+        assert hasattr(window, name)
+    assert window.comboBox.count() == 4
+    window.set_paused(True)
+    assert window.pausePushButton.text() == "Resume"
+    window.set_paused(False)
+    assert window.pausePushButton.text() == "Pause"
+    window.close()
+
+
+def test_progress_stats_go_to_the_label(app, monkeypatch):
+    monkeypatch.setattr(main_window, "_CompiledUi", None)
+    window = MainWindow()
+    window.show_progressBar()
+
+    window.update_progress_stats(
+        ProgressSnapshot(
+            percent=50,
+            files_done=1234,
+            files_total=5678,
+            bytes_done=0,
+            bytes_total=0,
+            bytes_per_second=12.3 * 1024 * 1024,
+            files_per_second=456,
+            eta_seconds=83,
+            scanning=False,
+            destinations=(),
+        )
+    )
+
+    assert window.progressBar.format() == "%p%"
+    assert window.progressLabel.text() == "1234 / 5678 files - 12.3 MB/s, 456 files/s - ETA 1:23"
+    window.close()
+
+
+def _fake_compiled_module(monkeypatch, path, mtime):
+    path.write_text("")
+    os.utime(path, (mtime, mtime))
+    module = types.SimpleNamespace(__file__=str(path), Ui_MainWindow=object)
+    monkeypatch.setitem(sys.modules, "src.ui_main", module)
+    monkeypatch.setattr(src, "ui_main", module, raising=False)
+    return module
+
+
+def test_compiled_ui_is_used_when_up_to_date(tmp_path, monkeypatch):
+    ui_mtime = os.path.getmtime(main_window.UI_PATH)
+    _fake_compiled_module(monkeypatch, tmp_path / "ui_main.py", ui_mtime + 10)
+
+    assert main_window._compiled_ui() is object
+
+
+def test_stale_compiled_ui_is_ignored(tmp_path, monkeypatch):
+    ui_mtime = os.path.getmtime(main_window.UI_PATH)
+    _fake_compiled_module(monkeypatch, tmp_path / "ui_main.py", ui_mtime - 10)
+
+    assert main_window._compiled_ui() is None
@@ -0,0 +1,47 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from src.name_registry import NameRegistry
+
+
+def test_reserve_adds_counter_suffix():
+    registry = NameRegistry()
+
+    names = [registry.reserve("IMG_0001.jpg") for _ in range(4)]
+
+    assert names == ["IMG_0001.jpg", "IMG_0001_1.jpg", "IMG_0001_2.jpg", "IMG_0001_3.jpg"]
+
+
+def test_reserve_does_not_chain_suffixes():
+    registry = NameRegistry()
+
+    registry.reserve("a.jpg")
+    registry.reserve("a.jpg")
+
+    assert registry.reserve("a_1.jpg") == "a_1_1.jpg"
+    assert registry.reserve("a.jpg") == "a_2.jpg"
+
+
+def test_reserve_skips_names_taken_by_other_files():
+    registry = NameRegistry(["a.jpg", "a_1.jpg", "a_2.jpg"])
+
+    assert registry.reserve("a.jpg") == "a_3.jpg"
+    assert registry.reserve("b.jpg") == "b.jpg"
+
+
+def test_from_folder_seeds_existing_names(tmp_path):
+    (tmp_path / "photo.jpg").write_bytes(b"")
+
+    registry = NameRegistry.from_folder(str(tmp_path))
+
+    assert "photo.jpg" in registry
+    assert registry.reserve("photo.jpg") == "photo_1.jpg"
+    assert NameRegistry.from_folder(str(tmp_path / "missing")).reserve("photo.jpg") == "photo.jpg"
+
+
+def test_reserve_is_thread_safe():
+    registry = NameRegistry()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        names = list(executor.map(lambda _: registry.reserve("same.jpg"), range(1000)))
+
+    assert len(set(map(os.path.normcase, names))) == 1000
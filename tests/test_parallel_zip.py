@@ -0,0 +1,86 @@
+import os
+import zipfile
+import pytest
+from src.parallel_zip import ParallelZipWriter, CHUNK_SIZE
+from src.compression_policy import CompressionPolicy
+
+
+@pytest.fixture
+def files(tmp_path):
+    contents = {
+        "empty.txt": b"",
+        "small.txt": b"hello world " * 10,
+        "random.bin": os.urandom(1000),
+        "exact_chunk.txt": b"a" * CHUNK_SIZE,
+        "multi_chunk.txt": (b"0123456789abcdef" * (CHUNK_SIZE // 4))[: 3 * CHUNK_SIZE + 5],
+        "multi_chunk_random.bin": os.urandom(2 * CHUNK_SIZE + 1),
+    }
+    paths = {}
+    for name, content in contents.items():
+        path = tmp_path / name
+        path.write_bytes(content)
+        paths[name] = (str(path), content)
+    return paths
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_archive_round_trips(files, tmp_path, workers):
+    zip_path = str(tmp_path / "out.zip")
+    written = []
+
+    with ParallelZipWriter(zip_path, workers, on_entry_written=written.append) as writer:
+        for name, (path, _) in files.items():
+            writer.write(path, name)
+
+    assert written == [path for path, _ in files.values()]
+    with zipfile.ZipFile(zip_path) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.namelist() == list(files)
+        for name, (_, content) in files.items():
+            assert zipf.read(name) == content
+    # highly compressible data is actually compressed
+    assert os.path.getsize(zip_path) < 2 * CHUNK_SIZE + 1000 + 4 * CHUNK_SIZE
+
+
+def test_zip64_entries(files, tmp_path, monkeypatch):
+    monkeypatch.setattr(zipfile, "ZIP64_LIMIT", 100)
+    zip_path = str(tmp_path / "out.zip")
+
+    with ParallelZipWriter(zip_path, 2) as writer:
+        for name, (path, _) in files.items():
+            writer.write(path, name)
+
+    with zipfile.ZipFile(zip_path) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.read("multi_chunk_random.bin") == files["multi_chunk_random.bin"][1]
+
+
+def test_failed_entry_is_left_out(files, tmp_path):
+    zip_path = str(tmp_path / "out.zip")
+
+    with ParallelZipWriter(zip_path, 2) as writer:
+        writer.write(files["small.txt"][0], "small.txt")
+        with pytest.raises(FileNotFoundError):
+            writer.write(str(tmp_path / "missing.txt"), "missing.txt")
+        writer.write(files["random.bin"][0], "random.bin")
+
+    with zipfile.ZipFile(zip_path) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.namelist() == ["small.txt", "random.bin"]
+
+
+def test_policy_stores_incompressible_entries(files, tmp_path):
+    zip_path = str(tmp_path / "out.zip")
+
+    with ParallelZipWriter(zip_path, 2, policy=CompressionPolicy()) as writer:
+        for name, (path, _) in files.items():
+            writer.write(path, name)
+
+    with zipfile.ZipFile(zip_path) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.getinfo("multi_chunk_random.bin").compress_type == zipfile.ZIP_STORED
+        assert zipf.getinfo("multi_chunk.txt").compress_type == zipfile.ZIP_DEFLATED
+        for name, (_, content) in files.items():
+            assert zipf.read(name) == content
+    assert writer.stats.bytes_saved > 0
+    assert writer.stats.by_compression["stored"]["files"] == 2
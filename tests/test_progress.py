@@ -0,0 +1,58 @@
+from src.progress import ProgressTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_progress_is_weighted_by_bytes():
+    clock = FakeClock()
+    tracker = ProgressTracker(lambda: (2, 1000, False), clock=clock)
+
+    # a tiny file done, the big one half way
+    tracker.add_bytes(10)
+    tracker.file_done()
+    tracker.add_bytes(490)
+    clock.now += 10
+    snapshot = tracker.snapshot()
+
+    assert snapshot.percent == 50
+    assert snapshot.files_done == 1
+    assert snapshot.files_total == 2
+    assert snapshot.bytes_per_second == 50
+    assert snapshot.files_per_second == 0.1
+    assert snapshot.eta_seconds == 10
+
+
+def test_snapshots_are_rate_limited():
+    clock = FakeClock()
+    tracker = ProgressTracker(lambda: (1, 100, False), max_updates_per_second=4, clock=clock)
+
+    assert tracker.snapshot() is not None
+    clock.now += 0.1
+    assert tracker.snapshot() is None
+    assert tracker.snapshot(force=True) is not None
+    clock.now += 0.3
+    assert tracker.snapshot() is not None
+
+
+def test_unknown_totals():
+    clock = FakeClock()
+    tracker = ProgressTracker(lambda: (0, 0, True), clock=clock)
+
+    snapshot = tracker.snapshot()
+
+    assert snapshot.percent == 0
+    assert snapshot.eta_seconds is None
+    assert snapshot.scanning
+
+
+def test_empty_files_use_file_count():
+    tracker = ProgressTracker(lambda: (4, 0, False), clock=FakeClock())
+    tracker.file_done()
+
+    assert tracker.snapshot().percent == 25
@@ -0,0 +1,95 @@
+import json
+import os
+import pstats
+import threading
+import cli
+from src.copy_engine import CopyEngine
+from src.file_options import CopyOptions
+from src.run_report import RunProfiler, RunReport
+
+
+def test_keeps_only_the_slowest_files():
+    report = RunReport(slowest_count=2)
+
+    for i, seconds in enumerate([0.5, 3.0, 0.1, 2.0]):
+        report.file_done(f"file{i}.jpg", 100, seconds, "copy.sendfile")
+
+    result = report.to_dict()
+    assert [item["path"] for item in result["slowest_files"]] == ["file1.jpg", "file3.jpg"]
+    assert result["counters"] == {"files": 4, "bytes": 400}
+    assert result["phases"]["copy.sendfile"] == 5.6
+
+
+def test_phases_add_up_across_threads():
+    report = RunReport()
+
+    def work():
+        for _ in range(1000):
+            report.add_time("scan.stat", 0.001)
+            report.count("entries_seen")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert round(report.phases["scan.stat"], 6) == 4.0
+    assert report.counters["entries_seen"] == 4000
+
+
+def test_profiler_sees_worker_threads(tmp_path):
+    def busy_worker():
+        return sum(range(1000))
+
+    profiler = RunProfiler(cprofile=True, trace_memory=True)
+    profiler.start()
+    thread = threading.Thread(target=busy_worker)
+    thread.start()
+    thread.join()
+    results = profiler.stop(dump_path=str(tmp_path / "run.prof"))
+
+    functions = pstats.Stats(str(tmp_path / "run.prof")).stats
+    assert any(name == "busy_worker" for _, _, name in functions)
+    assert results["functions"]
+    assert results["peak_traced_mb"] > 0
+
+
+def test_engine_writes_the_report(tmp_path):
+    source = tmp_path / "photo.jpg"
+    source.write_bytes(b"x" * 4096)
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    report_path = tmp_path / "reports" / "run.json"
+
+    options = CopyOptions(str(tmp_path), report_path=str(report_path))
+    engine = CopyEngine([str(source)], str(destination), options)
+
+    assert engine.run() == CopyEngine.FINISHED
+    report = json.loads(report_path.read_text())
+    assert report["status"] == CopyEngine.FINISHED
+    assert report["counters"]["files"] == 1
+    assert report["counters"]["bytes"] == 4096
+    assert report["slowest_files"][0]["path"] == str(source)
+    assert report["slowest_files"][0]["phase"].startswith("copy.")
+
+
+def test_cli_profiles_the_scan_and_the_copy_workers(tmp_path):
+    source = tmp_path / "source"
+    (source / "nested").mkdir(parents=True)
+    for i in range(6):
+        (source / "nested" / f"{i}.jpg").write_bytes(b"x" * 4096)
+    report_path = tmp_path / "run.json"
+
+    exit_code = cli.main(
+        [str(source), "-d", str(tmp_path / "out"), "--workers", "2", "--scan-workers", "2"]
+        + ["--profile", "--report", str(report_path), "-q"]
+    )
+
+    assert exit_code == 0
+    assert len(os.listdir(tmp_path / "out")) == 6
+    functions = pstats.Stats(str(tmp_path / "run.prof")).stats
+    names = {(os.path.basename(filename), name) for filename, _, name in functions}
+    # the scanner thread starts before the engine runs
+    assert ("file_scanner.py", "_scan") in names
+    assert ("copy_engine.py", "_copy_file") in names
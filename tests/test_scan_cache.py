@@ -0,0 +1,163 @@
+import os
+import time
+import pytest
+from src.copy_engine import CopyEngine, scan_files
+from src.file_filter import FileFilter
+from src.file_options import CopyOptions
+from src.file_scanner import FileScanner
+from src.file_walker import walk_files
+from src.run_report import RunReport
+from src.scan_cache import ScanCache
+
+
+@pytest.fixture
+def source(make_source):
+    folder = make_source(
+        {
+            "a.jpg": b"a",
+            "nested/b.jpg": b"bb",
+            "nested/deep/c.jpg": b"ccc",
+            "nested/notes.txt": b"text",
+        }
+    )
+    age_folders(folder)
+    return folder
+
+
+def age_folders(folder):
+    # the cache skips folders modified within its racy window
+    old = time.time() - 60
+    for path, _, _ in os.walk(folder):
+        os.utime(path, (old, old))
+
+
+def scan(source, cache_path, file_filter=None, exclude_folder=None):
+    file_filter = file_filter or FileFilter({".jpg"})
+    cache = ScanCache(str(cache_path), file_filter.fingerprint())
+    report = RunReport()
+    files = walk_files(str(source), file_filter, exclude_folder, report=report, scan_cache=cache)
+    found = sorted((os.path.relpath(entry.path, source), entry.size) for entry in files)
+    cache.close()
+    return found, report.counters
+
+
+def test_rescan_of_unchanged_tree_lists_nothing(source, tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    first, counters = scan(source, cache_path)
+    assert counters["folders_listed"] == 3
+
+    second, counters = scan(source, cache_path)
+
+    assert second == first == [
+        ("a.jpg", 1),
+        (os.path.join("nested", "b.jpg"), 2),
+        (os.path.join("nested", "deep", "c.jpg"), 3),
+    ]
+    assert counters["folders_listed"] == 0
+    assert counters["folders_cached"] == 3
+
+
+def test_changed_folder_is_listed_again(source, tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    scan(source, cache_path)
+    (source / "nested" / "new.jpg").write_bytes(b"new")
+    (source / "nested" / "deep" / "c.jpg").unlink()
+    age_folders(source)
+
+    found, counters = scan(source, cache_path)
+
+    assert [path for path, _ in found] == [
+        "a.jpg",
+        os.path.join("nested", "b.jpg"),
+        os.path.join("nested", "new.jpg"),
+    ]
+    assert counters["folders_listed"] == 3
+
+
+def test_recently_changed_folders_are_not_cached(source, tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    (source / "nested" / "new.jpg").write_bytes(b"new")
+
+    scan(source, cache_path)
+    _, counters = scan(source, cache_path)
+
+    assert counters["folders_listed"] == 1
+    assert counters["folders_cached"] == 2
+
+
+def test_other_filters_have_their_own_entries(source, tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    scan(source, cache_path)
+
+    found, counters = scan(source, cache_path, FileFilter({".txt"}))
+
+    assert found == [(os.path.join("nested", "notes.txt"), 4)]
+    assert counters["folders_cached"] == 0
+
+
+def test_excluded_folders_are_skipped_on_cached_scans(source, tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    scan(source, cache_path)
+
+    found, _ = scan(source, cache_path, exclude_folder=str(source / "nested" / "deep"))
+
+    assert [path for path, _ in found] == ["a.jpg", os.path.join("nested", "b.jpg")]
+
+
+def test_invalidate_forgets_the_folder_and_below(source, tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    scan(source, cache_path)
+    cache = ScanCache(str(cache_path))
+    assert len(cache) == 3
+
+    # a sibling whose name starts the same is kept
+    cache.store(str(source) + "-other", os.stat(source), [], [], time.time())
+    cache.invalidate(str(source / "nested"))
+    assert len(cache) == 2
+    cache.invalidate()
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_least_recently_used_folders_are_evicted(source, tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    scan(source, cache_path)
+    file_filter = FileFilter({".jpg"})
+    cache = ScanCache(str(cache_path), file_filter.fingerprint(), max_folders=2)
+    cache._now += 10
+    cache.lookup(str(source), os.stat(source))
+    cache.lookup(str(source / "nested"), os.stat(source / "nested"))
+    cache.close()
+
+    cache = ScanCache(str(cache_path), file_filter.fingerprint())
+    assert len(cache) == 2
+    assert cache.lookup(str(source / "nested" / "deep"), os.stat(source / "nested" / "deep")) is None
+    cache.close()
+
+
+def test_incremental_copies_see_files_edited_in_place(source, tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    destination = tmp_path / "destination"
+    destination.mkdir()
+
+    def copy():
+        cache = ScanCache(str(cache_path), FileFilter({".jpg"}).fingerprint())
+        files = scan_files(str(source), str(destination), FileFilter({".jpg"}), 1, scan_cache=cache)
+        options = CopyOptions(str(source), incremental=True)
+        engine = CopyEngine(FileScanner(files).start(), str(destination), options)
+        assert engine.run() == CopyEngine.FINISHED
+        return engine
+
+    copy()
+    edited = source / "nested" / "b.jpg"
+    folder_times = os.stat(edited.parent)
+    edited.write_bytes(b"edited in place")
+    os.utime(edited, (time.time() + 10, time.time() + 10))
+    # the folder doesn't change when a file in it is rewritten
+    os.utime(edited.parent, ns=(folder_times.st_atime_ns, folder_times.st_mtime_ns))
+
+    engine = copy()
+
+    assert engine.files_done == 1
+    assert engine.files_skipped == 2
+    assert (destination / "b.jpg").read_bytes() == b"edited in place"
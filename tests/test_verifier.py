@@ -0,0 +1,124 @@
+import hashlib
+import os
+import pytest
+import cli
+from src.copy_engine import CopyEngine
+from src.file_options import ArchiveFormat, CopyOptions, OutputMode
+from src.verifier import Verifier, check_algorithm
+from tests.conftest import copied_files, files_of
+
+
+def sha256(path):
+    return hashlib.sha256(open(path, "rb").read()).hexdigest()
+
+
+def test_copy_writes_a_sha256sum_manifest(source, tmp_path):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    options = CopyOptions(str(source), verify_algorithm="sha256", verify_reread=True)
+    engine = CopyEngine(files_of(source), str(destination), options)
+
+    assert engine.run() == CopyEngine.FINISHED
+    assert engine.manifests == [str(destination / "SHA256SUMS")]
+    assert (destination / "SHA256SUMS").read_text() == (
+        f"{sha256(source / 'a.jpg')}  a.jpg\n"
+        f"{sha256(source / 'nested' / 'b.png')}  b.png\n"
+        f"{sha256(source / 'notes.txt')}  notes.txt\n"
+    )
+    assert engine.verifier.verified == 3
+    assert engine.verifier.mismatches == []
+
+
+def test_reread_reports_copies_that_differ(tmp_path):
+    copy = tmp_path / "a.jpg"
+    copy.write_bytes(b"corrupted")
+    verifier = Verifier("md5", reread=True)
+
+    verifier.file_written("a.jpg", hashlib.md5(b"original").hexdigest(), [str(tmp_path)])
+    verifier.file_written("missing.jpg", hashlib.md5(b"").hexdigest(), [str(tmp_path)])
+    verifier.close()
+
+    assert verifier.verified == 2
+    mismatches = sorted(verifier.mismatches)
+    assert [path for path, _, _ in mismatches] == [str(copy), str(tmp_path / "missing.jpg")]
+    assert mismatches[1][2].startswith("unreadable")
+
+
+@pytest.mark.parametrize("archive_format", [ArchiveFormat.ZIP, ArchiveFormat.TAR_GZ])
+def test_archives_are_read_back(source, tmp_path, archive_format):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    engine = CopyEngine(
+        files_of(source),
+        str(destination),
+        CopyOptions(
+            str(source),
+            compress_after_copy=True,
+            archive_format=archive_format,
+            verify_algorithm="sha1",
+            verify_reread=True,
+        ),
+    )
+
+    assert engine.run() == CopyEngine.FINISHED
+    assert engine.verifier.verified == 3
+    assert engine.verifier.mismatches == []
+    manifest = (destination / "SHA1SUMS").read_text().splitlines()
+    assert [line.split("  ")[1] for line in manifest] == ["a.jpg", "b.png", "notes.txt"]
+
+
+def test_manifest_escapes_names_like_sha256sum(tmp_path):
+    verifier = Verifier()
+    verifier.file_written("back\\slash.jpg", "00", [str(tmp_path)])
+
+    verifier.write_manifests()
+
+    assert (tmp_path / "SHA256SUMS").read_text() == "\\00  back\\\\slash.jpg\n"
+
+
+def test_algorithms_are_checked():
+    assert check_algorithm("SHA-256") == "sha256"
+    with pytest.raises(ValueError):
+        check_algorithm("crc32")
+    with pytest.raises(ValueError):
+        check_algorithm("shake_128")
+
+
+def test_links_can_not_be_verified(source, tmp_path):
+    with pytest.raises(ValueError):
+        CopyEngine(
+            files_of(source),
+            str(tmp_path),
+            CopyOptions(str(source), output_mode=OutputMode.HARDLINK, verify_algorithm="sha256"),
+        )
+
+
+def test_cli_verifies_copies(source, tmp_path):
+    destination = tmp_path / "destination"
+
+    exit_code = cli.main([str(source), "-d", str(destination), "--verify", "md5", "--reread", "-q"])
+
+    assert exit_code == 0
+    assert sorted(os.listdir(destination)) == ["MD5SUMS", "a.jpg", "b.png"]
+
+
+def test_reruns_update_the_manifest_of_a_fixed_destination(source, tmp_path):
+    destination = tmp_path / "destination"
+    arguments = [str(source), "-d", str(destination), "--incremental", "--verify", "md5", "-q"]
+    assert cli.main(arguments) == 0
+
+    (source / "c.jpg").write_bytes(b"c")
+    assert cli.main(arguments) == 0
+
+    assert copied_files(destination) == ["MD5SUMS", "a.jpg", "b.png", "c.jpg"]
+    manifest = (destination / "MD5SUMS").read_text().splitlines()
+    assert [line.split("  ")[1] for line in manifest] == ["a.jpg", "b.png", "c.jpg"]
+
+
+def test_files_that_are_not_manifests_are_kept(tmp_path):
+    (tmp_path / "SHA256SUMS").write_text("my notes\n")
+    verifier = Verifier()
+    verifier.file_written("a.jpg", "00", [str(tmp_path)])
+
+    assert verifier.write_manifests() == [str(tmp_path / "SHA256SUMS_1")]
+    assert (tmp_path / "SHA256SUMS").read_text() == "my notes\n"
@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+import pytest
+from src.copy_journal import CopyJournal
+from src.file_filter import FileFilter
+from src.file_options import CopyOptions, FileType
+from src.file_table import FileTable
+from src.file_walker import FileEntry
+from src.name_registry import NameRegistry
+from src.watcher import InotifyWatcher, PollingWatcher, WatchCopy, Watcher
+from tests.conftest import copied_files
+
+SETTLE_SECONDS = 0.3
+
+watchers = [
+    pytest.param(
+        lambda *args: InotifyWatcher(*args, settle_seconds=SETTLE_SECONDS),
+        marks=pytest.mark.skipif(not InotifyWatcher.available(), reason="needs inotify"),
+        id="inotify",
+    ),
+    pytest.param(
+        lambda *args: PollingWatcher(*args, settle_seconds=SETTLE_SECONDS, poll_interval=0.05),
+        id="polling",
+    ),
+]
+
+
+@pytest.fixture
+def source(make_source):
+    return make_source({"old.jpg": b"old"})
+
+
+class Collector:
+    """Runs a watcher's batches() on a thread and keeps what it yields."""
+
+    def __init__(self, watcher):
+        self.watcher = watcher.start()
+        self.batches = []
+        self.thread = threading.Thread(target=self._collect)
+        self.thread.start()
+
+    def _collect(self):
+        for batch in self.watcher.batches():
+            self.batches.append([entry.path for entry in batch])
+
+    def files(self):
+        return sorted(os.path.basename(path) for batch in self.batches for path in batch)
+
+    def stop(self):
+        self.watcher.stop()
+        self.thread.join(5)
+        assert not self.thread.is_alive()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+@pytest.mark.parametrize("make_watcher", watchers)
+def test_reports_new_files_once_they_settle(make_watcher, source):
+    collector = Collector(make_watcher(str(source), FileFilter({".jpg"})))
+    try:
+        (source / "new.jpg").write_bytes(b"new")
+        (source / "notes.txt").write_bytes(b"text")
+        (source / "nested" / "deep").mkdir(parents=True)
+        (source / "nested" / "deep" / "later.jpg").write_bytes(b"later")
+
+        assert wait_for(lambda: collector.files() == ["later.jpg", "new.jpg"])
+    finally:
+        collector.stop()
+
+
+@pytest.mark.parametrize("make_watcher", watchers)
+def test_waits_for_a_file_being_written(make_watcher, source):
+    collector = Collector(make_watcher(str(source), FileFilter({".jpg"})))
+    try:
+        with open(source / "slow.jpg", "wb") as file:
+            for _ in range(8):
+                file.write(b"x" * 100)
+                file.flush()
+                os.utime(file.fileno(), None)
+                time.sleep(SETTLE_SECONDS / 3)
+                assert collector.files() == []
+
+        assert wait_for(lambda: collector.files() == ["slow.jpg"])
+        assert os.path.getsize(collector.batches[0][0]) == 800
+    finally:
+        collector.stop()
+
+
+@pytest.mark.parametrize("make_watcher", watchers)
+def test_ignores_excluded_folders(make_watcher, source):
+    output = source / "output"
+    output.mkdir()
+    collector = Collector(make_watcher(str(source), FileFilter({".jpg"}), str(output)))
+    try:
+        (output / "copied.jpg").write_bytes(b"copy")
+        (source / "new.jpg").write_bytes(b"new")
+
+        assert wait_for(lambda: collector.files() == ["new.jpg"])
+        time.sleep(SETTLE_SECONDS)
+        assert collector.files() == ["new.jpg"]
+    finally:
+        collector.stop()
+
+
+def test_watcher_is_abstract():
+    with pytest.raises(TypeError):
+        Watcher(None, None)
+
+
+@pytest.mark.skipif(not InotifyWatcher.available(), reason="needs inotify")
+def test_inotify_watcher_stopped_before_iterating_closes_its_descriptors(source):
+    watcher = InotifyWatcher(str(source), FileFilter({".jpg"})).start()
+    fds = [watcher._fd, watcher._wake_read, watcher._wake_write]
+
+    watcher.stop()
+
+    for fd in fds:
+        with pytest.raises(OSError):
+            os.fstat(fd)
+    assert list(watcher.batches()) == []
+
+
+def test_watch_copy_copies_existing_then_new_files(source, tmp_path):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    copy_options = CopyOptions(
+        str(source), FileType.IMAGES, destination=str(destination), incremental=True
+    )
+    watcher = PollingWatcher(
+        str(source), FileFilter({".jpg"}), str(destination), SETTLE_SECONDS, poll_interval=0.05
+    )
+    watch_copy = WatchCopy(copy_options, str(destination), watcher=watcher)
+    thread = threading.Thread(target=watch_copy.run)
+    thread.start()
+    try:
+        assert wait_for(lambda: copied_files(destination) == ["old.jpg"])
+        (source / "new.jpg").write_bytes(b"new")
+        assert wait_for(lambda: copied_files(destination) == ["new.jpg", "old.jpg"])
+    finally:
+        watch_copy.stop()
+        thread.join(5)
+    assert watch_copy.files_done == 2
+
+
+def test_watch_copy_needs_incremental_copy(source, tmp_path):
+    with pytest.raises(ValueError):
+        WatchCopy(CopyOptions(str(source)), str(tmp_path))
+    with pytest.raises(ValueError):
+        WatchCopy(
+            CopyOptions(
+                str(source), compress_after_copy=True, destination=str(tmp_path), incremental=True
+            ),
+            str(tmp_path),
+        )
+
+
+class ListWatcher(Watcher):
+    """Hands out batches made up front."""
+
+    def __init__(self, batches):
+        super().__init__(None, None)
+        self._batches = batches
+
+    def batches(self):
+        yield from self._batches
+
+
+def test_watch_copy_loads_the_destination_once(source, tmp_path, monkeypatch):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    batches = []
+    for i in range(3):
+        (source / f"{i}.jpg").write_bytes(b"x")
+        batches.append([FileEntry.from_path(source / f"{i}.jpg")])
+    loads = []
+    destinations = CopyJournal.destinations
+    monkeypatch.setattr(
+        CopyJournal, "destinations", lambda self: loads.append(1) or destinations(self)
+    )
+    listings = []
+    from_folders = NameRegistry.from_folders.__func__
+    monkeypatch.setattr(
+        NameRegistry,
+        "from_folders",
+        classmethod(lambda cls, folders: listings.append(folders) or from_folders(cls, folders)),
+    )
+    copy_options = CopyOptions(
+        str(source), FileType.IMAGES, destination=str(destination), incremental=True
+    )
+
+    WatchCopy(copy_options, str(destination), watcher=ListWatcher(batches)).run()
+
+    assert copied_files(destination) == ["0.jpg", "1.jpg", "2.jpg", "old.jpg"]
+    assert len(loads) == 1
+    assert len(listings) == 1
+
+
+def test_watch_batches_are_handed_over_as_file_tables(source, tmp_path):
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    (source / "new.jpg").write_bytes(b"new")
+    batch = [FileEntry.from_path(source / "new.jpg")]
+    handed = []
+    copy_options = CopyOptions(
+        str(source), FileType.IMAGES, destination=str(destination), incremental=True
+    )
+
+    WatchCopy(
+        copy_options,
+        str(destination),
+        on_batch=lambda engine, status: handed.append(engine.absolute_path_files),
+        watcher=ListWatcher([batch]),
+    ).run()
+
+    assert isinstance(handed[1], FileTable)
+    assert [entry.path for entry in handed[1]] == [str(source / "new.jpg")]